@@ -0,0 +1,282 @@
+# load packages
+import random
+import re
+
+######
+#
+# This module generates realistic synthetic payloads for every endpoint used
+# by impectPy, so the package can be benchmarked offline
+#
+######
+
+
+# define id mapping providers, positions and actions used in the payloads
+PROVIDERS = ["skill_corner", "heim_spiel", "wyscout", "opta", "stats_perform", "transfermarkt", "soccerdonna"]
+POSITIONS = ["GOALKEEPER", "CENTRAL_DEFENDER", "LEFT_WINGBACK_DEFENDER", "CENTRAL_MIDFIELD", "CENTER_FORWARD"]
+ACTIONS = [("PASS", "PASS"), ("RECEPTION", "RECEPTION"), ("DRIBBLE", "DRIBBLE"), ("SHOT", "SHOT"), ("GOAL", "SHOT"), ("KICK_OFF", "KICK_OFF")]
+
+NAMED_KPIS = [
+    "BYPASSED_OPPONENTS", "BYPASSED_DEFENDERS", "BYPASSED_OPPONENTS_RECEIVING", "BYPASSED_DEFENDERS_RECEIVING",
+    "BALL_LOSS_ADDED_OPPONENTS", "BALL_LOSS_REMOVED_TEAMMATES", "BALL_WIN_ADDED_TEAMMATES",
+    "BALL_WIN_REMOVED_OPPONENTS", "REVERSE_PLAY_ADDED_OPPONENTS", "REVERSE_PLAY_ADDED_OPPONENTS_DEFENDERS",
+    "BYPASSED_OPPONENTS_RAW", "BYPASSED_OPPONENTS_DEFENDERS_RAW", "SHOT_XG", "POSTSHOT_XG", "PACKING_XG",
+    "PXT_BLOCK", "PXT_DRIBBLE", "PXT_FOUL", "PXT_BALL_WIN", "PXT_PASS", "PXT_REC", "PXT_SHOT", "PXT_SETPIECE"
+]
+
+
+# define function to create id mappings for an entity
+def mappings(rng: random.Random, i: int) -> list:
+    """Return a list of id mappings with a random subset of providers left empty."""
+    return [{p: ([i * 10 + k] if rng.random() > 0.2 else [])} for k, p in enumerate(PROVIDERS)]
+
+
+# define dataset sizes used by the benchmark suite
+scales = {
+    "small": {"n_iterations": 1, "n_squads": 4, "n_players": 14, "n_events": 500},
+    "medium": {"n_iterations": 2, "n_squads": 6, "n_players": 18, "n_events": 1500},
+    "large": {"n_iterations": 2, "n_squads": 10, "n_players": 22, "n_events": 3500},
+}
+
+
+######
+#
+# This class holds the synthetic payloads of all endpoints
+#
+######
+
+
+class SyntheticDataset:
+    def __init__(
+            self, n_iterations: int = 2, n_squads: int = 6, n_players: int = 8, n_events: int = 200,
+            n_kpis: int = 30, seed: int = 0
+    ):
+        """Generate payloads for the given number of iterations, squads per iteration, players per squad,
+        events per match and KPIs.
+
+        Every squad plays every other squad home and away, so each iteration contains
+        ``n_squads * (n_squads - 1)`` matches. The same arguments always produce the same payloads.
+        """
+        rng = random.Random(seed)
+        self.rng = rng
+        self.data = {}
+        self.countries = [{"id": c, "fifaName": f"Country {c}"} for c in range(1, 6)]
+        self.data["/countries"] = self.countries
+        self.kpis = [{"id": k, "name": f"KPI_{k}"} for k in range(1, n_kpis + 1)]
+        for name in NAMED_KPIS:
+            self.kpis.append({"id": len(self.kpis) + 1, "name": name})
+        self.data["/kpis"] = self.kpis
+        self.data["/kpis/event"] = self.kpis
+        self.data["/player-scores"] = [{"id": k, "name": f"SCORE_{k}"} for k in range(1, 11)]
+        self.data["/squad-scores"] = [{"id": k, "name": f"SQSCORE_{k}"} for k in range(1, 6)]
+        self.data["/player-profiles"] = [{"name": f"PROFILE_{k}"} for k in range(1, 5)]
+        iterations = []
+        match_id = 1000
+        self.matches = []
+        for it in range(1, n_iterations + 1):
+            iterations.append({
+                "id": it, "competitionId": 10 + it, "competitionName": f"League {it}", "season": "2024/25",
+                "competitionType": "LEAGUE", "competitionCountryId": 1, "competitionGender": "MALE",
+                "competitionAgeGroup": "SENIOR", "dataVersion": "V5", "lastChangeTimestamp": "2025-01-01",
+                "idMappings": mappings(rng, it),
+            })
+            squads = [{"id": it * 100 + s, "name": f"Squad {it}-{s}", "type": "CLUB", "gender": "MALE",
+                       "countryId": rng.randint(1, 5), "access": True, "idMappings": mappings(rng, s)}
+                      for s in range(n_squads)]
+            self.data[f"/iterations/{it}/squads"] = squads
+            players = []
+            for sq in squads:
+                for p in range(n_players):
+                    pid = sq["id"] * 100 + p
+                    players.append({"id": pid, "commonname": f"Player {pid}", "firstname": "F", "lastname": "L",
+                                    "birthdate": "2000-01-01", "birthplace": "X", "leg": "RIGHT",
+                                    "countryIds": [rng.randint(1, 5)], "idMappings": mappings(rng, pid)})
+            self.data[f"/iterations/{it}/players"] = players
+            self.data[f"/iterations/{it}/coaches"] = [{"id": sq["id"], "name": f"Coach {sq['id']}"} for sq in squads]
+            matchplan = []
+            for a in range(n_squads):
+                for b in range(n_squads):
+                    if a == b:
+                        continue
+                    match_id += 1
+                    home, away = squads[a], squads[b]
+                    m = {"id": match_id, "iterationId": it, "matchDayIndex": len(matchplan) // 3,
+                         "matchDayName": f"MD {len(matchplan) // 3}", "stadiumId": 1,
+                         "homeSquadId": home["id"], "awaySquadId": away["id"],
+                         "scheduledDate": "2025-01-01T15:30:00Z", "lastCalculationDate": "2025-01-02",
+                         "available": True, "goalsHomeFullTime": 1, "goalsAwayFullTime": 0,
+                         "resultType": "REGULAR", "result": "HOME", "idMappings": mappings(rng, match_id)}
+                    matchplan.append(m)
+                    self.matches.append(m)
+                    self.add_match(m, home, away, players, n_players, n_events)
+            self.data[f"/iterations/{it}/matches"] = matchplan
+            self.add_iteration(it, squads, players, n_players)
+        self.data["/iterations/"] = iterations
+
+    def add_match(self, m: dict, home: dict, away: dict, players: list, n_players: int, n_events: int):
+        """Add the match level payloads (events, event kpis, set pieces, match sums and scores) of a match."""
+        rng = self.rng
+        mid = m["id"]
+        hp = [home["id"] * 100 + p for p in range(n_players)]
+        ap = [away["id"] * 100 + p for p in range(n_players)]
+
+        def lineup(ids):
+            return [{"id": i, "shirtNumber": i % 99} for i in ids]
+
+        self.data[f"/matches/{mid}"] = {
+            "id": mid, "iterationId": m["iterationId"], "lastCalculationDate": "2025-01-02",
+            "squadHome": {"id": home["id"], "coachId": home["id"], "players": lineup(hp),
+                          "formations": [{"gameTime": "00:00", "gameTimeInSec": 0, "formation": "4-4-2"}],
+                          "substitutions": [{"gameTime": {"gameTime": "60:00", "gameTimeInSec": 3600},
+                                             "substitutionType": "SUB", "playerId": hp[0], "fromPosition": "X",
+                                             "fromPositionSide": "L", "toPosition": "Y", "positionSide": "R",
+                                             "exchangedPlayerId": hp[1]}],
+                          "startingPositions": [{"playerId": i, "position": "CENTRAL_MIDFIELD", "positionSide": "C"} for i in hp]},
+            "squadAway": {"id": away["id"], "coachId": away["id"], "players": lineup(ap),
+                          "formations": [{"gameTime": "00:00", "gameTimeInSec": 0, "formation": "4-3-3"}],
+                          "substitutions": [],
+                          "startingPositions": [{"playerId": i, "position": "CENTRAL_MIDFIELD", "positionSide": "C"} for i in ap]},
+        }
+        events = []
+        kpis = []
+        set_pieces = []
+        sp_id = mid * 10
+        for e in range(n_events):
+            side = home if (e // 7) % 2 == 0 else away
+            pid = (hp if side is home else ap)[(e // 3) % n_players]
+            action, action_type = ACTIONS[0] if e % 5 else ACTIONS[1]
+            if e == 0:
+                action, action_type = "KICK_OFF", "KICK_OFF"
+            elif e % 53 == 0:
+                action, action_type = "GOAL", "SHOT"
+            eid = mid * 10000 + e
+            period = 1 if e < n_events // 2 else 2
+            ev = {
+                "id": eid, "index": e, "sequenceIndex": e // 4, "periodId": period,
+                "gameTime": {"gameTime": f"{e}:00", "gameTimeInSec": (period - 1) * 10000 + e * 10},
+                "duration": 1.5, "squadId": side["id"], "currentAttackingSquadId": side["id"],
+                "phase": "IN_POSSESSION" if e % 11 else "SET_PIECE",
+                "playerId": pid, "playerPosition": POSITIONS[e % len(POSITIONS)], "playerPositionSide": "CENTER",
+                "actionType": action_type, "action": action, "bodyPart": "FOOT", "bodyPartExtended": "RIGHT_FOOT",
+                "previousPassHeight": None, "result": "SUCCESS" if e % 3 else "FAIL",
+                "start": {"coordinates": {"x": 1.0, "y": 2.0}, "adjCoordinates": {"x": 1.0, "y": 2.0},
+                          "packingZone": "CMC", "pitchPosition": "OWN", "lane": "CENTER"},
+                "end": {"coordinates": {"x": 3.0, "y": 4.0}, "adjCoordinates": {"x": 3.0, "y": 4.0},
+                        "packingZone": "AML", "pitchPosition": "OPP", "lane": "LEFT"},
+                "opponents": e % 11, "pressure": float(e % 100), "distanceToGoal": 30.0,
+                "pxTTeam": 0.01, "pxTOpponent": 0.02, "pressingPlayerId": None, "distanceToOpponent": 2.0,
+                "pass": {"receiver": {"type": "TEAMMATE", "playerId": pid}, "distance": 12.0, "angle": 0.5},
+                "shot": {"distance": None, "angle": None, "targetPoint": {"y": None, "z": None}, "woodwork": None,
+                         "gkCoordinates": {"x": None, "y": None}, "gkAdjCoordinates": {"x": None, "y": None},
+                         "gkDivePoint": {"y": None, "z": None}},
+                "fouledPlayerId": None, "formationTeam": "4-4-2", "formationOpponent": "4-3-3",
+                "inferredSetPiece": None,
+                "setPieceId": sp_id + (e // 50) if e % 50 == 0 else None,
+                "setPieceSubPhaseId": (sp_id + (e // 50)) * 10 if e % 50 == 0 else None,
+            }
+            events.append(ev)
+            for k in range(e % 4):
+                kpis.append({"eventId": eid, "playerId": pid, "position": ev["playerPosition"],
+                             "kpiId": self.kpis[(e + k) % len(self.kpis)]["id"], "value": round(rng.random(), 3)})
+            if e % 50 == 0:
+                set_pieces.append({
+                    "id": sp_id + (e // 50), "matchId": mid, "squadId": side["id"], "phaseIndex": e // 50,
+                    "startTime": "0:00", "startTimeInSec": e, "endTime": "0:10", "endTimeInSec": e + 10,
+                    "setPieceCategory": "CORNER", "adjSetPieceCategory": "CORNER", "setPieceExecutionType": "DIRECT",
+                    "setPieceSubPhase": [{
+                        "id": (sp_id + (e // 50)) * 10, "index": 0, "startZone": "A", "cornerEndZone": "B",
+                        "cornerType": "IN", "freeKickEndZone": None, "freeKickType": None,
+                        "goalKickEndZone": None, "goalKickType": None, "throwInEndZone": None, "throwInType": None,
+                        "secondDeliveryEndZone": None, "secondDeliveryType": None, "mainEvent": "PASS",
+                        "mainEventPlayerId": pid, "mainEventOutcome": "OK", "passReceiverId": pid,
+                        "ballTrajectory": "HIGH", "firstTouchPlayerId": pid, "firstTouchWon": True,
+                        "indirectHeader": False, "secondTouchPlayerId": None, "secondTouchWon": None,
+                        "secondTouchEndZone": None,
+                        "aggregates": {"SHOT_XG": 0.1, "PACKING_XG": 0.0, "POSTSHOT_XG": 0.0,
+                                       "SHOT_AT_GOAL_NUMBER": 1, "GOALS": 0, "PXT_POSITIVE": 0.1,
+                                       "BYPASSED_OPPONENTS": 2, "BYPASSED_DEFENDERS": 1},
+                    }],
+                })
+        self.data[f"/matches/{mid}/events"] = events
+        self.data[f"/matches/{mid}/event-kpis"] = kpis
+        self.data[f"/matches/{mid}/set-pieces"] = set_pieces
+
+        def side_players(ids, key, catalog, id_key):
+            out = []
+            for i in ids:
+                for pos in POSITIONS[:2]:
+                    out.append({"id": i, "position": pos, "matchShare": 0.5, "playDuration": 2700,
+                                key: [{id_key: c["id"], "value": round(rng.random(), 3)} for c in catalog[: 1 + i % len(catalog)]]})
+            return out
+
+        self.data[f"/matches/{mid}/player-kpis"] = {
+            "matchId": mid, "squadHomeId": home["id"], "squadAwayId": away["id"],
+            "squadHomePlayers": side_players(hp, "kpis", self.kpis, "kpiId"),
+            "squadAwayPlayers": side_players(ap, "kpis", self.kpis, "kpiId"),
+        }
+        scores = self.data["/player-scores"]
+        self.data[f"/matches/{mid}/player-scores"] = {
+            "matchId": mid, "squadHomeId": home["id"], "squadAwayId": away["id"],
+            "squadHomePlayers": side_players(hp, "playerScores", scores, "playerScoreId"),
+            "squadAwayPlayers": side_players(ap, "playerScores", scores, "playerScoreId"),
+        }
+        self.data[f"/matches/{mid}/squad-kpis"] = {
+            "matchId": mid, "squadHomeId": home["id"], "squadAwayId": away["id"],
+            "squadHomeKpis": [{"kpiId": k["id"], "value": 1.0} for k in self.kpis],
+            "squadAwayKpis": [{"kpiId": k["id"], "value": 2.0} for k in self.kpis],
+        }
+        self.data[f"/matches/{mid}/squad-scores"] = {
+            "matchId": mid, "squadHomeId": home["id"], "squadAwayId": away["id"],
+            "squadHomeSquadScores": [{"squadScoreId": k["id"], "value": 1.0} for k in self.data["/squad-scores"]],
+            "squadAwaySquadScores": [{"squadScoreId": k["id"], "value": 2.0} for k in self.data["/squad-scores"]],
+        }
+
+    def add_iteration(self, it: int, squads: list, players: list, n_players: int):
+        """Add the iteration level payloads (averages, scores, ratings, coefficients, predictions) of an iteration."""
+        rng = self.rng
+        for sq in squads:
+            ids = [sq["id"] * 100 + p for p in range(n_players)]
+            self.data[f"/iterations/{it}/squads/{sq['id']}/player-kpis"] = [
+                {"playerId": i, "position": POSITIONS[i % 3], "playDuration": 1000, "matchShare": 3.0,
+                 "kpis": [{"kpiId": k["id"], "value": rng.random()} for k in self.kpis[:5]]} for i in ids]
+            self.data[f"/iterations/{it}/squads/{sq['id']}/player-scores"] = [
+                {"playerId": i, "position": POSITIONS[i % 3], "playDuration": 1000, "matchShare": 3.0,
+                 "playerScores": [{"playerScoreId": k["id"], "value": rng.random()} for k in self.data["/player-scores"][:5]]}
+                for i in ids]
+        self.data[f"/iterations/{it}/squad-scores"] = [
+            {"squadId": sq["id"], "matches": 10,
+             "squadScores": [{"squadScoreId": k["id"], "value": 1.0} for k in self.data["/squad-scores"]]} for sq in squads]
+        self.data[f"/iterations/{it}/squad-kpis"] = [
+            {"squadId": sq["id"], "matches": 10, "kpis": [{"kpiId": k["id"], "value": 1.0} for k in self.kpis]} for sq in squads]
+        self.data[f"/iterations/{it}/squads/ratings"] = {"squadRatingsEntries": [
+            {"date": "2025-01-01", "squadRatings": [{"squadId": sq["id"], "value": 1.0} for sq in squads]}]}
+        self.data[f"/iterations/{it}/predictions/model-coefficients"] = {"entries": [
+            {"date": "2025-01-01", "competition": {"intercept": 0.1, "home": 0.2, "comp": 0.3},
+             "squads": [{"id": sq["id"], "att": 0.1, "def": 0.2} for sq in squads]}]}
+        self.data[f"/iterations/{it}/predictions/match-predictions"] = [
+            {"matchId": m["id"], "predMarketHome": 0.5, "predMarketAway": 0.3, "predModelHome": 0.5,
+             "predModelAway": 0.3, "predExpertHome": 0.5, "predExpertAway": 0.3}
+            for m in self.matches if m["iterationId"] == it]
+
+    def lookup(self, path: str):
+        """Return the payload of the given API path or None if the path is unknown."""
+        path = re.sub(r"^/v5/customerapi", "", path)
+        m = re.match(r"^(/iterations/\d+/squads/\d+)/positions/[^/]+/(player-scores|player-profile-scores)$", path)
+        if m:
+            base = self.data.get(f"{m.group(1)}/player-scores")
+            if base is None:
+                return None
+            if m.group(2) == "player-scores":
+                return [{k: v for k, v in r.items() if k != "position"} for r in base]
+            return [{"playerId": r["playerId"], "playDuration": 1, "matchShare": 1.0,
+                     "profileScores": [{"profileName": p["name"], "value": 0.5} for p in self.data["/player-profiles"]]}
+                    for r in base]
+        m = re.match(r"^(/matches/\d+)/positions/[^/]+/player-scores$", path)
+        if m:
+            base = self.data.get(f"{m.group(1)}/player-scores")
+            if base is None:
+                return None
+            out = dict(base)
+            for s in ["squadHomePlayers", "squadAwayPlayers"]:
+                out[s] = [{k: v for k, v in r.items() if k != "position"} for r in base[s]]
+            return out
+        return self.data.get(path)
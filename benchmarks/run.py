@@ -0,0 +1,325 @@
+# load packages
+import os
+import sys
+import re
+import json
+import time
+import glob
+import platform
+import argparse
+import subprocess
+import statistics
+import itertools
+import numpy as np
+import pandas as pd
+from contextlib import nullcontext
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import impectPy as ip  # noqa: E402
+from payloads import SyntheticDataset, scales  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+from impectPy.matches import clean_df  # noqa: E402
+from impectPy.set_pieces import add_set_piece_names  # noqa: E402
+from impectPy.backends import pivot_event_kpis, join_event_kpis  # noqa: E402
+from impectPy.possessions import derive_possessions  # noqa: E402
+
+######
+#
+# This script times all public functions of impectPy end to end against a
+# local stub of the API and tracks the results across package versions
+#
+######
+
+
+# define function to build the benchmark cases
+def cases(api: ip.Impect, iteration: int, matches: list) -> list:
+    """Return a list of (name, function) tuples covering every public get function and generateXML."""
+    state = {}
+
+    def events():
+        state["events"] = api.getEvents(matches)
+        return state["events"]
+
+    def xml():
+        # generate the XML of the first match from the events of the previous case
+        match_events = state["events"][state["events"].matchId == matches[0]]
+        return api.generateXML(
+            match_events, lead=3, lag=3, p1Start=1, p2Start=2, p3Start=3, p4Start=4, p5Start=5,
+            codeTag="team", squad=int(match_events.squadId.iloc[0]), perspective="teamFocus"
+        )
+
+    return [
+        ("getIterations", lambda: api.getIterations()),
+        ("getMatches", lambda: api.getMatches(iteration)),
+        ("getEvents", events),
+        ("generateXML", xml),
+        ("getPlayerMatchsums", lambda: api.getPlayerMatchsums(matches)),
+        ("getSquadMatchsums", lambda: api.getSquadMatchsums(matches)),
+        ("getPlayerMatchScores", lambda: api.getPlayerMatchScores(matches)),
+        ("getSquadMatchScores", lambda: api.getSquadMatchScores(matches)),
+        ("getPlayerIterationAverages", lambda: api.getPlayerIterationAverages(iteration)),
+        ("getSquadIterationAverages", lambda: api.getSquadIterationAverages(iteration)),
+        ("getPlayerIterationScores", lambda: api.getPlayerIterationScores(iteration)),
+        ("getSquadIterationScores", lambda: api.getSquadIterationScores(iteration)),
+        ("getPlayerProfileScores", lambda: api.getPlayerProfileScores(iteration, ["CENTER_FORWARD"])),
+        ("getSetPieces", lambda: api.getSetPieces(matches)),
+        ("getSquadRatings", lambda: api.getSquadRatings(iteration)),
+        ("getSquadCoefficients", lambda: api.getSquadCoefficients(iteration)),
+        ("getFormations", lambda: api.getFormations(matches)),
+        ("getSubstitutions", lambda: api.getSubstitutions(matches)),
+        ("getStartingPositions", lambda: api.getStartingPositions(matches)),
+        ("getMatchPredictions", lambda: api.getMatchPredictions(iteration)),
+    ]
+
+
+# define import statements timed in a fresh interpreter
+imports = {
+    "import impectPy": "import impectPy",
+    "import getMatches": "from impectPy import getMatches",
+    "import Impect": "from impectPy import Impect",
+    "import generateXML": "from impectPy import generateXML",
+}
+
+
+# define function to time imports
+def time_imports(repeat: int, only: list = None) -> dict:
+    """Time each import statement ``repeat`` times in a fresh interpreter and return the results."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = {}
+    for name, statement in imports.items():
+        if only and name not in only:
+            continue
+        timings = []
+        for _ in range(repeat):
+            code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+            output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+            timings.append(float(output.stdout))
+        results[name] = {"median": statistics.median(timings), "min": min(timings), "max": max(timings)}
+        print(f"{name:<30} {results[name]['median']:>8.3f}s")
+    return results
+
+
+# define number of matches used for the transformation cases per scale
+transform_sizes = {"small": 2000, "medium": 5000, "large": 10000}
+
+# define number of set piece sub-phases per match, which is about a season for 380 matches
+set_pieces_per_match = 100
+
+
+# define function to build a set piece table merged with its matches
+def set_piece_table(dataset: SyntheticDataset, n_matches: int) -> pd.DataFrame:
+    """Return a synthetic set piece table with squad and player ids for ``n_matches`` matches."""
+    rng = np.random.default_rng(0)
+    matches = pd.DataFrame(dataset.matches)
+    matches = matches.iloc[rng.integers(0, len(matches), n_matches).repeat(set_pieces_per_match)]
+    players = np.array([player["id"] for player in dataset.data[f"/iterations/{matches.iterationId.iloc[0]}/players"]])
+    home = rng.random(len(matches)) < 0.5
+    table = pd.DataFrame({
+        "squadId": np.where(home, matches.homeSquadId, matches.awaySquadId),
+        "homeSquadId": matches.homeSquadId.to_numpy(),
+        "awaySquadId": matches.awaySquadId.to_numpy(),
+    })
+    for role in ["MainEventPlayer", "PassReceiver", "FirstTouchPlayer", "SecondTouchPlayer"]:
+        ids = pd.array(rng.choice(players, len(table)), dtype="Int64")
+        ids[rng.random(len(table)) < 0.3] = pd.NA
+        table[f"setPieceSubPhase{role}Id"] = ids
+    return table
+
+
+# define function to build the transformation cases
+def transform_cases(scale: str) -> list:
+    """Return a list of (name, function) tuples timing transformations on multi-thousand-match inputs without any requests."""
+    dataset = SyntheticDataset(**scales[scale])
+    matches = [
+        dict(match, id=i) for i, match in zip(range(transform_sizes[scale]), itertools.cycle(dataset.matches))
+    ]
+
+    set_pieces = set_piece_table(dataset, transform_sizes[scale] // 5)
+    event_matches = [dataset.matches[i % len(dataset.matches)] for i in range(transform_sizes[scale] // 100)]
+    event_frames = [pd.json_normalize(dataset.data[f"/matches/{match['id']}/events"]) for match in event_matches]
+    events = pd.concat(event_frames, ignore_index=True).astype({"playerId": "Int64"})
+    scorings = pd.concat([
+        pd.json_normalize(dataset.data[f"/matches/{match['id']}/event-kpis"]) for match in event_matches
+    ])
+    possession_events = pd.concat([
+        frame.assign(matchId=i, homeSquadId=match["homeSquadId"], awaySquadId=match["awaySquadId"])
+        for i, (match, frame) in enumerate(zip(event_matches, event_frames))
+    ], ignore_index=True).astype({"playerId": "Int64"}).rename(columns={"currentAttackingSquadId": "attackingSquadId"})
+    event_kpis = pd.DataFrame(dataset.data["/kpis/event"])[["id", "name"]]
+    squads = pd.DataFrame(dataset.data[f"/iterations/{dataset.matches[0]['iterationId']}/squads"])
+    players = pd.DataFrame(dataset.data[f"/iterations/{dataset.matches[0]['iterationId']}/players"])
+
+    return [
+        ("transform clean_df", lambda: clean_df(matches)),
+        ("transform event kpis", lambda: join_event_kpis(events, pivot_event_kpis(scorings, event_kpis))),
+        ("transform set piece names", lambda: add_set_piece_names(
+            set_pieces.copy(), squads.set_index("id")["name"], players.set_index("id")["commonname"]
+        )),
+        ("transform possessions", lambda: derive_possessions(possession_events)),
+    ]
+
+
+# define function to time transformations
+def time_transforms(scale: str, repeat: int, only: list = None) -> dict:
+    """Time each transformation case ``repeat`` times in the current interpreter and return the results."""
+    results = {}
+    for name, func in transform_cases(scale):
+        if only and name not in only:
+            continue
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+        results[name] = {
+            "median": statistics.median(timings),
+            "min": min(timings),
+            "max": max(timings),
+            "rows": len(result) if isinstance(result, pd.DataFrame) else None,
+        }
+        print(f"{name:<30} {results[name]['median']:>8.3f}s")
+    return results
+
+
+# define function to get the iteration and matches of a recorded archive
+def recorded_ids(transport: ip.ReplayTransport, n_matches: int) -> tuple:
+    """Return the first recorded iteration and up to ``n_matches`` recorded matches of an archive."""
+    keys = transport.keys()
+    iterations = [int(m.group(1)) for m in map(re.compile(r"/iterations/(\d+)/matches$").search, keys) if m]
+    matches = [int(m.group(1)) for m in map(re.compile(r"/matches/(\d+)/events$").search, keys) if m]
+    if not iterations or not matches:
+        raise Exception("The archive must contain the matches of an iteration and the events of at least one match.")
+    return iterations[0], matches[:n_matches]
+
+
+# define function to run all benchmark cases
+def run(
+        scale: str, repeat: int, latency: float, capacity: int, n_matches: int, only: list = None,
+        record: str = None, replay: str = None
+) -> dict:
+    """Run all benchmark cases ``repeat`` times and return the results.
+
+    By default, the cases run against a fresh stub server. With ``record``, all responses are
+    recorded to the given archive. With ``replay``, the cases run against the given archive
+    without a server, using the recorded iteration and matches.
+    """
+    results = {}
+
+    # set up stub server or replay transport
+    if replay is not None:
+        transport = ip.ReplayTransport(replay, latency=latency or None)
+        iteration, matches = recorded_ids(transport, n_matches)
+        server = nullcontext()
+        config = ip.Config(transport=transport)
+        count = transport.calls
+    else:
+        dataset = SyntheticDataset(**scales[scale])
+        iteration = dataset.data["/iterations/"][0]["id"]
+        matches = [m["id"] for m in dataset.matches[:n_matches]]
+        transport = ip.RecordingTransport(record) if record is not None else None
+        server = StubServer(dataset, capacity=capacity, latency=latency)
+        count = server.requests
+        config = None
+
+    with server:
+        if config is None:
+            config = ip.Config(host=server.url, oidc_token_endpoint=server.url + "/token", transport=transport)
+        api = ip.Impect(config)
+        api.login("benchmark", "benchmark")
+
+        for name, func in cases(api, iteration, matches):
+            if only and name not in only and not (name == "getEvents" and "generateXML" in only):
+                continue
+            timings = []
+            rows = None
+            for _ in range(repeat):
+                count.clear()
+                start = time.perf_counter()
+                result = func()
+                timings.append(time.perf_counter() - start)
+                rows = len(result) if isinstance(result, pd.DataFrame) else None
+            results[name] = {
+                "median": statistics.median(timings),
+                "min": min(timings),
+                "max": max(timings),
+                "rows": rows,
+                "requests": sum(count.values()) if isinstance(count, dict) else len(count),
+            }
+            print(f"{name:<30} {results[name]['median']:>8.3f}s  {results[name]['requests']:>5} requests")
+
+        # write recorded archive
+        if record is not None and replay is None:
+            transport.save()
+
+    return results
+
+
+# define function to compare results with previous runs of the same scale
+def compare(report: dict, output: str, threshold: float) -> list:
+    """Print a comparison with the latest result file of every other version and return all regressions."""
+    regressions = []
+    for path in sorted(glob.glob(os.path.join(output, f"*-{report['scale']}.json"))):
+        with open(path) as file:
+            previous = json.load(file)
+        if previous["version"] == report["version"]:
+            continue
+        print(f"\ncompared with {previous['version']}:")
+        for name, current in report["results"].items():
+            if name not in previous["results"]:
+                continue
+            ratio = current["median"] / max(previous["results"][name]["median"], 1e-9)
+            flag = "  REGRESSION" if ratio > threshold else ""
+            print(f"{name:<30} {ratio:>6.2f}x{flag}")
+            if flag:
+                regressions.append((previous["version"], name, ratio))
+    return regressions
+
+
+# define command line interface
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark impectPy against a local stub of the Impect API.")
+    parser.add_argument("--scale", choices=list(scales.keys()), default="small")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--matches", type=int, default=6, help="number of matches passed to match level functions")
+    parser.add_argument("--latency", type=float, default=0.0, help="emulated network latency per request in seconds")
+    parser.add_argument("--capacity", type=int, default=1000, help="requests per second allowed by the stub")
+    parser.add_argument("--only", nargs="*", help="names of the functions to benchmark")
+    parser.add_argument("--record", help="record all responses to the given archive")
+    parser.add_argument("--replay", help="replay the given archive instead of starting the stub server")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "results"))
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    # run benchmarks
+    report = {
+        "version": ip.__version__,
+        "scale": args.scale if args.replay is None else "replay",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "results": {
+            **time_imports(args.repeat, args.only),
+            **time_transforms(args.scale, args.repeat, args.only),
+            **run(args.scale, args.repeat, args.latency, args.capacity, args.matches, args.only, args.record, args.replay)
+        },
+    }
+
+    # compare with previous versions and store results
+    os.makedirs(args.output, exist_ok=True)
+    regressions = compare(report, args.output, args.threshold)
+    path = os.path.join(args.output, f"{report['version']}-{report['scale']}.json")
+    if args.only and os.path.exists(path):
+        # keep results of functions that were not run
+        with open(path) as file:
+            report["results"] = {**json.load(file)["results"], **report["results"]}
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+# load packages
+import gzip
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from payloads import SyntheticDataset
+
+######
+#
+# This class serves synthetic payloads over HTTP and emulates the rate limit,
+# compression and conditional requests of the Impect API
+#
+######
+
+
+class StubServer:
+    def __init__(
+            self, dataset: SyntheticDataset, capacity: int = 10, window: int = 1, latency: float = 0.0,
+            compress: bool = True
+    ):
+        """Initialize a local stub of the Impect API for the given dataset.
+
+        The server answers with ``RateLimit-Policy`` and ``RateLimit-Remaining`` headers for a
+        fixed window of ``capacity`` requests per ``window`` seconds and returns 429 once the
+        window is exhausted. Every response is delayed by ``latency`` seconds. Bodies are gzip
+        compressed if the client accepts it and ``compress`` is True. Master data responses carry
+        an ETag and are answered with 304 if it matches.
+        """
+        self.dataset = dataset
+        self.capacity = capacity
+        self.window = window
+        self.latency = latency
+        self.compress = compress
+        self.lock = threading.Lock()
+        self.window_start = time.time()
+        self.used = 0
+        self.bodies = {}  # serialized payloads keyed by path
+        self.requests = []  # (method, path, status) of all requests
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        """Return the base URL of the running server."""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        """Start serving on a free local port in a background thread."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.handle(self, "GET")
+
+            def do_POST(self):
+                stub.handle(self, "POST")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def body(self, path: str):
+        """Return the serialized payload and its ETag for the given path, or None if it does not exist."""
+        if path not in self.bodies:
+            data = self.dataset.lookup(path)
+            if data is None:
+                return None
+            raw = json.dumps({"data": data}).encode()
+            self.bodies[path] = (raw, '"' + hashlib.sha1(raw).hexdigest() + '"')
+        return self.bodies[path]
+
+    def handle(self, handler: BaseHTTPRequestHandler, method: str):
+        """Answer a single request."""
+        path = urlparse(handler.path).path
+
+        # consume request body
+        length = int(handler.headers.get("Content-Length", 0))
+        if length:
+            handler.rfile.read(length)
+
+        # count request in current rate limit window
+        with self.lock:
+            now = time.time()
+            if now - self.window_start >= self.window:
+                self.window_start, self.used = now, 0
+            self.used += 1
+            remaining = self.capacity - self.used
+
+        # emulate network latency
+        if self.latency:
+            time.sleep(self.latency)
+
+        headers = {
+            "RateLimit-Policy": f"{self.capacity};w={self.window}",
+            "RateLimit-Remaining": str(max(remaining, 0)),
+            "x-request-id": f"stub-{len(self.requests)}",
+            "Content-Type": "application/json",
+        }
+        etag = None
+        if path.endswith("/token"):
+            status, raw = 200, json.dumps({
+                "access_token": "stub", "refresh_token": "stub", "expires_in": 3600, "refresh_expires_in": 7200
+            }).encode()
+        elif remaining < 0:
+            status, raw = 429, json.dumps({"message": "Too Many Requests"}).encode()
+        else:
+            body = self.body(path)
+            if body is None:
+                status, raw = 404, json.dumps({"message": "Not Found"}).encode()
+            else:
+                raw, etag = body
+                status = 200
+                if handler.headers.get("If-None-Match") == etag:
+                    status, raw = 304, b""
+        if etag is not None:
+            headers["ETag"] = etag
+
+        # compress body if accepted
+        if raw and self.compress and "gzip" in handler.headers.get("Accept-Encoding", ""):
+            raw = gzip.compress(raw, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+
+        with self.lock:
+            self.requests.append((method, path, status))
+
+        handler.send_response(status)
+        for key, value in headers.items():
+            handler.send_header(key, value)
+        handler.send_header("Content-Length", str(len(raw)))
+        handler.end_headers()
+        handler.wfile.write(raw)
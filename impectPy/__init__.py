@@ -1,28 +1,84 @@
+# load packages
+import importlib
+from typing import TYPE_CHECKING
+
 # define version attribute
 __version__ = "2.6.1"
 
-# import modules
-from .access_token import getAccessToken
-from .iterations import getIterations
-from .matches import getMatches
-from .events import getEvents
-from .player_matchsums import getPlayerMatchsums
-from .squad_matchsums import getSquadMatchsums
-from .player_iteration_averages import getPlayerIterationAverages
-from .squad_iteration_averages import getSquadIterationAverages
-from .player_match_scores import getPlayerMatchScores
-from .player_iteration_scores import getPlayerIterationScores
-from .squad_match_scores import getSquadMatchScores
-from .squad_iteration_scores import getSquadIterationScores
-from .player_profile_scores import getPlayerProfileScores
-from .generate_xml import generateXML
-from .set_pieces import getSetPieces
-from .squad_ratings import getSquadRatings
-from .squad_coefficients import getSquadCoefficients
-from .formations import getFormations
-from .substitutions import getSubstitutions
-from .starting_positions import getStartingPositions
-from .match_predictions import getMatchPredictions
-from .data import getData
-from .config import Config as Config
-from .impect import Impect as Impect
\ No newline at end of file
+# define public functions and classes and the modules they are imported from
+_lazy_attributes = {
+    "getAccessToken": ".access_token",
+    "getIterations": ".iterations",
+    "getMatches": ".matches",
+    "getEvents": ".events",
+    "getPlayerMatchsums": ".player_matchsums",
+    "getSquadMatchsums": ".squad_matchsums",
+    "getPlayerIterationAverages": ".player_iteration_averages",
+    "getSquadIterationAverages": ".squad_iteration_averages",
+    "getPlayerMatchScores": ".player_match_scores",
+    "getPlayerIterationScores": ".player_iteration_scores",
+    "getSquadMatchScores": ".squad_match_scores",
+    "getSquadIterationScores": ".squad_iteration_scores",
+    "getPlayerProfileScores": ".player_profile_scores",
+    "generateXML": ".generate_xml",
+    "getSetPieces": ".set_pieces",
+    "getSquadRatings": ".squad_ratings",
+    "getSquadCoefficients": ".squad_coefficients",
+    "getFormations": ".formations",
+    "getSubstitutions": ".substitutions",
+    "getStartingPositions": ".starting_positions",
+    "getMatchPredictions": ".match_predictions",
+    "getData": ".data",
+    "Config": ".config",
+    "Instrumentation": ".instrumentation",
+    "Profiler": ".profiler",
+    "RecordingTransport": ".transport",
+    "ReplayTransport": ".transport",
+    "Impect": ".impect"
+}
+
+__all__ = list(_lazy_attributes)
+
+
+# import public functions and classes on first access (PEP 562), so "import impectPy" does not load all modules
+def __getattr__(name: str):
+    if name in _lazy_attributes:
+        value = getattr(importlib.import_module(_lazy_attributes[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+# expose imports to type checkers and IDEs
+if TYPE_CHECKING:
+    from .access_token import getAccessToken as getAccessToken
+    from .iterations import getIterations as getIterations
+    from .matches import getMatches as getMatches
+    from .events import getEvents as getEvents
+    from .player_matchsums import getPlayerMatchsums as getPlayerMatchsums
+    from .squad_matchsums import getSquadMatchsums as getSquadMatchsums
+    from .player_iteration_averages import getPlayerIterationAverages as getPlayerIterationAverages
+    from .squad_iteration_averages import getSquadIterationAverages as getSquadIterationAverages
+    from .player_match_scores import getPlayerMatchScores as getPlayerMatchScores
+    from .player_iteration_scores import getPlayerIterationScores as getPlayerIterationScores
+    from .squad_match_scores import getSquadMatchScores as getSquadMatchScores
+    from .squad_iteration_scores import getSquadIterationScores as getSquadIterationScores
+    from .player_profile_scores import getPlayerProfileScores as getPlayerProfileScores
+    from .generate_xml import generateXML as generateXML
+    from .set_pieces import getSetPieces as getSetPieces
+    from .squad_ratings import getSquadRatings as getSquadRatings
+    from .squad_coefficients import getSquadCoefficients as getSquadCoefficients
+    from .formations import getFormations as getFormations
+    from .substitutions import getSubstitutions as getSubstitutions
+    from .starting_positions import getStartingPositions as getStartingPositions
+    from .match_predictions import getMatchPredictions as getMatchPredictions
+    from .data import getData as getData
+    from .config import Config as Config
+    from .instrumentation import Instrumentation as Instrumentation
+    from .profiler import Profiler as Profiler
+    from .transport import RecordingTransport as RecordingTransport, ReplayTransport as ReplayTransport
+    from .impect import Impect as Impect
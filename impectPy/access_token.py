@@ -1,7 +1,9 @@
 # load packages
 import urllib
+import time
+import threading
 from typing import Optional
-from impectPy.helpers import RateLimitedAPI, ImpectSession
+from impectPy.helpers import RateLimitedAPI, ImpectSession, HTTPError
 
 ######
 #
@@ -24,19 +26,112 @@ def getAccessTokenFromUrl(username: str, password: str, connection: RateLimitedA
     Sends a password-grant request to `token_url` using the provided credentials and
     returns the resulting access token string.
     """
+    # get access token from response and return it
+    token = getTokenResponseFromUrl(username, password, connection, token_url)["access_token"]
+    return token
+
+def getTokenResponseFromUrl(username: str, password: str, connection: RateLimitedAPI, token_url: str) -> dict:
+    """Authenticate against the given token URL and return the full token response.
+
+    Besides the access token, the response contains its lifetime (``expires_in``) as well as the
+    refresh token and its lifetime (``refresh_token``, ``refresh_expires_in``).
+    """
     # define request parameters
     login = 'client_id=api&grant_type=password&username=' + urllib.parse.quote(
         username) + '&password=' + urllib.parse.quote(password)
 
-    # define request headers
-    connection.session.headers.update({"body": login, "Content-Type": "application/x-www-form-urlencoded"})
+    # request access token
+    return request_token(login, connection, token_url)
+
+def refreshTokenResponseFromUrl(refresh_token: str, connection: RateLimitedAPI, token_url: str) -> dict:
+    """Exchange a refresh token for a new access token at the given token URL and return the full token response."""
+    # define request parameters
+    refresh = 'client_id=api&grant_type=refresh_token&refresh_token=' + urllib.parse.quote(refresh_token)
 
     # request access token
-    response = connection.make_api_request(url=token_url, method="POST", data=login)
+    return request_token(refresh, connection, token_url)
 
-    # remove headers again
-    connection.session.headers.clear()
 
-    # get access token from response and return it
-    token = response.json()["access_token"]
-    return token
\ No newline at end of file
+# define function to request a token without changing the session headers
+def request_token(body: str, connection: RateLimitedAPI, token_url: str) -> dict:
+    """Send the given form body to the token URL and return the decoded token response."""
+    # request access token with request specific headers, so concurrent API calls are not affected
+    response = connection.make_api_request(
+        url=token_url,
+        method="POST",
+        data=body,
+        headers={"body": body, "Content-Type": "application/x-www-form-urlencoded"},
+        authenticate=False
+    )
+
+    # return token response
+    return response.json()
+
+
+######
+#
+# This class keeps an access token up to date for long-running sessions
+#
+######
+
+
+class AccessToken:
+    def __init__(
+            self, username: str, password: str, connection: RateLimitedAPI, token_url: str, refresh_margin: int = 30
+    ):
+        """Log in with the given credentials and attach the access token to the connection.
+
+        The token is refreshed ``refresh_margin`` seconds before it expires. If the refresh token has
+        expired or is rejected, the instance logs in again with the stored credentials.
+        """
+        self.username = username  # username to log in again once the refresh token has expired
+        self.__password = password  # password to log in again once the refresh token has expired
+        self.connection = connection  # connection to attach the access token to
+        self.token_url = token_url  # URL of the token endpoint
+        self.refresh_margin = refresh_margin  # time (in seconds) before expiry at which the token is refreshed
+        self.lock = threading.Lock()  # lock to refresh the token once for all threads
+
+        # log in and attach access token
+        self.update(getTokenResponseFromUrl(self.username, self.__password, self.connection, self.token_url))
+
+    def update(self, token_response: dict):
+        """Store the given token response and set the access token as Authorization header of the connection."""
+        now = time.time()
+        self.access_token = token_response["access_token"]
+        self.expires_at = now + token_response.get("expires_in", float("inf"))
+        self.refresh_token = token_response.get("refresh_token")
+        self.refresh_expires_at = now + token_response.get("refresh_expires_in", float("inf"))
+        self.connection.session.headers.update({"Authorization": f"Bearer {self.access_token}"})
+
+    def ensure_valid(self):
+        """Refresh the access token if it expires within the refresh margin."""
+        if time.time() >= self.expires_at - self.refresh_margin:
+            self.refresh()
+
+    def refresh(self, stale_token: Optional[str] = None):
+        """Refresh the access token once, even if several threads request a refresh at the same time.
+
+        ``stale_token`` is the Authorization header of a rejected request. If the token has been
+        replaced in the meantime, no new token is requested.
+        """
+        with self.lock:
+            # check if another thread has refreshed the token in the meantime
+            if stale_token is not None:
+                if stale_token != f"Bearer {self.access_token}":
+                    return
+            elif time.time() < self.expires_at - self.refresh_margin:
+                return
+
+            # use refresh token if still valid, otherwise log in again
+            token_response = None
+            if self.refresh_token is not None and time.time() < self.refresh_expires_at - self.refresh_margin:
+                try:
+                    token_response = refreshTokenResponseFromUrl(self.refresh_token, self.connection, self.token_url)
+                except (HTTPError, KeyError, ValueError):
+                    # log in again if the refresh token is rejected (e.g. 400 invalid_grant) or the response is malformed
+                    token_response = None
+            if token_response is None:
+                token_response = getTokenResponseFromUrl(self.username, self.__password, self.connection, self.token_url)
+
+            # store new token
+            self.update(token_response)
@@ -0,0 +1,327 @@
+# load packages
+import numpy as np
+import pandas as pd
+
+######
+#
+# This module contains the heavy transform stages (KPI pivots) used by the
+# match-looping functions and their optional Polars implementations
+#
+######
+
+
+# define the allowed execution backends
+allowed_backends = [
+    "pandas",
+    "polars"
+]
+
+
+# define function to validate the backend argument
+def check_backend(backend: str) -> None:
+    """Validate the ``backend`` argument and make sure the required package is installed."""
+    # check input for backend argument
+    if backend not in allowed_backends:
+        raise Exception(
+            f"Invalid backend: {backend}."
+            f"\nChoose one of: {', '.join(allowed_backends)}"
+        )
+
+    # check if polars is installed
+    if backend == "polars":
+        try:
+            import polars  # noqa: F401
+        except ImportError:
+            raise Exception("The polars backend requires the polars package. Install it with 'pip install polars'.")
+
+
+######
+#
+# These functions convert between pandas and polars without requiring pyarrow
+#
+######
+
+
+def to_polars(df: pd.DataFrame):
+    """Convert a flat pandas DataFrame to a polars DataFrame column by column."""
+    import polars as pl
+
+    # numeric columns are handed over as numpy arrays, everything else as python objects
+    return pl.DataFrame({
+        col: (
+            df[col].to_numpy()
+            if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_extension_array_dtype(df[col])
+            else df[col].astype(object).where(df[col].notna(), None).tolist()
+        )
+        for col in df.columns
+    })
+
+
+def to_pandas(df) -> pd.DataFrame:
+    """Convert a polars DataFrame to a pandas DataFrame column by column."""
+    return pd.DataFrame({col: df[col].to_numpy() for col in df.columns})
+
+
+######
+#
+# These functions pivot event KPI scorings per event, position and player and
+# join them onto the events
+#
+######
+
+
+def encode_event_kpi_keys(event_ids: np.ndarray, positions: pd.Series, player_ids: np.ndarray) -> np.ndarray:
+    """Encode event IDs, positions and player IDs as one int64 key per row.
+
+    Each key column is factorized to dense integer codes, which are combined into a single code,
+    so rows can be grouped and matched without building tuples or strings. Missing positions get
+    their own code.
+    """
+    # factorize key columns
+    event_codes, _ = pd.factorize(event_ids)
+    position_codes, position_values = pd.factorize(positions)
+    player_codes, player_values = pd.factorize(player_ids)
+
+    # combine codes
+    return (event_codes * (len(position_values) + 1) + position_codes + 1) * len(player_values) + player_codes
+
+
+def pivot_event_kpis(scorings: pd.DataFrame, kpis: pd.DataFrame) -> pd.DataFrame:
+    """Pivot event KPI scorings to one row per event, position and player.
+
+    Scorings are grouped by integer codes of their keys and summed into a dense float matrix with
+    one column per KPI name, so neither the keys nor the KPI names are converted to strings.
+    Combinations without a scoring are NaN, scorings of KPIs that are not in ``kpis`` are ignored.
+    Returns the key columns ``eventId``, ``position`` and ``playerId`` and one column per KPI.
+    """
+    # get kpi name codes
+    name_codes, names = pd.factorize(kpis["name"])
+    kpi_ids = pd.Index(kpis["id"])
+    if not kpi_ids.is_unique:
+        name_codes = name_codes[~kpi_ids.duplicated()]
+        kpi_ids = kpi_ids.drop_duplicates()
+
+    # drop scorings of unknown kpis
+    kpi_positions = kpi_ids.get_indexer(scorings["kpiId"]) if len(scorings) > 0 else np.array([], dtype="int64")
+    scorings = scorings[kpi_positions >= 0]
+    kpi_codes = name_codes[kpi_positions[kpi_positions >= 0]]
+
+    # get group of each scoring and the first scoring of each group
+    event_ids = pd.array(scorings["eventId"], dtype="Int64")
+    player_ids = pd.array(scorings["playerId"], dtype="Int64")
+    groups, keys = pd.factorize(encode_event_kpi_keys(
+        event_ids.to_numpy(dtype="int64", na_value=-1), scorings["position"], player_ids.to_numpy(dtype="int64", na_value=-1)
+    ))
+    first = np.empty(len(keys), dtype="int64")
+    first[groups[::-1]] = np.arange(len(groups))[::-1]
+
+    # sum values per kpi and group, keeping NaN for combinations without scoring
+    cells = kpi_codes * len(keys) + groups
+    values = np.bincount(
+        cells, weights=np.nan_to_num(scorings["value"].to_numpy(dtype="float64")), minlength=len(keys) * len(names)
+    ).astype("float64", copy=False)
+    scored = np.zeros(len(values), dtype=bool)
+    scored[cells] = True
+    values[~scored] = np.nan
+
+    # compile key columns and kpi columns, using the kpi-major matrix as a single block without copying
+    result = pd.DataFrame(values.reshape(len(names), len(keys)).T, columns=list(names), copy=False)
+    result.insert(0, "eventId", event_ids.take(first))
+    result.insert(1, "position", scorings["position"].to_numpy().take(first))
+    result.insert(2, "playerId", player_ids.take(first))
+
+    # return result
+    return result
+
+
+def join_event_kpis(events: pd.DataFrame, scorings: pd.DataFrame) -> pd.DataFrame:
+    """Add the KPI columns of pivoted ``scorings`` to ``events`` by position.
+
+    Events are matched on their ``id``, ``playerPosition`` and ``playerId``. Missing player IDs
+    match each other, events without a position never match. Events without scorings get NaN.
+    """
+    # get kpi columns
+    keys = ["eventId", "position", "playerId"]
+    kpi_cols = [col for col in scorings.columns if col not in keys]
+
+    # encode keys of scorings and events with shared codes
+    codes = encode_event_kpi_keys(
+        np.concatenate([
+            pd.array(scorings["eventId"], dtype="Int64").to_numpy(dtype="int64", na_value=-1),
+            events["id"].to_numpy(dtype="int64")
+        ]),
+        pd.concat([scorings["position"], events["playerPosition"]], ignore_index=True),
+        np.concatenate([
+            pd.array(scorings["playerId"], dtype="Int64").to_numpy(dtype="int64", na_value=-1),
+            pd.array(events["playerId"], dtype="Int64").to_numpy(dtype="int64", na_value=-1)
+        ])
+    )
+    event_codes = codes[len(scorings):]
+    event_codes[events["playerPosition"].isna().to_numpy()] = -1
+
+    # get row of each event in scorings
+    rows = pd.Index(codes[:len(scorings)]).get_indexer(event_codes)
+
+    # take kpi values of each event column-wise and set NaN for events without scorings
+    if len(scorings) > 0:
+        values = scorings[kpi_cols].to_numpy(dtype="float64").T.take(np.maximum(rows, 0), axis=1)
+        values[:, rows < 0] = np.nan
+    else:
+        values = np.full((len(kpi_cols), len(events)), np.nan)
+    kpi_values = pd.DataFrame(values.T, columns=kpi_cols, index=events.index, copy=False)
+
+    # return events with kpi columns
+    return pd.concat([events, kpi_values], axis=1)
+
+
+def pivot_event_kpis_polars(scorings: pd.DataFrame, kpis: pd.DataFrame) -> pd.DataFrame:
+    """Pivot event KPI scorings to one row per event, position and player using polars.
+
+    Returns the same key columns (``eventId``, ``position``, ``playerId``) and one column per KPI
+    as ``pivot_event_kpis``.
+    """
+    import polars as pl
+
+    # handle matches without any scorings
+    if scorings.empty:
+        result = pd.DataFrame({
+            "eventId": pd.Series(dtype="Int64"),
+            "position": pd.Series(dtype="str"),
+            "playerId": pd.Series(dtype="Int64"),
+        })
+        for name in kpis["name"]:
+            result[name] = pd.Series(dtype="float64")
+        return result
+
+    # convert keys to nullable integers, so missing ids (NaN in float columns) become nulls instead of failing the cast
+    scorings = scorings[["eventId", "position", "playerId", "kpiId", "value"]].assign(
+        eventId=pd.array(scorings["eventId"], dtype="Int64"),
+        playerId=pd.array(scorings["playerId"], dtype="Int64")
+    )
+
+    # build lazy query: attach kpi names, aggregate values and keep keys consistent with the pandas version
+    long = (
+        to_polars(scorings)
+        .lazy()
+        .join(
+            to_polars(kpis[["id", "name"]]).lazy(),
+            left_on="kpiId",
+            right_on="id",
+            how="inner"
+        )
+        .with_columns(
+            pl.col("eventId").cast(pl.Int64),
+            pl.col("playerId").cast(pl.Int64),
+            pl.col("position").fill_null(""),
+            pl.col("value").cast(pl.Float64)
+        )
+        .group_by(["eventId", "position", "playerId", "name"])
+        .agg(pl.col("value").sum())
+        .collect()
+    )
+
+    # pivot kpi values
+    wide = long.pivot(on="name", index=["eventId", "position", "playerId"], values="value")
+
+    # add kpis without any scoring
+    missing = [name for name in kpis["name"] if name not in wide.columns]
+    if missing:
+        wide = wide.with_columns([pl.lit(None, dtype=pl.Float64).alias(name) for name in missing])
+
+    # convert to pandas and fix key types
+    result = to_pandas(wide)
+    result["eventId"] = result["eventId"].astype("Int64")
+    result["playerId"] = result["playerId"].astype("Int64")
+
+    # return result
+    return result
+
+
+######
+#
+# This function unnests and pivots the per-player match KPIs of several matches at once
+#
+######
+
+
+def pivot_player_matchsums_polars(matchsums_raw: pd.DataFrame, kpis: pd.DataFrame) -> pd.DataFrame:
+    """Unnest and pivot raw player match sums of all matches to one row per match, squad, player and position.
+
+    Produces the same rows, row order and columns as the per-match pandas loop in
+    ``getPlayerMatchsumsFromHost``.
+    """
+    import polars as pl
+
+    # collect player records of all matches and sides into one long list
+    records = []
+    for i in range(len(matchsums_raw)):
+        for side_index, side in enumerate(["squadHomePlayers", "squadAwayPlayers"]):
+            match_id = matchsums_raw.matchId.loc[i]
+            squad_id = matchsums_raw[side.replace("Players", "Id")].loc[i]
+            for player in matchsums_raw[side].loc[i]:
+                records.append({
+                    "order": i * 2 + side_index,
+                    "matchId": int(match_id),
+                    "squadId": int(squad_id),
+                    "id": player["id"],
+                    "position": player["position"],
+                    "matchShare": player["matchShare"],
+                    "playDuration": player["playDuration"],
+                    "kpis": [(kpi["kpiId"], kpi["value"]) for kpi in (player.get("kpis") or [])],
+                })
+
+    keys = ["order", "matchId", "squadId", "id", "position"]
+    frame = pl.DataFrame(
+        {
+            "order": [r["order"] for r in records],
+            "matchId": [r["matchId"] for r in records],
+            "squadId": [r["squadId"] for r in records],
+            "id": [r["id"] for r in records],
+            "position": [r["position"] for r in records],
+            "matchShare": [r["matchShare"] for r in records],
+            "playDuration": [r["playDuration"] for r in records],
+            "kpiId": [[k for k, _ in r["kpis"]] for r in records],
+            "value": [[v for _, v in r["kpis"]] for r in records],
+        },
+        schema_overrides={"kpiId": pl.List(pl.Int64), "value": pl.List(pl.Float64)},
+        strict=False
+    ).lazy()
+
+    # extract matchshares
+    matchshares = frame.select(keys + ["matchShare", "playDuration"]).unique(maintain_order=True)
+
+    # explode kpis, attach kpi names and aggregate
+    long = (
+        frame.select(keys + ["kpiId", "value"])
+        .explode(["kpiId", "value"])
+        .join(
+            to_polars(kpis[["id", "name"]]).lazy().rename({"id": "kpiId"}),
+            on="kpiId",
+            how="left"
+        )
+        .group_by(keys + ["name"])
+        .agg(pl.col("value").sum())
+        .collect()
+    )
+
+    # pivot kpi values and fill missing values with 0
+    wide = long.pivot(on="name", index=keys, values="value")
+    if "null" in wide.columns:
+        wide = wide.drop("null")
+    missing = [name for name in kpis["name"] if name not in wide.columns]
+    wide = wide.with_columns(
+        [pl.lit(0.0).alias(name) for name in missing]
+        + [pl.col(name).fill_null(0.0) for name in wide.columns if name not in keys]
+    )
+
+    # inner join with matchshares and restore the row order of the pandas implementation
+    result = (
+        wide.lazy()
+        .join(matchshares, on=keys, how="inner")
+        .sort(["order", "id", "position"])
+        .drop("order")
+        .collect()
+    )
+
+    # return result
+    return to_pandas(result)
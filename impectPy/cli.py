@@ -0,0 +1,316 @@
+# load packages
+import os
+import sys
+import time
+import argparse
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+
+from impectPy.config import Config
+from impectPy.impect import Impect
+from impectPy.helpers import UnavailableMatchesError
+
+######
+#
+# This module implements the impectpy command to export datasets in bulk
+#
+######
+
+
+# define datasets that are exported per match, with the Impect method that returns them
+match_datasets = {
+    "events": "getEvents",
+    "player-matchsums": "getPlayerMatchsums",
+    "squad-matchsums": "getSquadMatchsums",
+    "player-match-scores": "getPlayerMatchScores",
+    "squad-match-scores": "getSquadMatchScores",
+    "set-pieces": "getSetPieces",
+    "formations": "getFormations",
+    "substitutions": "getSubstitutions",
+    "starting-positions": "getStartingPositions",
+}
+
+# define datasets that are exported per iteration, with the Impect method that returns them
+iteration_datasets = {
+    "matches": "getMatches",
+    "player-iteration-averages": "getPlayerIterationAverages",
+    "squad-iteration-averages": "getSquadIterationAverages",
+    "player-iteration-scores": "getPlayerIterationScores",
+    "squad-iteration-scores": "getSquadIterationScores",
+    "player-profile-scores": "getPlayerProfileScores",
+    "squad-ratings": "getSquadRatings",
+    "squad-coefficients": "getSquadCoefficients",
+    "match-predictions": "getMatchPredictions",
+}
+
+# define the allowed output formats
+allowed_formats = [
+    "parquet",
+    "csv",
+    "jsonl"
+]
+
+
+######
+#
+# This function writes a DataFrame to a file in the given format
+#
+######
+
+
+def write_frame(df: pd.DataFrame, path: str, file_format: str) -> None:
+    """Write the DataFrame to ``path`` in the given format.
+
+    The file is written under a temporary name and renamed once complete, so an interrupted
+    export never leaves a partial file behind. Parquet files are written by pandas if pyarrow or
+    fastparquet is installed, otherwise by polars.
+    """
+    # write to temporary file
+    tmp_path = path + ".tmp"
+    if file_format == "parquet":
+        try:
+            df.to_parquet(tmp_path, index=False)
+        except ImportError:
+            from impectPy.backends import to_polars
+            to_polars(df).write_parquet(tmp_path)
+    elif file_format == "csv":
+        df.to_csv(tmp_path, index=False)
+    else:
+        df.to_json(tmp_path, orient="records", lines=True)
+
+    # move file to final path
+    os.replace(tmp_path, path)
+
+
+# define function to check that parquet files can be written
+def check_format(file_format: str) -> None:
+    """Validate the output format and make sure a parquet engine is installed if required."""
+    if file_format not in allowed_formats:
+        raise Exception(
+            f"Invalid format: {file_format}."
+            f"\nChoose one of: {', '.join(allowed_formats)}"
+        )
+    if file_format == "parquet":
+        for package in ["pyarrow", "fastparquet", "polars"]:
+            try:
+                __import__(package)
+                return
+            except ImportError:
+                pass
+        raise Exception("Writing parquet files requires pyarrow, fastparquet or polars. Install one of them with pip.")
+
+
+######
+#
+# This class prints the progress of an export
+#
+######
+
+
+class Progress:
+    def __init__(self, total: int):
+        """Initialize a progress printer for the given number of tasks."""
+        self.total = total  # number of tasks
+        self.done = 0  # number of finished tasks
+        self.start = time.time()  # start time of the export
+        self.lock = threading.Lock()  # lock to update the progress from several threads
+
+    def update(self, message: str):
+        """Mark one task as finished and print the progress, elapsed time and estimated time remaining."""
+        with self.lock:
+            self.done += 1
+            elapsed = time.time() - self.start
+            eta = elapsed / self.done * (self.total - self.done)
+            print(
+                f"[{self.done}/{self.total}] {message} "
+                f"(elapsed {format_duration(elapsed)}, ETA {format_duration(eta)})",
+                flush=True
+            )
+
+
+# define function to format a duration
+def format_duration(seconds: float) -> str:
+    """Format a duration in seconds as ``h:mm:ss``."""
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+######
+#
+# This function exports the given datasets for the given iterations and matches
+#
+######
+
+
+def export(
+        api: Impect, datasets: list, output: str, iterations: Optional[list] = None, matches: Optional[list] = None,
+        file_format: str = "parquet", workers: int = 4, chunk_size: int = 10, positions: Optional[list] = None,
+        overwrite: bool = False
+) -> int:
+    """Export the given datasets to one file per dataset and match or iteration and return the number of failed tasks.
+
+    Match level datasets are exported for the given matches and all available matches of the given
+    iterations. Matches are requested in chunks of ``chunk_size`` and chunks are processed by
+    ``workers`` threads sharing the rate limit of the instance. Each chunk is a separate call of
+    the get* function, which fetches the master data it needs (e.g. players, squads, match plan
+    and KPIs) again, so larger chunks mean fewer master data requests. Files are only written for
+    matches that are part of the result, so unavailable or forbidden matches are fetched again
+    once the export is restarted. Files that already exist are skipped unless ``overwrite`` is
+    True, so an interrupted export can be restarted. A failed task is reported and the export
+    continues with the remaining tasks.
+    """
+    # check input
+    check_format(file_format)
+    iterations = list(iterations or [])
+    matches = list(matches or [])
+    invalid = [dataset for dataset in datasets if dataset not in match_datasets and dataset not in iteration_datasets]
+    if len(invalid) > 0:
+        raise Exception(
+            f"Invalid datasets: {', '.join(invalid)}."
+            f"\nChoose from: {', '.join(list(match_datasets) + list(iteration_datasets))}"
+        )
+    if "player-profile-scores" in datasets and positions is None:
+        raise Exception("Exporting player-profile-scores requires positions.")
+    if len(iterations) == 0 and len(matches) == 0:
+        raise Exception("Provide at least one iteration or match.")
+
+    # get available matches of iterations
+    if any(dataset in match_datasets for dataset in datasets):
+        for iteration in iterations:
+            iteration_matches = api.getMatches(iteration)
+            if "available" in iteration_matches.columns:
+                iteration_matches = iteration_matches[iteration_matches.available.fillna(False).astype(bool)]
+            matches += [match for match in iteration_matches.id.tolist() if match not in matches]
+
+    # define tasks, skipping existing files
+    tasks = []
+    for dataset in datasets:
+        os.makedirs(os.path.join(output, dataset), exist_ok=True)
+        if dataset in match_datasets:
+            pending = [
+                match for match in matches
+                if overwrite or not os.path.exists(os.path.join(output, dataset, f"{match}.{file_format}"))
+            ]
+            for i in range(0, len(pending), chunk_size):
+                tasks.append((dataset, pending[i:i + chunk_size]))
+        else:
+            for iteration in iterations:
+                if overwrite or not os.path.exists(os.path.join(output, dataset, f"{iteration}.{file_format}")):
+                    tasks.append((dataset, iteration))
+
+    # define function to run a single task
+    def run_task(dataset: str, items) -> str:
+        if dataset in match_datasets:
+            try:
+                if dataset == "player-match-scores":
+                    df = api.getPlayerMatchScores(items, positions)
+                else:
+                    df = getattr(api, match_datasets[dataset])(items)
+            except UnavailableMatchesError:
+                return f"{dataset}: 0 of {len(items)} matches (unavailable or forbidden)"
+
+            # only write files for matches of the result, so dropped matches are fetched again on restart
+            present = set(df.matchId.dropna().astype(int)) if "matchId" in df.columns else set()
+            exported = [match for match in items if match in present]
+            for match in exported:
+                write_frame(
+                    df[df.matchId == match].reset_index(drop=True),
+                    os.path.join(output, dataset, f"{match}.{file_format}"),
+                    file_format
+                )
+            return f"{dataset}: {len(exported)} of {len(items)} matches"
+        else:
+            if dataset in ["player-iteration-scores", "player-profile-scores"]:
+                df = getattr(api, iteration_datasets[dataset])(items, positions)
+            else:
+                df = getattr(api, iteration_datasets[dataset])(items)
+            write_frame(df, os.path.join(output, dataset, f"{items}.{file_format}"), file_format)
+            return f"{dataset}: iteration {items}"
+
+    # run tasks concurrently and continue if a task fails
+    if len(tasks) == 0:
+        print("All files exist already.")
+        return 0
+    progress = Progress(len(tasks))
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_task, dataset, items): (dataset, items) for dataset, items in tasks}
+        for future in as_completed(futures):
+            dataset, items = futures[future]
+            try:
+                progress.update(future.result())
+            except Exception as e:
+                failed.append((dataset, items))
+                progress.update(f"{dataset}: failed for {'matches' if isinstance(items, list) else 'iteration'} {items} ({e})")
+
+    # report failed tasks
+    if len(failed) > 0:
+        print(f"{len(failed)} of {len(tasks)} tasks failed, restart the export to retry them:", file=sys.stderr)
+        for dataset, items in failed:
+            print(f"  {dataset}: {items}", file=sys.stderr)
+
+    # return number of failed tasks
+    return len(failed)
+
+
+######
+#
+# This function implements the command line interface
+#
+######
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Run the impectpy command with the given arguments."""
+    parser = argparse.ArgumentParser(
+        prog="impectpy",
+        description="Export Impect datasets for iterations or matches to Parquet, CSV or JSONL files."
+    )
+    parser.add_argument(
+        "datasets", nargs="+", metavar="dataset",
+        help=f"datasets to export: {', '.join(list(match_datasets) + list(iteration_datasets))}"
+    )
+    parser.add_argument("-i", "--iterations", nargs="+", type=int, default=[], help="iteration ids")
+    parser.add_argument("-m", "--matches", nargs="+", type=int, default=[], help="match ids")
+    parser.add_argument("-o", "--output", default=".", help="output directory (default: current directory)")
+    parser.add_argument("-f", "--format", choices=allowed_formats, default="parquet", help="file format")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="number of concurrent tasks (default: 4)")
+    parser.add_argument(
+        "--chunk-size", type=int, default=10,
+        help="matches per request batch, master data is fetched once per batch (default: 10)"
+    )
+    parser.add_argument("--positions", nargs="+", help="positions for player scores and profile scores")
+    parser.add_argument("--overwrite", action="store_true", help="overwrite existing files")
+    parser.add_argument("--username", default=os.environ.get("IMPECT_USERNAME"), help="defaults to $IMPECT_USERNAME")
+    parser.add_argument("--password", default=os.environ.get("IMPECT_PASSWORD"), help="defaults to $IMPECT_PASSWORD")
+    parser.add_argument("--token", default=os.environ.get("IMPECT_TOKEN"), help="access token, defaults to $IMPECT_TOKEN")
+    parser.add_argument("--host", default=Config().HOST, help="API host")
+    parser.add_argument("--token-url", default=Config().OIDC_TOKEN_ENDPOINT, help="token endpoint")
+    args = parser.parse_args(argv)
+
+    # authenticate
+    api = Impect(Config(host=args.host, oidc_token_endpoint=args.token_url))
+    if args.token:
+        api.init(args.token)
+    elif args.username and args.password:
+        api.login(args.username, args.password)
+    else:
+        parser.error("provide --token or --username and --password (or set the corresponding environment variables)")
+
+    # export datasets
+    try:
+        failed = export(
+            api, args.datasets, args.output, iterations=args.iterations, matches=args.matches,
+            file_format=args.format, workers=args.workers, chunk_size=args.chunk_size,
+            positions=args.positions, overwrite=args.overwrite
+        )
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 1 if failed > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,15 @@
 class Config:
-    def __init__(self, host: str = 'https://api.impect.com', oidc_token_endpoint: str = 'https://login.impect.com/auth/realms/production/protocol/openid-connect/token'):
+    def __init__(
+            self, host: str = 'https://api.impect.com',
+            oidc_token_endpoint: str = 'https://login.impect.com/auth/realms/production/protocol/openid-connect/token',
+            pool_connections: int = 10, pool_maxsize: int = 32, connect_timeout: float = 10, read_timeout: float = 300,
+            keep_alive: bool = True, transport=None
+    ):
         self.HOST = host
-        self.OIDC_TOKEN_ENDPOINT = oidc_token_endpoint
\ No newline at end of file
+        self.OIDC_TOKEN_ENDPOINT = oidc_token_endpoint
+        self.POOL_CONNECTIONS = pool_connections
+        self.POOL_MAXSIZE = pool_maxsize
+        self.CONNECT_TIMEOUT = connect_timeout
+        self.READ_TIMEOUT = read_timeout
+        self.KEEP_ALIVE = keep_alive
+        self.TRANSPORT = transport
@@ -2,9 +2,227 @@
 import numpy as np
 import pandas as pd
 import re
-from impectPy.helpers import RateLimitedAPI, ImpectSession, ForbiddenError, safe_execute, resolve_matches
+from impectPy.helpers import RateLimitedAPI, ImpectSession, ForbiddenError, safe_execute, resolve_matches, join_columns
 from .matches import getMatchesFromHost
 from .iterations import getIterationsFromHost
+from .backends import check_backend, pivot_event_kpis, pivot_event_kpis_polars, join_event_kpis
+from .possessions import possession_cols, derive_possessions
+
+######
+#
+# These definitions contain the renamed columns and the column order of the
+# events dataframe
+#
+######
+
+
+# define renamed columns
+event_renames = {
+    "currentAttackingSquadId": "attackingSquadId",
+    "currentAttackingSquadName": "attackingSquadName",
+    "duelDuelType": "duelType",
+    "scheduledDate": "dateTime",
+    "gameTimeGameTime": "gameTime",
+    "gameTimeGameTimeInSec": "gameTimeInSec",
+    "eventId": "eventId_scorings",
+    "id": "eventId",
+    "index": "eventNumber",
+    "phaseIndex": "setPiecePhaseIndex",
+    "dribblePlayerId": "dribbleOpponentPlayerId",
+    "setPieceMainEvent": "setPieceSubPhaseMainEvent",
+}
+
+# define desired column order
+event_cols = [
+    "matchId",
+    "dateTime",
+    "competitionId",
+    "competitionName",
+    "competitionType",
+    "iterationId",
+    "season",
+    "matchDayIndex",
+    "matchDayName",
+    "homeSquadId",
+    "homeSquadName",
+    "homeSquadCountryId",
+    "homeSquadCountryName",
+    "homeCoachId",
+    "homeCoachName",
+    "homeSquadType",
+    "awaySquadId",
+    "awaySquadName",
+    "awaySquadCountryId",
+    "awaySquadCountryName",
+    "awaySquadType",
+    "awayCoachId",
+    "awayCoachName",
+    "eventId",
+    "eventNumber",
+    "sequenceIndex",
+    "periodId",
+    "gameTime",
+    "gameTimeInSec",
+    "duration",
+    "squadId",
+    "squadName",
+    "attackingSquadId",
+    "attackingSquadName",
+    "phase",
+    "playerId",
+    "playerName",
+    "playerPosition",
+    "playerPositionSide",
+    "actionType",
+    "action",
+    "bodyPart",
+    "bodyPartExtended",
+    "previousPassHeight",
+    "result",
+    "startCoordinatesX",
+    "startCoordinatesY",
+    "startAdjCoordinatesX",
+    "startAdjCoordinatesY",
+    "startPackingZone",
+    "startPitchPosition",
+    "startLane",
+    "endCoordinatesX",
+    "endCoordinatesY",
+    "endAdjCoordinatesX",
+    "endAdjCoordinatesY",
+    "endPackingZone",
+    "endPitchPosition",
+    "endLane",
+    "opponents",
+    "pressure",
+    "distanceToGoal",
+    "pxTTeam",
+    "pxTOpponent",
+    "pressingPlayerId",
+    "pressingPlayerName",
+    "distanceToOpponent",
+    "opponentCoordinatesX",
+    "opponentCoordinatesY",
+    "opponentAdjCoordinatesX",
+    "opponentAdjCoordinatesY",
+    "passReceiverType",
+    "passReceiverPlayerId",
+    "passReceiverPlayerName",
+    "passDistance",
+    "passAngle",
+    "dribbleDistance",
+    "dribbleType",
+    "dribbleResult",
+    "dribbleOpponentPlayerId",
+    "dribbleOpponentPlayerName",
+    "shotDistance",
+    "shotAngle",
+    "shotTargetPointY",
+    "shotTargetPointZ",
+    "shotWoodwork",
+    "shotGkCoordinatesX",
+    "shotGkCoordinatesY",
+    "shotGkAdjCoordinatesX",
+    "shotGkAdjCoordinatesY",
+    "shotGkDivePointY",
+    "shotGkDivePointZ",
+    "duelType",
+    "duelPlayerId",
+    "duelPlayerName",
+    "fouledPlayerId",
+    "fouledPlayerName",
+    "formationTeam",
+    "formationOpponent",
+    "inferredSetPiece",
+]
+
+# define set piece column order
+set_piece_cols = [
+    "setPieceId",
+    "setPiecePhaseIndex",
+    "setPieceCategory",
+    "adjSetPieceCategory",
+    "setPieceExecutionType",
+    "setPieceSubPhaseId",
+    "setPieceSubPhaseIndex",
+    "setPieceSubPhaseStartZone",
+    "setPieceSubPhaseCornerEndZone",
+    "setPieceSubPhaseCornerType",
+    "setPieceSubPhaseFreeKickEndZone",
+    "setPieceSubPhaseFreeKickType",
+    "setPieceSubPhaseGoalKickEndZone",
+    "setPieceSubPhaseGoalKickType",
+    "setPieceSubPhaseThrowInEndZone",
+    "setPieceSubPhaseThrowInType",
+    "setPieceSubPhaseSecondDeliveryEndZone",
+    "setPieceSubPhaseSecondDeliveryType",
+    "setPieceSubPhaseMainEvent",
+    "setPieceSubPhaseMainEventPlayerId",
+    "setPieceSubPhaseMainEventPlayerName",
+    "setPieceSubPhaseMainEventOutcome",
+    "setPieceSubPhasePassReceiverId",
+    "setPieceSubPhasePassReceiverName",
+    "setPieceSubPhaseBallTrajectory",
+    "setPieceSubPhaseFirstTouchPlayerId",
+    "setPieceSubPhaseFirstTouchPlayerName",
+    "setPieceSubPhaseFirstTouchWon",
+    "setPieceSubPhaseIndirectHeader",
+    "setPieceSubPhaseSecondTouchPlayerId",
+    "setPieceSubPhaseSecondTouchPlayerName",
+    "setPieceSubPhaseSecondTouchWon",
+    "setPieceSubPhaseSecondTouchEndZone",
+]
+
+
+# define name columns and the id columns they are looked up from
+player_name_cols = {
+    "playerName": "playerId",
+    "pressingPlayerName": "pressingPlayerId",
+    "fouledPlayerName": "fouledPlayerId",
+    "duelPlayerName": "duelPlayerId",
+    "passReceiverPlayerName": "passReceiverPlayerId",
+    "dribbleOpponentPlayerName": "dribblePlayerId",
+}
+squad_name_cols = {
+    "squadName": "squadId",
+    "currentAttackingSquadName": "currentAttackingSquadId",
+}
+set_piece_player_name_cols = {
+    "setPieceSubPhaseMainEventPlayerName": "setPieceSubPhaseMainEventPlayerId",
+    "setPieceSubPhasePassReceiverName": "setPieceSubPhasePassReceiverId",
+    "setPieceSubPhaseFirstTouchPlayerName": "setPieceSubPhaseFirstTouchPlayerId",
+    "setPieceSubPhaseSecondTouchPlayerName": "setPieceSubPhaseSecondTouchPlayerId",
+}
+
+# define columns that are added per match, i.e. all columns between matchId and eventId
+match_cols = event_cols[event_cols.index("matchId") + 1:event_cols.index("eventId")]
+iteration_cols = ["competitionId", "competitionName", "competitionType", "season"]
+coach_cols = ["homeCoachId", "homeCoachName", "awayCoachId", "awayCoachName"]
+
+
+######
+#
+# This function filters the events of a match on the values of event columns
+#
+######
+
+
+def filter_events(events: pd.DataFrame, filters: dict) -> pd.DataFrame:
+    """Return the events whose value is in the given list of values for every column in ``filters``.
+
+    Events of a match without one of the filtered columns are dropped.
+    """
+    # combine filters into one mask
+    mask = np.ones(len(events), dtype=bool)
+    for col, values in filters.items():
+        if col in events.columns:
+            mask &= events[col].isin(values).to_numpy()
+        else:
+            mask[:] = False
+
+    # return filtered events
+    return events[mask]
+
 
 ######
 #
@@ -16,474 +234,488 @@ from .iterations import getIterationsFromHost
 
 def getEvents(
         matches: list, token: str, include_kpis: bool = True,
-        include_set_pieces: bool = True, session: ImpectSession = ImpectSession()
+        include_set_pieces: bool = True, session: ImpectSession = ImpectSession(), backend: str = "pandas",
+        columns: list = None, action_types: list = None, squads: list = None, players: list = None,
+        periods: list = None, phases: list = None, include_possessions: bool = False
 ) -> pd.DataFrame:
-    """Return a DataFrame of all events for the given list of match IDs."""
+    """Return a DataFrame of all events for the given list of match IDs, optionally restricted to the given columns and filtered events."""
     # create an instance of RateLimitedAPI
     connection = RateLimitedAPI(session)
 
     # construct header with access token
     connection.session.headers.update({"Authorization": f"Bearer {token}"})
 
-    return getEventsFromHost(matches, include_kpis, include_set_pieces, connection, "https://api.impect.com")
+    return getEventsFromHost(
+        matches, include_kpis, include_set_pieces, connection, "https://api.impect.com", backend, columns,
+        action_types, squads, players, periods, phases, include_possessions
+    )
 
 # define function
 def getEventsFromHost(
-        matches: list, include_kpis: bool, include_set_pieces: bool, connection: RateLimitedAPI, host: str
+        matches: list, include_kpis: bool, include_set_pieces: bool, connection: RateLimitedAPI, host: str,
+        backend: str = "pandas", columns: list = None, action_types: list = None, squads: list = None,
+        players: list = None, periods: list = None, phases: list = None, include_possessions: bool = False
 ) -> pd.DataFrame:
     """Fetch events for the given matches from the given host and return them as a DataFrame.
 
     Optionally includes event KPIs and set-piece sub-phase data depending on the
     ``include_kpis`` and ``include_set_pieces`` flags. Resolves match metadata,
     player names, squad names, and coach names from the API and merges them into the result.
+    With ``backend="polars"`` the event KPI pivot runs as a multi-threaded polars query.
+    If ``columns`` is given, only these columns are returned in the given order and only the
+    endpoints, joins and name lookups required for them are run. Events can be filtered by
+    ``action_types``, ``squads``, ``players``, ``periods`` and ``phases``. The filters are applied
+    to the events of each match right after they are fetched, so scorings, set pieces and
+    metadata are only joined onto the remaining events. With ``include_possessions=True`` the
+    player sequence, possession and phase IDs, game states and possession outcomes are derived
+    for all matches in one pass and added as columns. They are derived before the filters are
+    applied, so the filters then only take effect after all events have been fetched.
     """
-    resolved = resolve_matches(matches, connection, host)
-    match_data = resolved.match_data
-    matches = resolved.matches
-    iterations = resolved.iterations
-    forbidden_matches = []
-
-    # get match events
-    def fetch_match_events(connection, url):
-        return connection.make_api_request_limited(
-            url=url,
-            method="GET"
-        ).process_response(endpoint="Match Events")
-
-    # create list to store dfs
-    events_list = []
-    for match in matches:
-        events = safe_execute(
-            fetch_match_events,
-            connection,
-            url=f"{host}/v5/customerapi/matches/{match}/events",
-            identifier=f"{match}",
-            forbidden_list=forbidden_matches
-        ).assign(matchId=match)
-        events_list.append(events)
-    events = pd.concat(events_list)
-
-    # account for matches without dribbles, duels or opponents tagged
-    attributes = [
-        "dribbleDistance",
-        "dribbleType",
-        "dribbleResult",
-        "dribblePlayerId",
-        "duelDuelType",
-        "duelPlayerId",
-        "opponentCoordinatesX",
-        "opponentCoordinatesY",
-        "opponentAdjCoordinatesX",
-        "opponentAdjCoordinatesY"
-    ]
-
-    # add attribute if it doesn't exist in df
-    for attribute in attributes:
-        if attribute not in events.columns:
-            events[attribute] = np.nan
-
-    # get players
-    players_list = []
-    for iteration in iterations:
-        players = connection.make_api_request_limited(
-            url=f"{host}/v5/customerapi/iterations/{iteration}/players",
-            method="GET"
-        ).process_response(
-            endpoint="Players"
-        )[["id", "commonname"]]
-        players_list.append(players)
-    players = pd.concat(players_list).drop_duplicates()
-    player_map = players.set_index("id")["commonname"].to_dict()
-
-    # get squads
-    squads_list = []
-    for iteration in iterations:
-        squads = connection.make_api_request_limited(
-            url=f"{host}/v5/customerapi/iterations/{iteration}/squads",
-            method="GET"
-        ).process_response(
-            endpoint="Squads"
-        )[["id", "name"]]
-        squads_list.append(squads)
-    squads = pd.concat(squads_list).drop_duplicates()
-    squad_map = squads.set_index("id")["name"].to_dict()
-
-    # get coaches
-    coaches_blacklisted = False
-    coaches_list = []
-    for iteration in iterations:
-        try:
-            coaches = connection.make_api_request_limited(
-                url=f"{host}/v5/customerapi/iterations/{iteration}/coaches",
+    # check input for backend argument
+    check_backend(backend)
+
+    # check input for columns argument
+    if columns is not None and (not isinstance(columns, list) or not all(isinstance(col, str) for col in columns)):
+        raise Exception("Argument 'columns' must be a list of column names.")
+
+    # check input for filter arguments
+    for arg, values, value_type, type_name in [
+        ("action_types", action_types, str, "strings"),
+        ("squads", squads, int, "integers"),
+        ("players", players, int, "integers"),
+        ("periods", periods, int, "integers"),
+        ("phases", phases, str, "strings")
+    ]:
+        if values is not None and (not isinstance(values, list) or not all(isinstance(value, value_type) for value in values)):
+            raise Exception(f"Argument '{arg}' must be a list of {type_name}.")
+
+    # compile filters on event columns
+    filters = {
+        col: values for col, values in [
+            ("actionType", action_types),
+            ("squadId", squads),
+            ("playerId", players),
+            ("periodId", periods),
+            ("phase", phases)
+        ] if values is not None
+    }
+
+    # record stages if instrumentation is enabled
+    with connection.stages("getEvents") as stages:
+        stages.stage("resolve matches")
+
+        # get columns of the result that do not depend on the kpis
+        base_cols = (
+            event_cols
+            + (possession_cols if include_possessions else [])
+            + (set_piece_cols if include_set_pieces else [])
+        )
+        invalid_cols = [] if columns is None else [col for col in columns if col not in base_cols]
+
+        if include_kpis and (columns is None or len(invalid_cols) > 0):
+
+            # get kpis
+            kpis = connection.make_api_request_limited(
+                url=f"{host}/v5/customerapi/kpis/event",
                 method="GET"
             ).process_response(
-                endpoint="Coaches",
-                raise_exception=False
+                endpoint="EventKPIs"
             )[["id", "name"]]
-            coaches_list.append(coaches)
-        except KeyError:
-            # no coaches found, create empty df
-            coaches_list.append(pd.DataFrame(columns=["id", "name"]))
-        except ForbiddenError:
-            coaches_blacklisted = True
-    coaches = pd.concat(coaches_list).drop_duplicates()
-
-    # get matches
-    matchplan_list = []
-    for iteration in iterations:
-        matchplan = getMatchesFromHost(
-            iteration=iteration,
-            connection=connection,
-            host=host
-        )
-        matchplan_list.append(matchplan)
-    matchplan = pd.concat(matchplan_list)
 
-    # get iterations
-    iterations = getIterationsFromHost(connection=connection, host=host)
+            # only keep requested kpis
+            if columns is not None:
+                invalid_cols = [col for col in invalid_cols if col not in kpis.name.to_list()]
+                kpis = kpis[kpis.name.isin(columns)]
+
+        else:
+            kpis = None
+
+        # raise exception for columns that are not part of the result
+        if len(invalid_cols) > 0:
+            raise Exception(f"Invalid columns: {', '.join(invalid_cols)}.")
+
+        # get required columns of the result
+        required = set(base_cols if columns is None else columns)
+
+        # add columns required to derive possessions and to filter the events afterwards
+        add_possessions = include_possessions and any(col in required for col in possession_cols)
+        if add_possessions:
+            required |= {
+                "matchId", "eventNumber", "playerId", "squadId", "homeSquadId", "awaySquadId", "attackingSquadId",
+                "phase", "action", "actionType", "result"
+            } | set(filters)
+
+        # define function to check if a column of the api data is required for the result
+        def is_required(col):
+            return event_renames.get(col, col) in required
+
+        # determine required endpoints and joins
+        join_kpis = kpis is not None and (columns is None or len(kpis) > 0)
+        join_set_pieces = include_set_pieces and any(
+            col in required for col in set_piece_cols if col not in ["setPieceId", "setPieceSubPhaseId"]
+        )
+        join_iterations = any(col in required for col in iteration_cols)
+        join_coaches = any(col in required for col in coach_cols)
+        join_matchplan = join_iterations or any(
+            col in required for col in match_cols if col not in iteration_cols + coach_cols
+        )
+        map_players = any(is_required(col) for col in player_name_cols) or (
+            join_set_pieces and any(col in required for col in set_piece_player_name_cols)
+        )
+        map_squads = any(is_required(col) for col in squad_name_cols)
 
-    if include_kpis:
+        resolved = resolve_matches(matches, connection, host)
+        match_data = resolved.match_data
+        matches = resolved.matches
+        iterations = resolved.iterations
+        forbidden_matches = []
 
-        # get event kpis
-        def fetch_event_kpis(connection, url):
+        # get match events
+        stages.stage("fetch events")
+        def fetch_match_events(connection, url):
             return connection.make_api_request_limited(
                 url=url,
                 method="GET"
-            ).process_response(endpoint="Scorings")
+            ).process_response(endpoint="Match Events")
 
         # create list to store dfs
-        scorings_list = []
+        events_list = []
         for match in matches:
-            scorings = safe_execute(
-                fetch_event_kpis,
+            events = safe_execute(
+                fetch_match_events,
                 connection,
-                url=f"{host}/v5/customerapi/matches/{match}/event-kpis",
+                url=f"{host}/v5/customerapi/matches/{match}/events",
                 identifier=f"{match}",
                 forbidden_list=forbidden_matches
+            ).assign(matchId=match)
+
+            # drop events that do not pass the filters
+            if filters and not add_possessions:
+                events = filter_events(events, filters)
+            events_list.append(events)
+        events = pd.concat(events_list)
+
+        # account for matches without dribbles, duels or opponents tagged
+        attributes = [
+            "dribbleDistance",
+            "dribbleType",
+            "dribbleResult",
+            "dribblePlayerId",
+            "duelDuelType",
+            "duelPlayerId",
+            "opponentCoordinatesX",
+            "opponentCoordinatesY",
+            "opponentAdjCoordinatesX",
+            "opponentAdjCoordinatesY"
+        ]
+
+        # add attribute if it doesn't exist in df
+        for attribute in attributes:
+            if attribute not in events.columns:
+                events[attribute] = np.nan
+
+        # get key columns required for sorting, joins and name lookups
+        keys = ["matchId", "index"]
+        if join_kpis:
+            keys += ["id", "playerPosition", "playerId"]
+        if join_set_pieces:
+            keys += ["setPieceId", "setPieceSubPhaseId"]
+        keys += [id_col for name_col, id_col in {**player_name_cols, **squad_name_cols}.items() if is_required(name_col)]
+
+        # only keep required columns and keys
+        events = events[[
+            col for col in events.columns if is_required(col) or col in keys
+        ]].reset_index(drop=True)
+
+        stages.stage("fetch master data")
+        if map_players:
+
+            # get players
+            players_list = []
+            for iteration in iterations:
+                players = connection.make_api_request_limited(
+                    url=f"{host}/v5/customerapi/iterations/{iteration}/players",
+                    method="GET"
+                ).process_response(
+                    endpoint="Players"
+                )[["id", "commonname"]]
+                players_list.append(players)
+            players = pd.concat(players_list).drop_duplicates()
+            player_map = players.set_index("id")["commonname"].to_dict()
+
+        if map_squads:
+
+            # get squads
+            squads_list = []
+            for iteration in iterations:
+                squads = connection.make_api_request_limited(
+                    url=f"{host}/v5/customerapi/iterations/{iteration}/squads",
+                    method="GET"
+                ).process_response(
+                    endpoint="Squads"
+                )[["id", "name"]]
+                squads_list.append(squads)
+            squads = pd.concat(squads_list).drop_duplicates()
+            squad_map = squads.set_index("id")["name"].to_dict()
+
+        # get coaches
+        coaches_blacklisted = False
+        if join_coaches:
+            coaches_list = []
+            for iteration in iterations:
+                try:
+                    coaches = connection.make_api_request_limited(
+                        url=f"{host}/v5/customerapi/iterations/{iteration}/coaches",
+                        method="GET"
+                    ).process_response(
+                        endpoint="Coaches",
+                        raise_exception=False
+                    )[["id", "name"]]
+                    coaches_list.append(coaches)
+                except KeyError:
+                    # no coaches found, create empty df
+                    coaches_list.append(pd.DataFrame(columns=["id", "name"]))
+                except ForbiddenError:
+                    coaches_blacklisted = True
+            coaches = pd.concat(coaches_list).drop_duplicates()
+
+        if join_matchplan:
+
+            # get matches
+            matchplan_list = []
+            for iteration in iterations:
+                matchplan = getMatchesFromHost(
+                    iteration=iteration,
+                    connection=connection,
+                    host=host
+                )
+                matchplan_list.append(matchplan)
+            matchplan = pd.concat(matchplan_list)
+
+        if join_iterations:
+
+            # get iterations
+            iterations = getIterationsFromHost(connection=connection, host=host)
+
+        if join_kpis:
+
+            # get event kpis
+            stages.stage("fetch event kpis")
+            def fetch_event_kpis(connection, url):
+                return connection.make_api_request_limited(
+                    url=url,
+                    method="GET"
+                ).process_response(endpoint="Scorings")
+
+            # get ids of remaining events
+            event_ids = pd.Index(events["id"])
+
+            # create list to store dfs
+            scorings_list = []
+            for match in matches:
+                scorings = safe_execute(
+                    fetch_event_kpis,
+                    connection,
+                    url=f"{host}/v5/customerapi/matches/{match}/event-kpis",
+                    identifier=f"{match}",
+                    forbidden_list=forbidden_matches
+                )
+
+                # drop scorings of filtered events
+                if filters and "eventId" in scorings.columns:
+                    scorings = scorings[scorings.eventId.isin(event_ids)]
+                scorings_list.append(scorings)
+            scorings = pd.concat(scorings_list)
+
+        if join_set_pieces:
+
+            # get set piece data
+            stages.stage("fetch set pieces")
+            def fetch_set_pieces(connection, url):
+                return connection.make_api_request_limited(
+                    url=url,
+                    method="GET"
+                ).process_response(endpoint="Set-Pieces")
+
+            # create list to store dfs
+            set_pieces_list = []
+            for match in matches:
+                set_pieces = safe_execute(
+                    fetch_set_pieces,
+                    connection,
+                    url=f"{host}/v5/customerapi/matches/{match}/set-pieces",
+                    identifier=f"{match}",
+                    forbidden_list=forbidden_matches
+                ).rename(
+                    columns={"id": "setPieceId"}
+                ).explode("setPieceSubPhase", ignore_index=True)
+                set_pieces_list.append(set_pieces)
+            set_pieces = pd.concat(set_pieces_list).reset_index()
+
+            # unpack setPieceSubPhase column
+            set_pieces = pd.concat(
+                [
+                    set_pieces.drop(columns=["setPieceSubPhase"]),
+                    pd.json_normalize(set_pieces["setPieceSubPhase"]).add_prefix("setPieceSubPhase.")
+                ],
+                axis=1
+            ).rename(columns=lambda x: re.sub(r"\.(.)", lambda y: y.group(1).upper(), x))
+
+        # fix potential typing issues
+        stages.stage("merge metadata")
+        for col in ["pressingPlayerId", "fouledPlayerId", "passReceiverPlayerId", "duelPlayerId"]:
+            if col in events.columns:
+                events[col] = events[col].astype("Int64")
+        if join_set_pieces:
+            set_pieces.setPieceSubPhaseMainEventPlayerId = set_pieces.setPieceSubPhaseMainEventPlayerId.astype("Int64")
+            set_pieces.setPieceSubPhaseFirstTouchPlayerId = set_pieces.setPieceSubPhaseFirstTouchPlayerId.astype("Int64")
+            set_pieces.setPieceSubPhaseSecondTouchPlayerId = set_pieces.setPieceSubPhaseSecondTouchPlayerId.astype("Int64")
+
+        # start joining dfs
+
+        # merge events with master data
+        for name_col, id_col in squad_name_cols.items():
+            if is_required(name_col):
+                events[name_col] = events[id_col].map(squad_map)
+        for name_col, id_col in player_name_cols.items():
+            if is_required(name_col):
+                events[name_col] = events[id_col].map(player_map)
+
+        if join_matchplan or join_coaches:
+
+            # compile one row of attributes per match, joining iterations onto matches instead of events
+            match_attributes = match_data[["id"]].reset_index(drop=True)
+            if join_matchplan:
+                match_attributes = join_columns(
+                    match_attributes,
+                    matchplan,
+                    left_on=["id"],
+                    right_on=["id"],
+                    columns=[
+                        col for col in matchplan.columns
+                        if event_renames.get(col, col) in match_cols and (is_required(col) or col == "iterationId")
+                    ]
+                )
+            if join_iterations:
+                match_attributes = join_columns(
+                    match_attributes,
+                    iterations,
+                    left_on=["iterationId"],
+                    right_on=["id"],
+                    columns=[col for col in iterations.columns if col in iteration_cols and col in required]
+                )
+
+            if join_coaches and not coaches_blacklisted:
+
+                # create coaches map
+                coaches_map = coaches.set_index("id")["name"].to_dict()
+
+                # add coach ids of each match
+                match_attributes = join_columns(
+                    match_attributes,
+                    match_data.rename(columns={"squadHomeCoachId": "homeSquadCoachId", "squadAwayCoachId": "awaySquadCoachId"}),
+                    left_on=["id"],
+                    right_on=["id"],
+                    columns=["homeSquadCoachId", "awaySquadCoachId"]
+                )
+
+                # convert coachId to integer if it is None
+                match_attributes["homeCoachId"] = match_attributes["homeSquadCoachId"].astype("Int64")
+                match_attributes["awayCoachId"] = match_attributes["awaySquadCoachId"].astype("Int64")
+                match_attributes["homeCoachName"] = match_attributes.homeSquadCoachId.map(coaches_map)
+                match_attributes["awayCoachName"] = match_attributes.awaySquadCoachId.map(coaches_map)
+
+            # broadcast match attributes to events
+            events = join_columns(
+                events,
+                match_attributes,
+                left_on=["matchId"],
+                right_on=["id"],
+                columns=[col for col in match_attributes.columns if col != "id" and is_required(col)]
             )
-            scorings_list.append(scorings)
-        scorings = pd.concat(scorings_list)
 
-        # get kpis
-        kpis = connection.make_api_request_limited(
-            url=f"{host}/v5/customerapi/kpis/event",
-            method="GET"
-        ).process_response(
-            endpoint="EventKPIs"
-        )[["id", "name"]]
+        if include_kpis and "playerId" in events.columns:
+            events["playerId"] = events["playerId"].mask(events["playerId"] == "", None)
+            events["playerId"] = events["playerId"].astype(pd.Int64Dtype())
+
+        if join_kpis:
+            stages.stage("pivot event kpis")
+            if backend == "polars":
+                # pivot scorings using polars
+                scorings = pivot_event_kpis_polars(scorings, kpis)
+            else:
+                # pivot scorings on integer keys
+                scorings = pivot_event_kpis(scorings, kpis)
+
+            # join scorings onto events
+            stages.stage("merge event kpis")
+            events = join_event_kpis(events, scorings)
+
+        if join_set_pieces:
+
+            # add player names to set pieces before joining them onto events
+            stages.stage("merge set pieces")
+            for name_col, id_col in set_piece_player_name_cols.items():
+                if name_col in required:
+                    set_pieces[name_col] = set_pieces[id_col].map(player_map)
+
+            # join set piece columns of the result onto events
+            events = join_columns(
+                events,
+                set_pieces,
+                left_on=["setPieceId", "setPieceSubPhaseId"],
+                right_on=["setPieceId", "setPieceSubPhaseId"],
+                columns=[col for col in set_pieces.columns if event_renames.get(col, col) in set_piece_cols and is_required(col)]
+            )
 
-    if include_set_pieces:
+        # rename some columns
+        stages.stage("order columns")
+        events = events.rename(columns=event_renames)
 
-        # get set piece data
-        def fetch_set_pieces(connection, url):
-            return connection.make_api_request_limited(
-                url=url,
-                method="GET"
-            ).process_response(endpoint="Set-Pieces")
+        if columns is None:
 
-        # create list to store dfs
-        set_pieces_list = []
-        for match in matches:
-            set_pieces = safe_execute(
-                fetch_set_pieces,
-                connection,
-                url=f"{host}/v5/customerapi/matches/{match}/set-pieces",
-                identifier=f"{match}",
-                forbidden_list=forbidden_matches
-            ).rename(
-                columns={"id": "setPieceId"}
-            ).explode("setPieceSubPhase", ignore_index=True)
-            set_pieces_list.append(set_pieces)
-        set_pieces = pd.concat(set_pieces_list).reset_index()
-
-        # unpack setPieceSubPhase column
-        set_pieces = pd.concat(
-            [
-                set_pieces.drop(columns=["setPieceSubPhase"]),
-                pd.json_normalize(set_pieces["setPieceSubPhase"]).add_prefix("setPieceSubPhase.")
-            ],
-            axis=1
-        ).rename(columns=lambda x: re.sub(r"\.(.)", lambda y: y.group(1).upper(), x))
-
-    # fix potential typing issues
-    events.pressingPlayerId = events.pressingPlayerId.astype("Int64")
-    events.fouledPlayerId = events.fouledPlayerId.astype("Int64")
-    events.passReceiverPlayerId = events.passReceiverPlayerId.astype("Int64")
-    events.duelPlayerId = events.duelPlayerId.astype("Int64")
-    events.fouledPlayerId = events.fouledPlayerId.astype("Int64")
-    if include_set_pieces:
-        set_pieces.setPieceSubPhaseMainEventPlayerId = set_pieces.setPieceSubPhaseMainEventPlayerId.astype("Int64")
-        set_pieces.setPieceSubPhaseFirstTouchPlayerId = set_pieces.setPieceSubPhaseFirstTouchPlayerId.astype("Int64")
-        set_pieces.setPieceSubPhaseSecondTouchPlayerId = set_pieces.setPieceSubPhaseSecondTouchPlayerId.astype("Int64")
-
-    # start merging dfs
-
-    # merge events with master data
-    events["squadName"] = events.squadId.map(squad_map)
-    events["currentAttackingSquadName"] = events.currentAttackingSquadId.map(squad_map)
-    events["playerName"] = events.playerId.map(player_map)
-    events["pressingPlayerName"] = events.pressingPlayerId.map(player_map)
-    events["fouledPlayerName"] = events.fouledPlayerId.map(player_map)
-    events["duelPlayerName"] = events.duelPlayerId.map(player_map)
-    events["passReceiverPlayerName"] = events.passReceiverPlayerId.map(player_map)
-    events["dribbleOpponentPlayerName"] = events.dribblePlayerId.map(player_map)
-    events = events.merge(
-        matchplan,
-        left_on="matchId",
-        right_on="id",
-        how="left",
-        suffixes=("", "_matchplan")
-    ).merge(
-        match_data[["id", "squadHomeCoachId", "squadAwayCoachId"]].rename(
-            columns={"squadHomeCoachId": "homeSquadCoachId", "squadAwayCoachId": "awaySquadCoachId"}),
-        left_on="matchId",
-        right_on="id",
-        how="left",
-        suffixes=("", "_matchData")
-    ).merge(
-        iterations,
-        left_on="iterationId",
-        right_on="id",
-        how="left",
-        suffixes=("", "_iterations")
-    )
+            # create order
+            order = event_cols
 
-    if not coaches_blacklisted:
-
-        # create coaches map
-        coaches_map = coaches.set_index("id")["name"].to_dict()
-
-        # convert coachId to integer if it is None
-        events["homeCoachId"] = events["homeSquadCoachId"].astype("Int64")
-        events["awayCoachId"] = events["awaySquadCoachId"].astype("Int64")
-        events["homeCoachName"] = events.homeSquadCoachId.map(coaches_map)
-        events["awayCoachName"] = events.awaySquadCoachId.map(coaches_map)
-
-    if include_kpis:
-        # unnest scorings and full join with kpi list to ensure all kpis are present
-        scorings = scorings.merge(kpis, left_on="kpiId", right_on="id", how="outer") \
-            .sort_values("kpiId") \
-            .drop("kpiId", axis=1) \
-            .fillna({"eventId": "", "position": "", "playerId": ""}) \
-            .pivot_table(index=["eventId", "position", "playerId"], columns="name", values="value", aggfunc="sum",
-                         fill_value=None) \
-            .reset_index() \
-            .loc[lambda df: df["eventId"].notna()]
-
-        # Replace empty strings with None in the eventId and playerId column
-        scorings["eventId"] = scorings["eventId"].mask(scorings["eventId"] == "", None)
-        scorings["playerId"] = scorings["playerId"].mask(scorings["playerId"] == "", None)
-        events["playerId"] = events["playerId"].mask(events["playerId"] == "", None)
-
-        # Convert column eventId from float to int
-        scorings["eventId"] = scorings["eventId"].astype(pd.Int64Dtype())
-        scorings["playerId"] = scorings["playerId"].astype(pd.Int64Dtype())
-        events["playerId"] = events["playerId"].astype(pd.Int64Dtype())
-
-        # merge events and scorings
-        events = events.merge(scorings,
-                              left_on=["playerPosition", "playerId", "id"],
-                              right_on=["position", "playerId", "eventId"],
-                              how="left",
-                              suffixes=("", "_scorings"))
-
-    if include_set_pieces:
-
-        events = events.merge(
-            set_pieces,
-            left_on=["setPieceId", "setPieceSubPhaseId"],
-            right_on=["setPieceId", "setPieceSubPhaseId"],
-            how="left",
-            suffixes=("", "_setPieces")
-        )
-        events["setPieceSubPhaseMainEventPlayerName"] = events.setPieceSubPhaseMainEventPlayerId.map(player_map)
-        events["setPieceSubPhasePassReceiverName"] = events.setPieceSubPhasePassReceiverId.map(player_map)
-        events["setPieceSubPhaseFirstTouchPlayerName"] = events.setPieceSubPhaseFirstTouchPlayerId.map(player_map)
-        events["setPieceSubPhaseSecondTouchPlayerName"] = events.setPieceSubPhaseSecondTouchPlayerId.map(player_map)
-
-    # rename some columns
-    events = events.rename(columns={
-        "currentAttackingSquadId": "attackingSquadId",
-        "currentAttackingSquadName": "attackingSquadName",
-        "duelDuelType": "duelType",
-        "scheduledDate": "dateTime",
-        "gameTimeGameTime": "gameTime",
-        "gameTimeGameTimeInSec": "gameTimeInSec",
-        "eventId": "eventId_scorings",
-        "id": "eventId",
-        "index": "eventNumber",
-        "phaseIndex": "setPiecePhaseIndex",
-        "dribblePlayerId": "dribbleOpponentPlayerId",
-        "setPieceMainEvent": "setPieceSubPhaseMainEvent",
-    })
-
-    # define desired column order
-    event_cols = [
-        "matchId",
-        "dateTime",
-        "competitionId",
-        "competitionName",
-        "competitionType",
-        "iterationId",
-        "season",
-        "matchDayIndex",
-        "matchDayName",
-        "homeSquadId",
-        "homeSquadName",
-        "homeSquadCountryId",
-        "homeSquadCountryName",
-        "homeCoachId",
-        "homeCoachName",
-        "homeSquadType",
-        "awaySquadId",
-        "awaySquadName",
-        "awaySquadCountryId",
-        "awaySquadCountryName",
-        "awaySquadType",
-        "awayCoachId",
-        "awayCoachName",
-        "eventId",
-        "eventNumber",
-        "sequenceIndex",
-        "periodId",
-        "gameTime",
-        "gameTimeInSec",
-        "duration",
-        "squadId",
-        "squadName",
-        "attackingSquadId",
-        "attackingSquadName",
-        "phase",
-        "playerId",
-        "playerName",
-        "playerPosition",
-        "playerPositionSide",
-        "actionType",
-        "action",
-        "bodyPart",
-        "bodyPartExtended",
-        "previousPassHeight",
-        "result",
-        "startCoordinatesX",
-        "startCoordinatesY",
-        "startAdjCoordinatesX",
-        "startAdjCoordinatesY",
-        "startPackingZone",
-        "startPitchPosition",
-        "startLane",
-        "endCoordinatesX",
-        "endCoordinatesY",
-        "endAdjCoordinatesX",
-        "endAdjCoordinatesY",
-        "endPackingZone",
-        "endPitchPosition",
-        "endLane",
-        "opponents",
-        "pressure",
-        "distanceToGoal",
-        "pxTTeam",
-        "pxTOpponent",
-        "pressingPlayerId",
-        "pressingPlayerName",
-        "distanceToOpponent",
-        "opponentCoordinatesX",
-        "opponentCoordinatesY",
-        "opponentAdjCoordinatesX",
-        "opponentAdjCoordinatesY",
-        "passReceiverType",
-        "passReceiverPlayerId",
-        "passReceiverPlayerName",
-        "passDistance",
-        "passAngle",
-        "dribbleDistance",
-        "dribbleType",
-        "dribbleResult",
-        "dribbleOpponentPlayerId",
-        "dribbleOpponentPlayerName",
-        "shotDistance",
-        "shotAngle",
-        "shotTargetPointY",
-        "shotTargetPointZ",
-        "shotWoodwork",
-        "shotGkCoordinatesX",
-        "shotGkCoordinatesY",
-        "shotGkAdjCoordinatesX",
-        "shotGkAdjCoordinatesY",
-        "shotGkDivePointY",
-        "shotGkDivePointZ",
-        "duelType",
-        "duelPlayerId",
-        "duelPlayerName",
-        "fouledPlayerId",
-        "fouledPlayerName",
-        "formationTeam",
-        "formationOpponent",
-        "inferredSetPiece",
-    ]
-
-    set_piece_cols = [
-        "setPieceId",
-        "setPiecePhaseIndex",
-        "setPieceCategory",
-        "adjSetPieceCategory",
-        "setPieceExecutionType",
-        "setPieceSubPhaseId",
-        "setPieceSubPhaseIndex",
-        "setPieceSubPhaseStartZone",
-        "setPieceSubPhaseCornerEndZone",
-        "setPieceSubPhaseCornerType",
-        "setPieceSubPhaseFreeKickEndZone",
-        "setPieceSubPhaseFreeKickType",
-        "setPieceSubPhaseGoalKickEndZone",
-        "setPieceSubPhaseGoalKickType",
-        "setPieceSubPhaseThrowInEndZone",
-        "setPieceSubPhaseThrowInType",
-        "setPieceSubPhaseSecondDeliveryEndZone",
-        "setPieceSubPhaseSecondDeliveryType",
-        "setPieceSubPhaseMainEvent",
-        "setPieceSubPhaseMainEventPlayerId",
-        "setPieceSubPhaseMainEventPlayerName",
-        "setPieceSubPhaseMainEventOutcome",
-        "setPieceSubPhasePassReceiverId",
-        "setPieceSubPhasePassReceiverName",
-        "setPieceSubPhaseBallTrajectory",
-        "setPieceSubPhaseFirstTouchPlayerId",
-        "setPieceSubPhaseFirstTouchPlayerName",
-        "setPieceSubPhaseFirstTouchWon",
-        "setPieceSubPhaseIndirectHeader",
-        "setPieceSubPhaseSecondTouchPlayerId",
-        "setPieceSubPhaseSecondTouchPlayerName",
-        "setPieceSubPhaseSecondTouchWon",
-        "setPieceSubPhaseSecondTouchEndZone",
-    ]
-
-    # add columns that might not exist in previous data versions
-    for col in event_cols:
-        if col not in events.columns:
-            events[col] = np.nan
-
-    # create order
-    order = event_cols
-
-    if include_set_pieces:
-        # add kpis
-        order = order + set_piece_cols
-
-    if include_kpis:
-        # get list of kpi columns
-        kpi_cols = kpis["name"].tolist()
-
-        # add kpis
-        order = order + kpi_cols
-
-    if coaches_blacklisted:
-        order = [col for col in order if col not in ["homeCoachId", "homeCoachName", "awayCoachId", "awayCoachName"]]
-
-    # reorder data
-    events = events[order]
-
-    # reorder rows
-    events = events.sort_values(["matchId", "eventNumber"])
+            if include_possessions:
+                # add derived possession columns
+                order = order + possession_cols
+
+            if include_set_pieces:
+                # add kpis
+                order = order + set_piece_cols
+
+            if include_kpis:
+                # get list of kpi columns
+                kpi_cols = kpis["name"].tolist()
+
+                # add kpis
+                order = order + kpi_cols
+
+        else:
+            order = columns
+
+        if coaches_blacklisted:
+            order = [col for col in order if col not in coach_cols]
+
+        # add columns that might not exist in previous data versions
+        for col in event_cols:
+            if col in required and col not in events.columns:
+                events[col] = np.nan
+
+        # reorder rows
+        events = events.sort_values(["matchId", "eventNumber"])
+
+        if add_possessions:
+
+            # derive possession columns and apply filters afterwards
+            stages.stage("derive possessions")
+            events = pd.concat([events, derive_possessions(events)], axis=1)
+            if filters:
+                events = filter_events(events, filters).reset_index(drop=True)
+
+        # select columns
+        events = events[order]
 
     # return events
-    return events
\ No newline at end of file
+    return events
@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 import sys
 from xml.etree import ElementTree as ET
+from .possessions import sequence_ids, phase_ids, game_states, possession_outcomes
 
 ######
 #
@@ -486,148 +487,33 @@ def generateXML(
     # those would be 3 separate video sequences. Because of lead and lag times, those consecutive events would overlap
     # significantly. TTherefore, these events are combined into one clip.
 
-    # copy data
-    players = events.copy()
-
-    # filter for rows where playerId is given
-    players = players[players.playerId.notnull()]
+    # select events with a player, keeping the row numbers used to look up previous events below
+    players = events[events.playerId.notnull()].reset_index(drop=True)
     if sequencing:
-        # create lag column for player
-        players["playerId_lag"] = players.playerId.shift(1, fill_value=0)
-
-        # detect changes in playerId compared to previous event using lag column
-        players["player_change_flag"] = np.where(
-            players["playerId"] == players["playerId_lag"], 0, 1
-        )
+        # detect changes in playerId compared to previous event to create ID column
+        players["sequence_id"] = sequence_ids(players)
 
-        # apply cumulative sum function to phase_change_flag to create ID column
-        players["sequence_id"] = players.player_change_flag.cumsum()
-
-        # create separate df to aggregate sequence timing
-        sequence_timing = players.copy().groupby("sequence_id").agg(
+        # aggregate sequence timing
+        sequence_timing = players.groupby("sequence_id").agg(
             {"start": "min",
              "end": "max"}
         ).reset_index()
 
     # calculate game state
-
-    # detect goals scored
-    players["goal_home"] = np.where(
-        ((players["action"] == "GOAL") & (players["squadId"] == players["homeSquadId"])) |
-        ((players["action"] == "OWN_GOAL") & (players["squadId"] == players["awaySquadId"])),
-        1,
-        0
-    )
-
-    players["goal_away"] = np.where(
-        ((players["action"] == "GOAL") & (players["squadId"] == players["awaySquadId"])) |
-        ((players["action"] == "OWN_GOAL") & (players["squadId"] == players["homeSquadId"])),
-        1,
-        0
-    )
-
-    # create lag column for goals because the game state should change after the goal is scored not on the
-    # goal event itself
-    players["goal_home_lag"] = players.goal_home.shift(1, fill_value=0)
-    players["goal_away_lag"] = players.goal_away.shift(1, fill_value=0)
-
-    # apply cumulative sum function to goal_home_lag and goal_away_lag
-    players["goal_home_sum"] = players.goal_home_lag.cumsum()
-    players["goal_away_sum"] = players.goal_away_lag.cumsum()
-
-    # calculate teamGoals and opponentGoals
-    players["teamGoals"] = np.where(
-        players["squadId"] == players["homeSquadId"],
-        players["goal_home_sum"],
-        np.where(
-            players["squadId"] == players["awaySquadId"],
-            players["goal_away_sum"],
-            np.nan
-        )
-    )
-
-    players["opponentGoals"] = np.where(
-        players["squadId"] == players["awaySquadId"],
-        players["goal_home_sum"],
-        np.where(
-            players["squadId"] == players["homeSquadId"],
-            players["goal_away_sum"],
-            np.nan
-        )
-    )
-
-    # calculate game state
-    players["gameState"] = np.where(
-        players["teamGoals"] == players["opponentGoals"], "tied",
-        np.where(
-            players["teamGoals"] > players["opponentGoals"], "leading",
-            "trailing"
-        )
-    )
+    players[["teamGoals", "opponentGoals", "gameState"]] = game_states(players)
 
     # group possession phases
 
     # create groups on team level for consecutive events that have the same attacking squad in order to determine
     # whether an attacking possession phase leads to a shot or a goal
-
-    # create lag column for attackingSquad
-    players["attackingSquadId_lag"] = players.attackingSquadId.shift(1)
-
-    # detect changes in attackingSquadName compared to previous event using lag column
-    players["possession_change_flag"] = np.where(
-        players["attackingSquadId"] == players["attackingSquadId_lag"], 0, 1
-    )
-
-    # apply cumulative sum function to possession_change_flag to create ID column
-    players["possession_id"] = players.possession_change_flag.cumsum()
-
-    # create columns to detect shots and goal
-    players["is_shot"] = np.where(players["actionType"] == "SHOT", 1, 0)
-    players["is_goal"] = np.where(
-        (players["actionType"] == "SHOT") & (players["result"] == "SUCCESS"), 1, 0
-    )
-
-    # create separate df to aggregate possession results
-    possession_results = players.copy().groupby("possession_id").agg(
-        {"is_shot": "sum",
-         "is_goal": "sum"}
-    )
-
-    # convert sum of goals/shots to boolean type
-    possession_results["leadsToShot"] = possession_results["is_shot"] > 0
-    possession_results["leadsToGoal"] = possession_results["is_goal"] > 0
-
-    # add possession result to players df
-    players = pd.merge(
-        players,
-        possession_results,
-        how="left",
-        left_on=["possession_id"],
-        right_on=["possession_id"]
-    )
+    players[["leadsToShot", "leadsToGoal"]] = possession_outcomes(players)
 
     # group phases on team level
 
     # create groups on team level for consecutive events that have the same phase and squadId in order to
     # create team video clips
-
-    # create copy of data to evaluate phases
-    phases = players.copy()
-    phases = phases[phases.phase.notnull()]
-
-    # create lag columns for phase and squadId
-    phases["phase_lag"] = phases.phase.shift(1)
-    phases["squadId_lag"] = phases.squadId.shift(1)
-
-    # detect changes in either phase or squadId compared to previous event using lag columns
-    phases["phase_change_flag"] = np.where(
-        (phases["phase"] == phases["phase_lag"]) & (phases["squadId"] == phases["squadId_lag"]),
-        0,
-        1
-    )
-
-    # apply cumulative sum function to phase_change_flag to create ID column
-    phases["phase_id"] = phases.phase_change_flag.cumsum()
+    phases = players[players.phase.notnull()]
+    phases = phases.assign(phase_id=phase_ids(phases))
 
     # create copies of pxTTeam
     phases["pxTTeamStart"] = phases.pxTTeam
@@ -4,10 +4,20 @@ import requests
 import time
 import pandas as pd
 import re
+import json
 import math
 import logging
 import warnings
-from typing import Optional, Dict, Any, NamedTuple
+import threading
+import socket
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from urllib3.connection import HTTPConnection
+from urllib3.util.request import ACCEPT_ENCODING
+from impectPy.instrumentation import endpoint_of, no_stage_timeline
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Dict, Any, NamedTuple, Callable
 
 # create logger for this module
 logger = logging.getLogger("impectPy")
@@ -22,19 +32,144 @@ logger.addHandler(logging.NullHandler())
 
 class ImpectResponse(requests.Response):
     def process_response(self, endpoint: str, raise_exception: bool = True) -> pd.DataFrame:
-        """Validate the API response, flatten the JSON data, and return it as a DataFrame."""
+        """Validate the API response, flatten the JSON data, and return it as a DataFrame.
+
+        For responses of revalidated endpoints, the DataFrame is built once, stored with the
+        decoded body and a copy is returned on every call.
+        """
         # validate and get data from response
         result = validate_response(response=self, endpoint=endpoint, raise_exception=raise_exception)
 
+        # reuse stored df
+        entry = getattr(self, "revalidation_entry", None)
+        if entry is not None and entry.frame is not None:
+            return entry.frame.copy()
+
+        # start recording normalize time
+        instrumentation = getattr(self, "instrumentation", None)
+        if instrumentation is not None:
+            start = time.perf_counter()
+
         # convert to df
         result = pd.json_normalize(result)
 
         # fix column names using regex
         result = result.rename(columns=lambda x: re.sub(r"\.(.)", lambda y: y.group(1).upper(), x))
 
+        # record normalize time
+        if instrumentation is not None:
+            instrumentation.add("normalize", endpoint_of(self.url), start, rows=len(result))
+
+        # store df if response is kept for revalidation
+        if entry is not None:
+            entry.frame = result
+            return result.copy()
+
         # return result
         return result
 
+    def json(self, **kwargs):
+        """Decode the JSON body once and return the cached result on subsequent calls.
+
+        The body is streamed from the connection and decompressed chunk by chunk straight into a
+        single buffer that is handed to the JSON parser, so neither the compressed body nor a
+        decoded string copy is kept. Bytes on the wire and decoded bytes are recorded in the
+        transfer statistics of the session.
+        """
+        # return cached result
+        if getattr(self, "_decoded", None) is not None:
+            return self._decoded
+
+        # start recording decode time
+        instrumentation = getattr(self, "instrumentation", None)
+        if instrumentation is not None:
+            start = time.perf_counter()
+
+        # use body if it has already been read
+        if self._content_consumed and isinstance(self._content, bytes):
+            body = self._content
+            wire_bytes = len(body)
+        else:
+            # read and decompress body in chunks
+            body = bytearray()
+            for chunk in self.iter_content(chunk_size=64 * 1024):
+                body += chunk
+
+            # get number of bytes read from the wire
+            wire_bytes = self.raw.tell() if hasattr(self.raw, "tell") else len(body)
+
+        # record transfer statistics
+        if getattr(self, "transfer_stats", None) is not None:
+            self.transfer_stats.record(url=self.url, wire_bytes=wire_bytes, decoded_bytes=len(body))
+
+        # decode body and cache result
+        self._decoded = json.loads(body, **kwargs)
+
+        # record decode time
+        if instrumentation is not None:
+            instrumentation.add(
+                "decode", endpoint_of(self.url), start, wireBytes=wire_bytes, decodedBytes=len(body)
+            )
+
+        return self._decoded
+
+
+######
+#
+# This class collects bytes on the wire and decoded bytes per endpoint
+#
+######
+
+class TransferStats:
+    def __init__(self):
+        """Initialize empty per-endpoint transfer statistics."""
+        self.endpoints = {}  # transfer statistics keyed by endpoint
+        self.lock = threading.Lock()  # lock to record statistics from several threads
+
+    def record(self, url: str, wire_bytes: int, decoded_bytes: int):
+        """Add the transferred and decoded size of one response to the statistics of its endpoint."""
+        # replace ids in path to group requests by endpoint
+        endpoint = endpoint_of(url)
+
+        with self.lock:
+            stats = self.endpoints.setdefault(endpoint, {"requests": 0, "wireBytes": 0, "decodedBytes": 0})
+            stats["requests"] += 1
+            stats["wireBytes"] += wire_bytes
+            stats["decodedBytes"] += decoded_bytes
+
+    def to_df(self) -> pd.DataFrame:
+        """Return the transfer statistics as a DataFrame with one row per endpoint."""
+        with self.lock:
+            df = pd.DataFrame(
+                [{"endpoint": endpoint, **stats} for endpoint, stats in self.endpoints.items()],
+                columns=["endpoint", "requests", "wireBytes", "decodedBytes"]
+            )
+        df["compressionRatio"] = df.decodedBytes / df.wireBytes.where(df.wireBytes > 0)
+        return df
+
+
+######
+#
+# This class inherits from HTTPAdapter and enables TCP keep-alive on pooled connections
+#
+######
+
+class ImpectAdapter(HTTPAdapter):
+    def __init__(self, keep_alive: bool = True, keep_alive_idle: int = 60, **kwargs):
+        """Initialize an HTTPAdapter that optionally sends TCP keep-alive probes on idle connections."""
+        self.keep_alive = keep_alive  # whether to enable TCP keep-alive on pooled connections
+        self.keep_alive_idle = keep_alive_idle  # idle time (in seconds) before keep-alive probes are sent
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        """Create the pool manager with keep-alive socket options."""
+        if self.keep_alive:
+            socket_options = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+            if hasattr(socket, "TCP_KEEPIDLE"):
+                socket_options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, self.keep_alive_idle))
+            kwargs["socket_options"] = socket_options
+        super().init_poolmanager(*args, **kwargs)
+
 
 ######
 #
@@ -43,10 +178,48 @@ class ImpectResponse(requests.Response):
 ######
 
 class ImpectSession(requests.Session):
+    def __init__(
+            self, pool_connections: int = 10, pool_maxsize: int = 32, connect_timeout: Optional[float] = 10,
+            read_timeout: Optional[float] = 300, keep_alive: bool = True, transport: Optional[HTTPAdapter] = None
+    ):
+        """Initialize a session with a tuned connection pool, default timeouts and keep-alive settings.
+
+        ``pool_connections`` is the number of hosts to keep pools for and ``pool_maxsize`` the number of
+        connections kept per host, which should be at least the number of threads sharing the session.
+        Timeouts are applied to every request that does not pass its own ``timeout``. With
+        ``keep_alive=False``, connections are closed after each request. A ``transport`` (e.g.
+        ``RecordingTransport`` or ``ReplayTransport``) replaces the default adapter for all requests.
+        """
+        super().__init__()
+        self.timeout = (connect_timeout, read_timeout)  # default (connect, read) timeout in seconds
+        self.keep_alive = keep_alive  # whether to reuse connections between requests
+        self.transfer_stats = TransferStats()  # bytes on the wire and decoded bytes per endpoint
+
+        # negotiate all content encodings that can be decoded (gzip, deflate and br if brotli is installed)
+        self.headers["Accept-Encoding"] = ACCEPT_ENCODING
+
+        # mount given transport or adapter with tuned connection pool
+        adapter = transport if transport is not None else ImpectAdapter(
+            keep_alive=keep_alive,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
     def request(self, *args, **kwargs) -> ImpectResponse:
         """Send a request and return the response cast to ImpectResponse."""
+        # apply default timeout and stream body so it can be decoded chunk by chunk
+        kwargs.setdefault("timeout", self.timeout)
+        kwargs.setdefault("stream", True)
+
+        # close connection after request if keep-alive is disabled
+        if not self.keep_alive:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), "Connection": "close"}
+
         response = super().request(*args, **kwargs)
         response.__class__ = ImpectResponse
+        response.transfer_stats = self.transfer_stats
         return response
 
 
@@ -67,79 +240,285 @@ class ForbiddenError(HTTPError):
     pass
 
 
+class UnavailableMatchesError(Exception):
+    """Raised when all supplied matches are unavailable or forbidden."""
+    pass
+
+
+class InFlightRequest:
+    def __init__(self):
+        """Initialize a placeholder for the outcome of a request that other threads can wait for."""
+        self.done = threading.Event()  # set once the request has finished
+        self.response = None  # response of the request
+        self.exception = None  # exception raised by the request
+        self.followers = 0  # number of threads waiting for the response
+
+    def wait(self) -> ImpectResponse:
+        """Wait for the request to finish and return its response or raise its exception."""
+        self.done.wait()
+        if self.exception is not None:
+            raise self.exception
+        return self.response
+
+
+class RevalidationEntry:
+    def __init__(self, payload: Any, etag: Optional[str], last_modified: Optional[str]):
+        """Initialize a stored master data response from its decoded body and validators."""
+        self.payload = payload  # decoded JSON body of the response
+        self.etag = etag  # ETag header of the response
+        self.last_modified = last_modified  # Last-Modified header of the response
+        self.frame = None  # DataFrame built from the payload on first use
+
+    def attach(self, response: ImpectResponse) -> ImpectResponse:
+        """Attach the stored payload to the given response, so its body does not have to be read."""
+        response._decoded = self.payload
+        response.revalidation_entry = self
+        return response
+
+
+# define the master data endpoints that are revalidated with conditional requests
+revalidated_endpoints = re.compile(
+    r"/customerapi/(iterations/?|countries|kpis|player-scores|squad-scores|player-profiles)$"
+)
+
+
 class RateLimitedAPI:
     def __init__(self, session: Optional[ImpectSession] = None):
         """Initialize a RateLimitedAPI instance, using the provided session or a new ImpectSession."""
         self.session = session or ImpectSession()  # use the provided session or create a new session
         self.bucket = None  # TokenBucket object to manage rate limit tokens
+        self.bucket_lock = threading.Lock()  # lock to share the bucket between threads
+        self.in_flight = {}  # GET requests currently in flight, keyed by URL
+        self.in_flight_lock = threading.Lock()  # lock to register and look up in-flight requests
+        self.revalidation_cache = {}  # decoded body and validators of master data responses, keyed by URL
+        self.revalidation_lock = threading.Lock()  # lock to store and look up revalidation entries
+        self.lookups = {}  # indexed master data built once per connection, keyed by name and arguments
+        self.lookups_lock = threading.Lock()  # lock to store lookups from several threads
+        self.access_token = None  # AccessToken object to refresh the access token, if logged in with credentials
+        self.instrumentation = None  # Instrumentation object to record requests and stages, if enabled
+
+    # start recording the stages of a function
+    def stages(self, name: str):
+        """Return a stage timeline for the function with the given name, which does nothing if instrumentation is disabled."""
+        if self.instrumentation is None:
+            return no_stage_timeline
+        return self.instrumentation.stages(name)
+
+    # get an indexed master data lookup
+    def lookup(self, key: tuple, build: Callable[[], Any]) -> Any:
+        """Return the lookup stored under ``key``, building it with ``build`` on first use.
+
+        Lookups are kept for the lifetime of the connection and shared between threads, so they
+        must not be modified by the caller.
+        """
+        # return stored lookup
+        with self.lookups_lock:
+            if key in self.lookups:
+                return self.lookups[key]
+
+        # build lookup and keep the first one stored by any thread
+        value = build()
+        with self.lookups_lock:
+            return self.lookups.setdefault(key, value)
 
     # make a rate-limited API request
     def make_api_request_limited(
             self, url: str, method: str, data: Optional[Dict[str, str]] = None
     ) -> ImpectResponse:
-        """Execute a rate-limited API call and return the response."""
+        """Execute a rate-limited API call and return the response.
+
+        If ``instrumentation`` is set, the request is recorded with its latency, status, retry
+        count, token wait and backoff time.
+        """
+        # record request if instrumentation is enabled
+        if self.instrumentation is not None:
+            with self.instrumentation.request(method=method, url=url) as record:
+                response = self.make_api_request_coalesced(url=url, method=method, data=data, record=record)
+                record["status"] = response.status_code
+            return response
+
+        return self.make_api_request_coalesced(url=url, method=method, data=data)
+
+    def make_api_request_coalesced(
+            self, url: str, method: str, data: Optional[Dict[str, str]] = None, record: Optional[dict] = None
+    ) -> ImpectResponse:
+        """Execute a rate-limited API call, sharing the response of identical requests in flight.
+
+        Concurrent identical GET requests from several threads are coalesced: only the first one
+        is sent (and consumes a token), all others wait for it and receive the same response with
+        the JSON body decoded only once.
+        """
+        # only coalesce GET requests without body
+        if method != "GET" or data is not None:
+            return self.make_api_request_rate_limited(url=url, method=method, data=data, record=record)
+
+        # join an identical request that is already in flight or register a new one
+        with self.in_flight_lock:
+            flight = self.in_flight.get(url)
+            leader = flight is None
+            if leader:
+                flight = self.in_flight[url] = InFlightRequest()
+            else:
+                flight.followers += 1
+        if not leader:
+            if record is not None:
+                record["coalesced"] = True
+            return flight.wait()
+
+        # send request and fan out the outcome to all waiting threads
+        try:
+            flight.response = self.make_api_request_rate_limited(url=url, method=method, data=data, record=record)
+        except Exception as e:
+            flight.exception = e
+            raise
+        finally:
+            with self.in_flight_lock:
+                del self.in_flight[url]
+                followers = flight.followers
+            if followers > 0 and flight.response is not None:
+                # decode once for all waiting threads
+                try:
+                    flight.response.json()
+                except ValueError:
+                    pass
+            flight.done.set()
 
-        # check if bucket is not initialized
-        if not self.bucket:
-            # make an initial API call to get rate limit information
-            response = self.make_api_request(url=url, method=method, data=data)
+        # return response
+        return flight.response
 
-            # get rate limit policy
-            policy = response.headers["RateLimit-Policy"]
+    def make_api_request_rate_limited(
+            self, url: str, method: str, data: Optional[Dict[str, str]] = None, record: Optional[dict] = None
+    ) -> ImpectResponse:
+        """Wait for a token of the rate limit, execute the API call and return the response."""
+        with self.bucket_lock:
 
-            # extract maximum requests using regex
-            capacity = int(re.sub(";.*", "", policy))
+            # check if bucket is not initialized
+            if not self.bucket:
+                # make an initial API call to get rate limit information
+                response = self.make_api_request(url=url, method=method, data=data, record=record)
 
-            # extract time window using regex
-            interval = int(re.sub(".*w=(\\d+).*", "\\1", policy))
+                # get rate limit policy
+                policy = response.headers["RateLimit-Policy"]
 
-            # create TokenBucket
-            self.bucket = TokenBucket(
-                capacity=capacity,
-                refill_after=interval,
-                remaining=int(response.headers["RateLimit-Remaining"])
-            )
+                # extract maximum requests using regex
+                capacity = int(re.sub(";.*", "", policy))
 
-            return response
+                # extract time window using regex
+                interval = int(re.sub(".*w=(\\d+).*", "\\1", policy))
+
+                # create TokenBucket
+                self.bucket = TokenBucket(
+                    capacity=capacity,
+                    refill_after=interval,
+                    remaining=int(response.headers["RateLimit-Remaining"])
+                )
+
+                return response
+
+            # consume a token if available, otherwise determine time until refill
+            token = self.bucket.consumeToken()
+            wait_time = math.ceil(
+                self.bucket.refill_after * 100 - (
+                        time.time() - self.bucket.last_refill_time
+                ) * 100
+            ) / 100
 
         # check if a token is available
-        if self.bucket.isTokenAvailable():
+        if token:
             # get API response
-            response = self.make_api_request(url=url, method=method, data=data)
-
-            # consume a token
-            self.bucket.consumeToken()
+            response = self.make_api_request(url=url, method=method, data=data, record=record)
         else:
             # wait for refill
-            time.sleep(
-                math.ceil(
-                    self.bucket.refill_after * 100 - (
-                            time.time() - self.bucket.last_refill_time
-                    ) * 100
-                ) / 100
-            )
+            time.sleep(max(0, wait_time))
+            if record is not None:
+                record["tokenWait"] += max(0, wait_time)
 
             # call function again
-            response = self.make_api_request_limited(url=url, method=method, data=data)
+            response = self.make_api_request_rate_limited(url=url, method=method, data=data, record=record)
 
         # return response
         return response
 
     def make_api_request(
             self, url: str, method: str, data: Optional[Dict[str, Any]] = None,
-            max_retries: int = 3, retry_delay: Optional[int] = None
+            max_retries: int = 3, retry_delay: Optional[int] = None,
+            headers: Optional[Dict[str, str]] = None, authenticate: bool = True, record: Optional[dict] = None
     ) -> ImpectResponse:
-        """Execute an API call with retries and return the response."""
+        """Execute an API call with retries and return the response.
+
+        GET requests to master data endpoints are sent as conditional requests if a previous
+        response carried an ETag or Last-Modified header. Only the decoded body and the validators
+        of such responses are stored, never the response itself, as its connection must not be
+        shared between threads. A 304 response is returned with the stored body and DataFrame.
+
+        If an ``access_token`` is attached and ``authenticate`` is True, the token is refreshed
+        shortly before it expires and a request rejected with 401 is retried once with a refreshed
+        token.
+        """
+        # refresh access token shortly before it expires
+        if authenticate and self.access_token is not None:
+            self.access_token.ensure_valid()
+
+        # check if endpoint is revalidated
+        revalidate = method == "GET" and data is None and revalidated_endpoints.search(urlparse(url).path) is not None
+
+        # add validators of stored response
+        headers = dict(headers) if headers is not None else {}
+        cached = None
+        if revalidate:
+            with self.revalidation_lock:
+                cached = self.revalidation_cache.get(url)
+            if cached is not None:
+                if cached.etag is not None:
+                    headers["If-None-Match"] = cached.etag
+                if cached.last_modified is not None:
+                    headers["If-Modified-Since"] = cached.last_modified
+
         # try API call
         for i in range(max_retries):
-            response = self.session.request(method=method, url=url, data=data)
+            if record is not None:
+                record["retryCount"] = i
+                start = time.perf_counter()
+
+            response = self.session.request(method=method, url=url, data=data, headers=headers)
+
+            if record is not None:
+                record["latency"] += time.perf_counter() - start
+            if self.instrumentation is not None:
+                response.instrumentation = self.instrumentation
 
             # check status code and return if 200
             if response.status_code == 200:
+                # store response for revalidation if it carries validators
+                if revalidate and ("ETag" in response.headers or "Last-Modified" in response.headers):
+                    # read the whole body before storing it, so the connection is released by this thread
+                    entry = RevalidationEntry(
+                        payload=response.json(),
+                        etag=response.headers.get("ETag"),
+                        last_modified=response.headers.get("Last-Modified")
+                    )
+                    with self.revalidation_lock:
+                        self.revalidation_cache[url] = entry
+                    entry.attach(response)
+
                 # return response
                 return response
+            # check status code and return stored response if 304
+            elif response.status_code == 304 and cached is not None:
+                # release connection and reuse stored body
+                response.close()
+                return cached.attach(response)
+
+            # read error message and release connection before retrying or raising, as the body is streamed
+            try:
+                message = response.json().get("message")
+            except (ValueError, AttributeError):
+                message = None
+            finally:
+                response.close()
+
             # check status code and retry if 429
-            elif response.status_code == 429:
+            if response.status_code == 429:
                 # check if last try
                 if i < max_retries - 1:
                     # calculate exact wait time based on token bucket refill time
@@ -153,15 +532,25 @@ class RateLimitedAPI:
                         wait_time = retry_delay if retry_delay is not None else 1
 
                     print(f"Received status code {response.status_code} "
-                          f"({response.json().get('message', 'Rate Limit Exceeded')})"
+                          f"({message or 'Rate Limit Exceeded'})"
                           f", retrying in {wait_time} seconds...")
                     time.sleep(wait_time)
+                    if record is not None:
+                        record["backoffTime"] += wait_time
                 else:
                     raise HTTPError(f"Received status code {response.status_code} "
-                                    f"({response.json().get('message', 'Rate Limit Exceeded')})"
+                                    f"({message or 'Rate Limit Exceeded'})"
                                     f", exceeded maximum number of {max_retries} retries.")
             # check status code and terminate if 401 or 403
             elif response.status_code == 401:
+                # refresh access token and retry once
+                if authenticate and self.access_token is not None:
+                    self.access_token.refresh(stale_token=response.request.headers.get("Authorization"))
+                    return self.make_api_request(
+                        url=url, method=method, data=data, max_retries=max_retries, retry_delay=retry_delay,
+                        headers=headers, authenticate=False, record=record
+                    )
+
                 exception_message = f"Received status code {response.status_code} (Invalid User Credentials)."
                 if "x-request-id" in response.headers:
                     exception_message += (f" Request-ID: {response.headers['x-request-id']} "
@@ -169,16 +558,22 @@ class RateLimitedAPI:
 
                 raise HTTPError(exception_message)
             elif response.status_code == 403:
-                raise ForbiddenError(f"Received status code {response.status_code} "
-                                     f"(You do not have access to this resource.). "
-                                     f"Request-ID: {response.headers['x-request-id']} "
-                                     f"(Make sure to include this in any support request.)")
-            # check status code and terminate if other error
+                exception_message = (f"Received status code {response.status_code} "
+                                     f"(You do not have access to this resource.).")
+                if "x-request-id" in response.headers:
+                    exception_message += (f" Request-ID: {response.headers['x-request-id']} "
+                                          f"(Make sure to include this in any support request.)")
+
+                raise ForbiddenError(exception_message)
+            # check status code and terminate if other error, e.g. a rejected token request without request id
             else:
-                raise HTTPError(f"Received status code {response.status_code} "
-                                f"({response.json().get('message', 'Unknown error')}). "
-                                f"Request-ID: {response.headers['x-request-id']} "
-                                f"(Make sure to include this in any support request.)")
+                exception_message = (f"Received status code {response.status_code} "
+                                     f"({message or 'Unknown error'}).")
+                if "x-request-id" in response.headers:
+                    exception_message += (f" Request-ID: {response.headers['x-request-id']} "
+                                          f"(Make sure to include this in any support request.)")
+
+                raise HTTPError(exception_message)
 
 
 ######
@@ -225,13 +620,20 @@ class TokenBucket:
 
 
 def unnest_mappings_dict(mapping_dict: dict) -> dict:
-    """Unnest the idMappings entries in a list of dicts and return the modified list.
+    """Unnest the idMappings entries in a list of dicts and return them as a new list.
 
     Each item's ``idMappings`` list is iterated and each provider key is promoted to a
-    top-level key of the form ``<provider>Id``.
+    top-level key of the form ``<provider>Id``. The input is left untouched, as decoded
+    responses may be shared between threads.
     """
+    # create list to store unnested entries
+    result = []
+
     # iterate over entry and unnest idMappings
     for entry in mapping_dict:
+        # copy entry
+        entry = dict(entry)
+
         # iterate over mappings
         for mapping in entry["idMappings"]:
             # get mapping data
@@ -239,8 +641,48 @@ def unnest_mappings_dict(mapping_dict: dict) -> dict:
                 # add mapping as key on iteration level
                 entry[provider + "Id"] = mapping_id
 
+        # append entry
+        result.append(entry)
+
     # return result
-    return mapping_dict
+    return result
+
+
+######
+#
+# This function extracts the first id per provider from the idMappings key of
+# a list of dicts
+#
+######
+
+
+def first_mapping_ids(entries: list) -> pd.DataFrame:
+    """Return a DataFrame with one ``<provider>Id`` column per provider found in the idMappings of ``entries``.
+
+    Each column holds the first id of the provider's mapping list, or None if the list is empty
+    or the provider is missing for an entry. The columns are built in a single pass over the
+    entries, so no entry is copied and no column has to be post-processed.
+    """
+    # create dict to store one column per provider
+    columns = {}
+
+    # iterate over entries and mappings
+    for i, entry in enumerate(entries):
+        for mapping in entry["idMappings"]:
+            for provider, mapping_ids in mapping.items():
+                # add column for new provider
+                column = columns.get(provider)
+                if column is None:
+                    column = columns[provider] = [None] * len(entries)
+
+                # store first mapping id
+                column[i] = mapping_ids[0] if mapping_ids else None
+
+    # convert to df
+    return pd.DataFrame(
+        {provider + "Id": pd.Series(column) for provider, column in columns.items()},
+        index=pd.RangeIndex(len(entries))
+    )
 
 
 ######
@@ -281,6 +723,61 @@ def unnest_mappings_df(df: pd.DataFrame, mapping_col: str) -> pd.DataFrame:
     return df
 
 
+######
+#
+# These functions add columns of a lookup table to a dataframe by matching
+# key columns instead of merging both dataframes
+#
+######
+
+
+def lookup_rows(table_keys: list, keys: list) -> np.ndarray:
+    """Return the position of the first ``table_keys`` row matching each ``keys`` row, or -1 if there is none.
+
+    Both arguments are lists of Series with one Series per key column. Key values are factorized
+    jointly, so missing values match each other as in ``merge``.
+    """
+    # encode keys of table and frame with shared codes
+    n_table = len(table_keys[0])
+    codes = np.zeros(n_table + len(keys[0]), dtype="int64")
+    for table_key, key in zip(table_keys, keys):
+        key_codes, key_values = pd.factorize(
+            pd.concat([table_key, key], ignore_index=True), use_na_sentinel=False
+        )
+        codes = codes * len(key_values) + key_codes
+
+    # get first table row per code
+    table_codes, first = np.unique(codes[:n_table], return_index=True)
+
+    # get table row of each frame row
+    rows = pd.Index(table_codes).get_indexer(codes[n_table:])
+    rows[rows >= 0] = first[rows[rows >= 0]]
+
+    # return rows
+    return rows
+
+
+def join_columns(df: pd.DataFrame, table: pd.DataFrame, left_on: list, right_on: list, columns: list) -> pd.DataFrame:
+    """Add ``columns`` of ``table`` to ``df`` by looking up the row matching ``left_on`` in ``right_on``.
+
+    Behaves like a many-to-one left merge that keeps the rows and index of ``df``, but only the
+    requested columns are copied and key and suffix columns are never created. Columns that already
+    exist in ``df`` are skipped, rows without a match get missing values.
+    """
+    # get requested columns that are not in df yet
+    columns = [col for col in columns if col not in df.columns]
+
+    # get table row of each df row
+    rows = lookup_rows([table[col] for col in right_on], [df[col] for col in left_on])
+
+    # take rows of table, missing rows are filled by reindexing
+    values = table[columns].reset_index(drop=True).reindex(rows)
+    values.index = df.index
+
+    # return df with additional columns
+    return pd.concat([df, values], axis=1)
+
+
 ######
 #
 # This function validates the response from an API call and returns the data
@@ -392,7 +889,7 @@ def resolve_matches(matches: list, connection: RateLimitedAPI, host: str) -> Mat
     # drop empty responses and raise if none remain
     match_data_list = [df for df in match_data_list if not df.empty]
     if not match_data_list:
-        raise Exception("All supplied matches are unavailable or forbidden. Execution stopped.")
+        raise UnavailableMatchesError("All supplied matches are unavailable or forbidden. Execution stopped.")
     match_data = pd.concat(match_data_list)
 
     # filter for matches that are unavailable
@@ -411,7 +908,7 @@ def resolve_matches(matches: list, connection: RateLimitedAPI, host: str) -> Mat
 
     # raise exception if no matches remaining or report removed matches
     if len(matches) == 0:
-        raise Exception("All supplied matches are unavailable or forbidden. Execution stopped.")
+        raise UnavailableMatchesError("All supplied matches are unavailable or forbidden. Execution stopped.")
     if len(forbidden_matches) > 0:
         warnings.warn(f"The following matches are forbidden for the user: {forbidden_matches}")
     if len(unavailable_matches) > 0:
@@ -421,3 +918,172 @@ def resolve_matches(matches: list, connection: RateLimitedAPI, host: str) -> Mat
     iterations = list(match_data[match_data.lastCalculationDate.notnull()].iterationId.unique())
 
     return MatchResolution(match_data=match_data, matches=matches, iterations=iterations)
+
+
+######
+#
+# This function validates the iteration argument and returns it as a list
+#
+######
+
+
+def resolve_iterations(iteration) -> list:
+    """Validate an iteration ID or a list of iteration IDs and return it as a list without duplicates."""
+    # check input for iteration argument
+    if isinstance(iteration, int):
+        return [iteration]
+    if not isinstance(iteration, list) or len(iteration) == 0 or not all(isinstance(i, int) for i in iteration):
+        raise Exception("Argument 'iteration' must be an integer or a non-empty list of integers.")
+
+    # remove duplicates and keep order
+    return list(dict.fromkeys(iteration))
+
+
+######
+#
+# This function validates the positions argument and returns it as a list of
+# position sets
+#
+######
+
+
+def resolve_position_sets(positions, allowed_positions: list) -> list:
+    """Validate a list of positions or a list of position lists and return it as a list of position lists.
+
+    A flat list of positions is a single position set. Duplicate position sets are removed while
+    keeping their order.
+    """
+    # check input for positions argument
+    if not isinstance(positions, list):
+        raise Exception("Argument 'positions' must be a list.")
+
+    # wrap single position set
+    if all(isinstance(position, str) for position in positions):
+        position_sets = [positions]
+    elif len(positions) > 0 and all(isinstance(position_set, list) and len(position_set) > 0 for position_set in positions):
+        position_sets = positions
+    else:
+        raise Exception("Argument 'positions' must be a list of positions or a list of non-empty lists of positions.")
+
+    # check if the input positions are valid
+    invalid_positions = list(dict.fromkeys(
+        position for position_set in position_sets for position in position_set if position not in allowed_positions
+    ))
+    if len(invalid_positions) > 0:
+        raise Exception(
+            f"Invalid position(s): {', '.join(map(str, invalid_positions))}."
+            f"\nChoose one or more of: {', '.join(allowed_positions)}"
+        )
+
+    # remove duplicates and keep order
+    return [list(position_set) for position_set in dict.fromkeys(tuple(position_set) for position_set in position_sets)]
+
+
+######
+#
+# This function runs a function for several items concurrently, sharing the
+# rate limit of the connection
+#
+######
+
+
+def map_concurrent(
+        func: Callable[[Any], Any], items: list, connection: RateLimitedAPI, max_workers: Optional[int] = None
+) -> list:
+    """Call ``func(item)`` for all ``items`` on a thread pool and return the results in the order of ``items``.
+
+    All threads share the connection and therefore its rate limit. The number of threads defaults
+    to the capacity of the token bucket (10 before the first response), so about one refill window
+    of requests is in flight at a time. Requests and stages recorded in the threads are attached
+    to the span that is open in the calling thread.
+    """
+    # run single item in calling thread
+    if len(items) <= 1:
+        return [func(item) for item in items]
+
+    # get number of threads
+    if max_workers is None:
+        max_workers = connection.bucket.capacity if connection.bucket is not None else 10
+
+    # attach spans recorded in threads to the span of the calling thread
+    instrumentation = connection.instrumentation
+    parent = instrumentation.current_span() if instrumentation is not None else None
+
+    def call(item):
+        if parent is not None:
+            instrumentation.local.stack = [parent]
+        return func(item)
+
+    # run function concurrently and keep the order of items
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        return list(executor.map(call, items))
+
+
+######
+#
+# This function downloads per-match payloads and transforms them in a pipeline,
+# so that the transformation of earlier matches overlaps later downloads
+#
+######
+
+
+def fetch_and_transform(
+        fetch: Callable[[Any], pd.DataFrame], items: list, func: Callable[..., pd.DataFrame], *args,
+        workers: Optional[int] = None, chunk_size: int = 10, max_pending: Optional[int] = None
+) -> pd.DataFrame:
+    """Download ``items`` with ``fetch(item)`` and transform them with ``func(chunk, *args)`` while downloading.
+
+    Downloads run in the calling thread, so the rate limiting of the connection is unaffected.
+    Every ``chunk_size`` payloads are concatenated to a chunk with a fresh index and handed to a
+    background worker thread or, if ``workers`` is greater than 1, to a ``ProcessPoolExecutor``
+    with that many processes (``func`` then has to be a module-level function). At most
+    ``max_pending`` chunks (default: twice the number of workers) are queued for transformation;
+    once the queue is full, downloading waits for the oldest chunk to finish. Results are
+    concatenated once, in the order of ``items``.
+    """
+    # check input for workers, chunk_size and max_pending arguments
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise Exception("Argument 'workers' must be a positive integer.")
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        raise Exception("Argument 'chunk_size' must be a positive integer.")
+    if max_pending is not None and (not isinstance(max_pending, int) or max_pending < 1):
+        raise Exception("Argument 'max_pending' must be a positive integer.")
+
+    # set up transformation workers and queue bound
+    if workers is None or workers == 1:
+        executor = ThreadPoolExecutor(max_workers=1)
+        workers = 1
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    if max_pending is None:
+        max_pending = 2 * workers
+
+    results = []
+    pending = deque()
+    buffer = []
+    with executor:
+        for index, item in enumerate(items):
+
+            # download payload
+            buffer.append(fetch(item))
+
+            # hand over full chunks and the final chunk
+            if len(buffer) < chunk_size and index < len(items) - 1:
+                continue
+            chunk = pd.concat(buffer).reset_index(drop=True)
+            buffer = []
+
+            # wait for the oldest chunk if the queue is full
+            if len(pending) >= max_pending:
+                results.append(pending.popleft().result())
+            pending.append(executor.submit(func, chunk, *args))
+
+        # collect remaining chunks
+        while pending:
+            results.append(pending.popleft().result())
+
+    # concatenate results once
+    results = [result for result in results if len(result) > 0]
+    if len(results) == 0:
+        return pd.DataFrame()
+    return pd.concat(results)
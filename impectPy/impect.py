@@ -1,163 +1,223 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterator, Union
+from contextlib import contextmanager
 from xml.etree import ElementTree as ET
 
 import pandas as pd
 
 from impectPy.config import Config
 
-from .helpers import RateLimitedAPI
-from .access_token import getAccessTokenFromUrl
-from .iterations import getIterationsFromHost
-from .matches import getMatchesFromHost
-from .events import getEventsFromHost
-from .player_matchsums import getPlayerMatchsumsFromHost
-from .squad_matchsums import getSquadMatchsumsFromHost
-from .player_iteration_averages import getPlayerIterationAveragesFromHost
-from .squad_iteration_averages import getSquadIterationAveragesFromHost
-from .player_match_scores import getPlayerMatchScoresFromHost
-from .player_iteration_scores import getPlayerIterationScoresFromHost
-from .squad_match_scores import getSquadMatchScoresFromHost
-from .squad_iteration_scores import getSquadIterationScoresFromHost
-from .player_profile_scores import getPlayerProfileScoresFromHost
-from .generate_xml import generateXML
-from .set_pieces import getSetPiecesFromHost
-from .squad_ratings import getSquadRatingsFromHost
-from .squad_coefficients import getSquadCoefficientsFromHost
-from .formations import getFormationsFromHost
-from .substitutions import getSubstitutionsFromHost
-from .starting_positions import getStartingPositionsFromHost
-from .match_predictions import getMatchPredictionsFromHost
-from .data import getDataFromHost
+from .helpers import RateLimitedAPI, ImpectSession
+from .instrumentation import Instrumentation
+from .profiler import Profiler
 
+# the modules behind the API methods are imported on first use, so creating an instance stays cheap
 
 class Impect:
     def __init__(self, config: Optional[Config] = None, connection: Optional[RateLimitedAPI] = None):
         self.__config = config if config is not None else Config()
-        self.connection = connection if connection is not None else RateLimitedAPI()
+        self.connection = connection if connection is not None else RateLimitedAPI(
+            ImpectSession(
+                pool_connections=self.__config.POOL_CONNECTIONS,
+                pool_maxsize=self.__config.POOL_MAXSIZE,
+                connect_timeout=self.__config.CONNECT_TIMEOUT,
+                read_timeout=self.__config.READ_TIMEOUT,
+                keep_alive=self.__config.KEEP_ALIVE,
+                transport=self.__config.TRANSPORT
+            )
+        )
 
     # login with username and password
     def login(self, username: str, password: str) -> str:
-        """Authenticate with the Impect API using username and password and store the access token."""
-        self.__token = getAccessTokenFromUrl(username, password, self.connection, self.__config.OIDC_TOKEN_ENDPOINT)
-        self.connection.session.headers.update({"Authorization": f"Bearer {self.__token}"})
-        return self.__token
+        """Authenticate with the Impect API using username and password and store the access token.
+
+        The access token is refreshed automatically shortly before it expires, and requests rejected
+        with 401 are retried once with a refreshed token, so long-running jobs are not interrupted.
+        """
+        from .access_token import AccessToken
+        self.connection.access_token = AccessToken(
+            username, password, self.connection, self.__config.OIDC_TOKEN_ENDPOINT
+        )
+        return self.connection.access_token.access_token
 
     # use the given token for all calls of the instance
     def init(self, token: str):
         """Configure the instance to use the given access token for all subsequent API calls."""
-        self.__token = token
-        self.connection.session.headers.update({"Authorization": f"Bearer {self.__token}"})
+        self.connection.access_token = None
+        self.connection.session.headers.update({"Authorization": f"Bearer {token}"})
+
+    # record requests and stages of all calls of the instance
+    def instrument(self, callback: Optional[Callable[[dict], None]] = None) -> Instrumentation:
+        """Enable instrumentation for all subsequent API calls and return the recorder.
+
+        Every finished request, decode, normalize and transformation stage is recorded and, if
+        given, passed to ``callback``. Use ``summary()``, ``to_df()`` or ``spans()`` on the
+        returned object to inspect the records.
+        """
+        self.connection.instrumentation = Instrumentation(callback)
+        return self.connection.instrumentation
+
+    # stop recording requests and stages
+    def uninstrument(self):
+        """Disable instrumentation for all subsequent API calls."""
+        self.connection.instrumentation = None
+
+    # profile all calls within a with block
+    @contextmanager
+    def profile(self, callback: Optional[Callable[[dict], None]] = None) -> Iterator[Profiler]:
+        """Profile all API calls made within the ``with`` block and yield the profiler.
+
+        Records wall time, CPU time and peak memory of every stage and request, e.g. of the stages
+        of ``getEvents()``. Call ``report()`` on the profiler for a flame-style text report.
+        """
+        profiler = Profiler(callback)
+        previous = self.connection.instrumentation
+        self.connection.instrumentation = profiler
+        profiler.start()
+        try:
+            yield profiler
+        finally:
+            profiler.stop()
+            self.connection.instrumentation = previous
 
     def getIterations(self) -> pd.DataFrame:
         """Return a DataFrame of all competition iterations available to the authenticated user."""
+        from .iterations import getIterationsFromHost
         return getIterationsFromHost(
             self.connection, self.__config.HOST
         )
 
     def getMatches(self, iteration: int) -> pd.DataFrame:
         """Return a DataFrame of all matches for the given iteration."""
+        from .matches import getMatchesFromHost
         return getMatchesFromHost(
             iteration, self.connection, self.__config.HOST
         )
 
-    def getEvents(self, matches: list, include_kpis: bool = True, include_set_pieces: bool = True) -> pd.DataFrame:
-        """Return a DataFrame of all events for the given list of match IDs."""
+    def getEvents(
+            self, matches: list, include_kpis: bool = True, include_set_pieces: bool = True, backend: str = "pandas",
+            columns: Optional[list] = None, action_types: Optional[list] = None, squads: Optional[list] = None,
+            players: Optional[list] = None, periods: Optional[list] = None, phases: Optional[list] = None,
+            include_possessions: bool = False
+    ) -> pd.DataFrame:
+        """Return a DataFrame of all events for the given list of match IDs, optionally restricted to the given columns and filtered events."""
+        from .events import getEventsFromHost
         return getEventsFromHost(
-            matches, include_kpis, include_set_pieces, self.connection, self.__config.HOST
+            matches, include_kpis, include_set_pieces, self.connection, self.__config.HOST, backend, columns,
+            action_types, squads, players, periods, phases, include_possessions
         )
 
-    def getPlayerMatchsums(self, matches: list) -> pd.DataFrame:
+    def getPlayerMatchsums(
+            self, matches: list, backend: str = "pandas", workers: Optional[int] = None, chunk_size: int = 10
+    ) -> pd.DataFrame:
         """Return a DataFrame of per-player KPI sums for the given list of match IDs."""
+        from .player_matchsums import getPlayerMatchsumsFromHost
         return getPlayerMatchsumsFromHost(
-            matches, self.connection, self.__config.HOST
+            matches, self.connection, self.__config.HOST, backend, workers, chunk_size
         )
 
-    def getSquadMatchsums(self, matches: list) -> pd.DataFrame:
+    def getSquadMatchsums(self, matches: list, workers: Optional[int] = None, chunk_size: int = 10) -> pd.DataFrame:
         """Return a DataFrame of per-squad KPI sums for the given list of match IDs."""
+        from .squad_matchsums import getSquadMatchsumsFromHost
         return getSquadMatchsumsFromHost(
-            matches, self.connection, self.__config.HOST
+            matches, self.connection, self.__config.HOST, workers, chunk_size
         )
 
-    def getPlayerIterationAverages(self, iteration: int) -> pd.DataFrame:
-        """Return a DataFrame of per-player KPI averages for the given iteration."""
+    def getPlayerIterationAverages(self, iteration: Union[int, list]) -> pd.DataFrame:
+        """Return a DataFrame of per-player KPI averages for the given iteration or list of iterations."""
+        from .player_iteration_averages import getPlayerIterationAveragesFromHost
         return getPlayerIterationAveragesFromHost(
             iteration, self.connection, self.__config.HOST
         )
 
     def getSquadIterationAverages(self, iteration: int) -> pd.DataFrame:
         """Return a DataFrame of per-squad KPI averages for the given iteration."""
+        from .squad_iteration_averages import getSquadIterationAveragesFromHost
         return getSquadIterationAveragesFromHost(
             iteration, self.connection, self.__config.HOST
         )
 
-    def getPlayerMatchScores(self, matches: list, positions: list = None) -> pd.DataFrame:
+    def getPlayerMatchScores(
+            self, matches: list, positions: list = None, workers: Optional[int] = None, chunk_size: int = 10
+    ) -> pd.DataFrame:
         """Return a DataFrame of per-player scores for the given list of match IDs."""
+        from .player_match_scores import getPlayerMatchScoresFromHost
         return getPlayerMatchScoresFromHost(
-            matches, self.connection, self.__config.HOST, positions
+            matches, self.connection, self.__config.HOST, positions, workers, chunk_size
         )
 
     def getPlayerIterationScores(self, iteration: int, positions: list = None) -> pd.DataFrame:
-        """Return a DataFrame of per-player iteration-level scores for the given iteration."""
+        """Return a DataFrame of per-player iteration-level scores for the given iteration and optional positions or list of position sets."""
+        from .player_iteration_scores import getPlayerIterationScoresFromHost
         return getPlayerIterationScoresFromHost(
             iteration, self.connection, self.__config.HOST, positions
         )
 
-    def getSquadMatchScores(self, matches: list) -> pd.DataFrame:
+    def getSquadMatchScores(self, matches: list, workers: Optional[int] = None, chunk_size: int = 10) -> pd.DataFrame:
         """Return a DataFrame of per-squad scores for the given list of match IDs."""
+        from .squad_match_scores import getSquadMatchScoresFromHost
         return getSquadMatchScoresFromHost(
-            matches, self.connection, self.__config.HOST
+            matches, self.connection, self.__config.HOST, workers, chunk_size
         )
 
-    def getSquadIterationScores(self, iteration: int) -> pd.DataFrame:
-        """Return a DataFrame of per-squad iteration-level scores for the given iteration."""
+    def getSquadIterationScores(self, iteration: Union[int, list]) -> pd.DataFrame:
+        """Return a DataFrame of per-squad iteration-level scores for the given iteration or list of iterations."""
+        from .squad_iteration_scores import getSquadIterationScoresFromHost
         return getSquadIterationScoresFromHost(
             iteration, self.connection, self.__config.HOST
         )
 
     def getPlayerProfileScores(self, iteration: int, positions: list) -> pd.DataFrame:
-        """Return a DataFrame of per-player profile scores for the given iteration and positions."""
+        """Return a DataFrame of per-player profile scores for the given iteration and positions or list of position sets."""
+        from .player_profile_scores import getPlayerProfileScoresFromHost
         return getPlayerProfileScoresFromHost(
             iteration, positions, self.connection, self.__config.HOST
         )
 
     def getSetPieces(self, matches: list) -> pd.DataFrame:
         """Return a DataFrame of all set-piece sub-phases for the given list of match IDs."""
+        from .set_pieces import getSetPiecesFromHost
         return getSetPiecesFromHost(
             matches, self.connection, self.__config.HOST
         )
 
-    def getSquadRatings(self, iteration: int) -> pd.DataFrame:
-        """Return a DataFrame of squad ratings for all dates in the given iteration."""
+    def getSquadRatings(self, iteration: Union[int, list]) -> pd.DataFrame:
+        """Return a DataFrame of squad ratings for all dates in the given iteration or list of iterations."""
+        from .squad_ratings import getSquadRatingsFromHost
         return getSquadRatingsFromHost(
             iteration, self.connection, self.__config.HOST
         )
 
-    def getSquadCoefficients(self, iteration: int) -> pd.DataFrame:
-        """Return a DataFrame of match-prediction model coefficients for the given iteration."""
+    def getSquadCoefficients(self, iteration: Union[int, list]) -> pd.DataFrame:
+        """Return a DataFrame of match-prediction model coefficients for the given iteration or list of iterations."""
+        from .squad_coefficients import getSquadCoefficientsFromHost
         return getSquadCoefficientsFromHost(
             iteration, self.connection, self.__config.HOST
         )
 
     def getFormations(self, matches: list) -> pd.DataFrame:
         """Return a DataFrame of all formation changes for the given list of match IDs."""
+        from .formations import getFormationsFromHost
         return getFormationsFromHost(
             matches, self.connection, self.__config.HOST
         )
 
     def getSubstitutions(self, matches: list) -> pd.DataFrame:
         """Return a DataFrame of all substitutions for the given list of match IDs."""
+        from .substitutions import getSubstitutionsFromHost
         return getSubstitutionsFromHost(
             matches, self.connection, self.__config.HOST
         )
 
     def getStartingPositions(self, matches: list) -> pd.DataFrame:
         """Return a DataFrame of starting positions for all players in the given list of match IDs."""
+        from .starting_positions import getStartingPositionsFromHost
         return getStartingPositionsFromHost(
             matches, self.connection, self.__config.HOST
         )
 
-    def getMatchPredictions(self, iteration: int) -> pd.DataFrame:
-        """Return a DataFrame of match predictions for all matches in the given iteration."""
+    def getMatchPredictions(self, iteration: Union[int, list]) -> pd.DataFrame:
+        """Return a DataFrame of match predictions for all matches in the given iteration or list of iterations."""
+        from .match_predictions import getMatchPredictionsFromHost
         return getMatchPredictionsFromHost(
             iteration, self.connection, self.__config.HOST
         )
@@ -172,6 +232,7 @@ class Impect:
         """
         if not url.startswith("http"):
             url = f"{self.__config.HOST}{url}"
+        from .data import getDataFromHost
         return getDataFromHost(url=url, method=method, connection=self.connection, data=data)
 
     @staticmethod
@@ -194,6 +255,7 @@ class Impect:
             buckets: bool = True
     ) -> ET.ElementTree:
         """Generate an XML event file for use in video analysis tools and return it as an ElementTree."""
+        from .generate_xml import generateXML
         return generateXML(
             events, lead, lag, p1Start, p2Start, p3Start, p4Start, p5Start, codeTag, squad,
             perspective, labels, kpis, labelSorting, sequencing, buckets
@@ -0,0 +1,271 @@
+# load packages
+import re
+import time
+import uuid
+import itertools
+import threading
+import pandas as pd
+from urllib.parse import urlparse
+from typing import Optional, Callable, List
+
+######
+#
+# This function maps a request URL to its endpoint by replacing ids in the path
+#
+######
+
+
+def endpoint_of(url: str) -> str:
+    """Return the path of the given URL with numeric ids replaced by ``{id}``."""
+    return re.sub(r"/\d+(?=/|$)", "/{id}", urlparse(url).path)
+
+
+######
+#
+# This class records API requests and transformation stages as spans
+#
+######
+
+
+class Instrumentation:
+    def __init__(self, callback: Optional[Callable[[dict], None]] = None):
+        """Initialize an empty recorder, optionally with a callback that receives every finished record.
+
+        Records are plain dicts with a ``kind`` (``function``, ``stage``, ``request``, ``decode`` or
+        ``normalize``), a ``name``, start and end time in nanoseconds since the epoch, the
+        ``duration`` in seconds and the ids of the span and its parent span. Request records also
+        contain the status code, network ``latency``, ``tokenWait``, ``backoffTime``, ``retryCount``
+        and whether the request was ``coalesced`` with an identical request in flight.
+        """
+        self.records = []  # finished records
+        self.callbacks = [callback] if callback is not None else []  # functions called with every finished record
+        self.trace_id = uuid.uuid4().hex  # id shared by all spans of this recorder
+        self.ids = itertools.count(1)  # generator of span ids
+        self.lock = threading.Lock()  # lock to record from several threads
+        self.local = threading.local()  # stack of open spans per thread
+
+    def add_callback(self, callback: Callable[[dict], None]):
+        """Register a function that is called with every finished record."""
+        self.callbacks.append(callback)
+
+    def clear(self):
+        """Remove all finished records."""
+        with self.lock:
+            self.records = []
+
+    def current_span(self) -> Optional[int]:
+        """Return the id of the innermost open span of the current thread."""
+        stack = getattr(self.local, "stack", None)
+        return stack[-1] if stack else None
+
+    def open(self, kind: str, name: str, **attributes) -> dict:
+        """Open a span of the given kind and name as child of the innermost open span of the current thread."""
+        record = {
+            "kind": kind,
+            "name": name,
+            "spanId": next(self.ids),
+            "parentId": self.current_span(),
+            "thread": threading.current_thread().name,
+            "startTime": time.time_ns(),
+            "start": time.perf_counter(),
+            **attributes
+        }
+
+        # push span to stack of current thread
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        self.local.stack.append(record["spanId"])
+
+        return record
+
+    def close(self, record: dict, **attributes):
+        """Close the given span, add the given attributes and emit the record."""
+        record["duration"] = time.perf_counter() - record.pop("start")
+        record["endTime"] = time.time_ns()
+        record.update(attributes)
+
+        # remove span from stack of current thread
+        stack = getattr(self.local, "stack", [])
+        if record["spanId"] in stack:
+            stack.remove(record["spanId"])
+
+        self.emit(record)
+
+    def add(self, kind: str, name: str, start: float, **attributes):
+        """Emit a finished span that started at the given ``time.perf_counter()`` value."""
+        duration = time.perf_counter() - start
+        end_time = time.time_ns()
+        self.emit({
+            "kind": kind,
+            "name": name,
+            "spanId": next(self.ids),
+            "parentId": self.current_span(),
+            "thread": threading.current_thread().name,
+            "startTime": end_time - int(duration * 1e9),
+            "endTime": end_time,
+            "duration": duration,
+            **attributes
+        })
+
+    def emit(self, record: dict):
+        """Store a finished record and pass it to all callbacks."""
+        with self.lock:
+            self.records.append(record)
+        for callback in self.callbacks:
+            callback(record)
+
+    def request(self, method: str, url: str) -> "Span":
+        """Return a context manager that records one API request."""
+        return Span(self, self.open(
+            "request",
+            endpoint_of(url),
+            method=method,
+            url=url,
+            status=None,
+            latency=0.0,
+            tokenWait=0.0,
+            backoffTime=0.0,
+            retryCount=0,
+            coalesced=False
+        ))
+
+    def stages(self, name: str) -> "StageTimeline":
+        """Return a timeline that records the consecutive stages of the function with the given name."""
+        return StageTimeline(self, name)
+
+    def to_df(self) -> pd.DataFrame:
+        """Return all finished records as a DataFrame."""
+        with self.lock:
+            return pd.DataFrame(self.records)
+
+    def summary(self) -> pd.DataFrame:
+        """Return count, total, mean and maximum duration and request metrics per kind and name."""
+        df = self.to_df()
+        if df.empty:
+            return pd.DataFrame(columns=["kind", "name", "count", "totalTime", "meanTime", "maxTime"])
+
+        # add metrics that have not been recorded
+        for col in ["latency", "tokenWait", "backoffTime", "retryCount", "wireBytes", "decodedBytes"]:
+            if col not in df.columns:
+                df[col] = 0
+
+        # aggregate per kind and name
+        summary = df.groupby(["kind", "name"], sort=False).agg(
+            count=("duration", "size"),
+            totalTime=("duration", "sum"),
+            meanTime=("duration", "mean"),
+            maxTime=("duration", "max"),
+            latency=("latency", "sum"),
+            tokenWait=("tokenWait", "sum"),
+            backoffTime=("backoffTime", "sum"),
+            retryCount=("retryCount", "sum"),
+            wireBytes=("wireBytes", "sum"),
+            decodedBytes=("decodedBytes", "sum")
+        ).reset_index()
+
+        # return summary sorted by total time
+        return summary.sort_values("totalTime", ascending=False, ignore_index=True)
+
+    def spans(self) -> List[dict]:
+        """Return all finished records as OpenTelemetry-style span dicts."""
+        with self.lock:
+            records = list(self.records)
+
+        keys = ["kind", "name", "spanId", "parentId", "startTime", "endTime", "duration"]
+        return [
+            {
+                "name": record["name"],
+                "trace_id": self.trace_id,
+                "span_id": f"{record['spanId']:016x}",
+                "parent_span_id": f"{record['parentId']:016x}" if record["parentId"] is not None else None,
+                "kind": "CLIENT" if record["kind"] == "request" else "INTERNAL",
+                "start_time_unix_nano": record["startTime"],
+                "end_time_unix_nano": record["endTime"],
+                "attributes": {
+                    "impect.kind": record["kind"],
+                    **{f"impect.{key}": value for key, value in record.items() if key not in keys}
+                }
+            }
+            for record in records
+        ]
+
+
+######
+#
+# These classes record single spans and the consecutive stages of a function
+#
+######
+
+
+class Span:
+    def __init__(self, instrumentation: Instrumentation, record: dict):
+        """Wrap an open record so it is closed when the context is left."""
+        self.instrumentation = instrumentation
+        self.record = record
+
+    def __enter__(self) -> dict:
+        return self.record
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.instrumentation.close(
+            self.record, error=exc_type.__name__ if exc_type is not None else None
+        )
+
+
+class StageTimeline:
+    def __init__(self, instrumentation: Instrumentation, name: str):
+        """Open a function span whose stages are started one after the other with ``stage()``.
+
+        Use the timeline as context manager, so the function span and the current stage are
+        closed even if the function raises an exception.
+        """
+        self.instrumentation = instrumentation
+        self.function = instrumentation.open("function", name)
+        self.current = None
+
+    def __enter__(self) -> "StageTimeline":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end(error=exc_type.__name__ if exc_type is not None else None)
+
+    def stage(self, name: str):
+        """End the current stage and start the next one."""
+        self.end_stage()
+        self.current = self.instrumentation.open("stage", name)
+
+    def end_stage(self, **attributes):
+        """End the current stage."""
+        if self.current is not None:
+            self.instrumentation.close(self.current, **attributes)
+            self.current = None
+
+    def end(self, **attributes):
+        """End the current stage and the function span, if it has not been ended yet."""
+        self.end_stage(**attributes)
+        if self.function is not None:
+            self.instrumentation.close(self.function, **attributes)
+            self.function = None
+
+
+class NoStageTimeline:
+    """Stage timeline that does nothing, used when instrumentation is disabled."""
+
+    def __enter__(self) -> "NoStageTimeline":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def stage(self, name: str):
+        pass
+
+    def end_stage(self, **attributes):
+        pass
+
+    def end(self, **attributes):
+        pass
+
+
+# define timeline used when instrumentation is disabled
+no_stage_timeline = NoStageTimeline()
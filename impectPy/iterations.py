@@ -1,7 +1,7 @@
 # load packages
 import pandas as pd
 import re
-from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_dict, validate_response
+from impectPy.helpers import RateLimitedAPI, ImpectSession, first_mapping_ids, validate_response
 
 ######
 #
@@ -35,27 +35,15 @@ def getIterationsFromHost(connection: RateLimitedAPI, host: str) -> pd.DataFrame
     # get data from response
     data = validate_response(response, "Iterations")
 
-    # unnest nested IdMapping column
-    data = unnest_mappings_dict(data)
-
     # convert to pandas dataframe
     df = pd.json_normalize(data)
 
-    # drop idMappings column
-    df = df.drop("idMappings", axis = 1)
+    # drop idMappings column and add first id per provider
+    df = pd.concat([df.drop("idMappings", axis=1), first_mapping_ids(data)], axis=1)
 
     # fix column names using regex
     df = df.rename(columns=lambda x: re.sub("[\._](.)", lambda y: y.group(1).upper(), x))
 
-    # keep first entry for skillcorner, heimspiel and wyscout data
-    df["skillCornerId"] = df["skillCornerId"].apply(lambda x: x[0] if x else None)
-    df["heimSpielId"] = df["heimSpielId"].apply(lambda x: x[0] if x else None)
-    df["wyscoutId"] = df["wyscoutId"].apply(lambda x: x[0] if x else None)
-    df["optaId"] = df["optaId"].apply(lambda x: x[0] if x else None)
-    df["statsPerformId"] = df["statsPerformId"].apply(lambda x: x[0] if x else None)
-    df["transfermarktId"] = df["transfermarktId"].apply(lambda x: x[0] if x else None)
-    df["soccerdonnaId"] = df["soccerdonnaId"].apply(lambda x: x[0] if x else None)
-
     # get country data
     countries = connection.make_api_request_limited(
         url=f"{host}/v5/customerapi/countries",
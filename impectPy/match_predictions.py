@@ -1,6 +1,7 @@
 # load packages
 import pandas as pd
-from impectPy.helpers import RateLimitedAPI, ImpectSession
+from typing import Union
+from impectPy.helpers import RateLimitedAPI, ImpectSession, resolve_iterations, map_concurrent
 from .iterations import getIterationsFromHost
 from .matches import getMatchesFromHost
 
@@ -12,8 +13,8 @@ from .matches import getMatchesFromHost
 
 
 # define function
-def getMatchPredictions(iteration: int, token: str, session: ImpectSession = ImpectSession()) -> pd.DataFrame:
-    """Return a DataFrame of match predictions for all matches in the given iteration."""
+def getMatchPredictions(iteration: Union[int, list], token: str, session: ImpectSession = ImpectSession()) -> pd.DataFrame:
+    """Return a DataFrame of match predictions for all matches in the given iteration or list of iterations."""
     # create an instance of RateLimitedAPI
     connection = RateLimitedAPI(session)
 
@@ -23,19 +24,33 @@ def getMatchPredictions(iteration: int, token: str, session: ImpectSession = Imp
     return getMatchPredictionsFromHost(iteration, connection, "https://api.impect.com")
 
 
-def getMatchPredictionsFromHost(iteration: int, connection: RateLimitedAPI, host: str) -> pd.DataFrame:
+def getMatchPredictionsFromHost(iteration: Union[int, list], connection: RateLimitedAPI, host: str) -> pd.DataFrame:
     """Fetch match predictions for the given iteration from the given host and return them as a DataFrame.
 
     Merges prediction values (market, model, expert) with match schedules and competition metadata,
-    sorted by match day and match ID.
+    sorted by match day and match ID. For a list of iterations, competition metadata is fetched
+    once, the iterations are requested concurrently and their predictions are concatenated in the
+    given order.
     """
     # check input for iteration argument
-    if not isinstance(iteration, int):
-        raise Exception("Argument 'iteration' must be an integer.")
+    iteration_list = resolve_iterations(iteration)
 
     # get iterations
     iterations = getIterationsFromHost(connection=connection, host=host)
 
+    # get predictions of all iterations concurrently
+    predictions_list = map_concurrent(
+        lambda it: fetch_match_predictions(it, iterations, connection, host), iteration_list, connection
+    )
+
+    # return predictions
+    return pd.concat(predictions_list)
+
+
+def fetch_match_predictions(
+        iteration: int, iterations: pd.DataFrame, connection: RateLimitedAPI, host: str
+) -> pd.DataFrame:
+    """Fetch match predictions for a single iteration and merge them with match info and the given competition metadata."""
     # get match predictions
     predictions = connection.make_api_request_limited(
         url=f"{host}/v5/customerapi/iterations/{iteration}/predictions/match-predictions",
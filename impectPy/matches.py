@@ -1,6 +1,6 @@
 import pandas as pd
 import re
-from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_dict, validate_response
+from impectPy.helpers import RateLimitedAPI, ImpectSession, first_mapping_ids, validate_response
 
 ######
 #
@@ -24,7 +24,8 @@ def getMatches(iteration: int, token: str, session: ImpectSession = ImpectSessio
 def getMatchesFromHost(iteration: int, connection: RateLimitedAPI, host: str) -> pd.DataFrame:
     """Fetch all matches for the given iteration from the given host and return them as a DataFrame.
 
-    Merges match records with squad and country data and sorts by match day and match ID.
+    Adds squad and country data from an index that is built once per connection and iteration,
+    and sorts by match day and match ID.
     """
     # get match data
     matches = connection.make_api_request_limited(
@@ -36,82 +37,25 @@ def getMatchesFromHost(iteration: int, connection: RateLimitedAPI, host: str) ->
     # get data from response
     matches = validate_response(response=matches, endpoint="Matches")
 
-    # get squads data
-    squads = connection.make_api_request_limited(
-        url=f"{host}/v5/customerapi/iterations/"
-            f"{iteration}/squads",
-        method="GET"
-    )
+    # convert to df and clean
+    matches = clean_df(matches)
 
-    # get data from response
-    squads = validate_response(response=squads, endpoint="Squads")
+    # get squad records indexed by squad id
+    squads = get_squad_index(iteration=iteration, connection=connection, host=host)
 
-    # get country data
-    countries = connection.make_api_request_limited(
-        url=f"{host}/v5/customerapi/countries",
-        method="GET"
-    )
+    # add squad and country columns for home and away squad
+    for side in ["home", "away"]:
 
-    # get data from response
-    countries = validate_response(response=countries, endpoint="Countries")
+        # get row of each squad in index and drop matches with unknown squads or countries
+        positions = squads.index.get_indexer(matches[f"{side}SquadId"])
+        known = positions >= 0
+        known[known] = squads.countryName.notna().to_numpy()[positions[known]]
+        matches = matches[known].reset_index(drop=True)
 
-    # convert to df and clean
-    matches = clean_df(matches)
-    squads = clean_df(squads)
-    countries = pd.DataFrame(countries)
-
-    # merge matches with squads
-    matches = matches.merge(squads,
-                            left_on="homeSquadId",
-                            right_on="id",
-                            suffixes=("", "_home"))
-    matches = matches.rename(columns={
-        "name": "homeSquadName",
-        "type": "homeSquadType",
-        "gender": "homeSquadGender",
-        "skillCornerId_home": "homeSquadSkillCornerId",
-        "heimSpielId_home": "homeSquadHeimSpielId",
-        "wyscoutId_home": "homeSquadWyscoutId",
-        "optaId_home": "homeSquadOptaId",
-        "statsPerformId_home": "homeSquadStatsPerformId",
-        "transfermarktId_home": "homeSquadTransfermarktId",
-        "soccerdonnaId_home": "homeSquadSoccerdonnaId",
-        "countryId": "homeSquadCountryId"
-    })
-    matches = matches.merge(squads,
-                            left_on="awaySquadId",
-                            right_on="id",
-                            suffixes=("", "_away"))
-    matches = matches.rename(columns={
-        "name": "awaySquadName",
-        "type": "awaySquadType",
-        "gender": "awaySquadGender",
-        "skillCornerId_away": "awaySquadSkillCornerId",
-        "heimSpielId_away": "awaySquadHeimSpielId",
-        "wyscoutId_away": "awaySquadWyscoutId",
-        "optaId_away": "awaySquadOptaId",
-        "statsPerformId_away": "awaySquadStatsPerformId",
-        "transfermarktId_away": "awaySquadTransfermarktId",
-        "soccerdonnaId_away": "awaySquadSoccerdonnaId",
-        "countryId": "awaySquadCountryId"
-    })
-
-    # merge with countries
-    matches = matches.merge(
-        countries,
-        left_on="homeSquadCountryId",
-        right_on="id",
-        suffixes=("", "_homeSquadCountry")
-    )
-    matches = matches.rename(columns={"fifaName": "homeSquadCountryName"})
-
-    matches = matches.merge(
-        countries,
-        left_on="awaySquadCountryId",
-        right_on="id",
-        suffixes=("", "_awaySquadCountry")
-    )
-    matches = matches.rename(columns={"fifaName": "awaySquadCountryName"})
+        # add squad columns with prefix
+        squad_rows = squads.take(positions[known]).set_axis(matches.index, axis=0)
+        squad_rows.columns = [f"{side}Squad{column[0].upper()}{column[1:]}" for column in squad_rows.columns]
+        matches = pd.concat([matches, squad_rows], axis=1)
 
     # derive final goals per team based on resultType
     result_type_to_suffix = {
@@ -184,28 +128,62 @@ def getMatchesFromHost(iteration: int, connection: RateLimitedAPI, host: str) ->
     return matches
 
 
+# define function to get the squads of an iteration indexed by squad id
+def get_squad_index(iteration: int, connection: RateLimitedAPI, host: str) -> pd.DataFrame:
+    """Return the squads of the given iteration indexed by squad ID, including their country name.
+
+    The index is built once per connection and iteration, so loading the matches of several
+    iterations or loading them repeatedly does not re-request squads and countries.
+    """
+    def build():
+        # get squads data
+        squads = connection.make_api_request_limited(
+            url=f"{host}/v5/customerapi/iterations/"
+                f"{iteration}/squads",
+            method="GET"
+        )
+
+        # get data from response and clean
+        squads = clean_df(validate_response(response=squads, endpoint="Squads"))
+
+        # add country names
+        squads["countryName"] = squads.countryId.map(get_country_names(connection=connection, host=host))
+
+        # index by squad id
+        return squads.drop(columns=["id", "access"], errors="ignore").set_index(squads.id)
+
+    return connection.lookup(("squads", host, iteration), build)
+
+
+# define function to get country names indexed by country id
+def get_country_names(connection: RateLimitedAPI, host: str) -> pd.Series:
+    """Return the FIFA names of all countries indexed by country ID, built once per connection."""
+    def build():
+        # get country data
+        countries = connection.make_api_request_limited(
+            url=f"{host}/v5/customerapi/countries",
+            method="GET"
+        )
+
+        # get data from response
+        countries = pd.DataFrame(validate_response(response=countries, endpoint="Countries"))
+
+        # index by country id
+        return countries.set_index("id")["fifaName"]
+
+    return connection.lookup(("countries", host), build)
+
+
 # define function to clean df
 def clean_df(data: dict) -> pd.DataFrame:
 
-    # unnest nested idMapping key
-    data = unnest_mappings_dict(data)
-
     # convert to df
     df = pd.json_normalize(data)
 
+    # drop idMappings column and add first id per provider
+    df = pd.concat([df.drop("idMappings", axis=1), first_mapping_ids(data)], axis=1)
+
     # fix column names using regex
     df = df.rename(columns=lambda x: re.sub("[\._](.)", lambda y: y.group(1).upper(), x))
 
-    # drop idMappings column
-    df = df.drop("idMappings", axis=1)
-
-    # keep first entry for skillcorner, heimspiel, wyscout, opta, statsperform, transfermarkt and soccerdonna data
-    df["skillCornerId"] = df["skillCornerId"].apply(lambda x: x[0] if x else None)
-    df["heimSpielId"] = df["heimSpielId"].apply(lambda x: x[0] if x else None)
-    df["wyscoutId"] = df["wyscoutId"].apply(lambda x: x[0] if x else None)
-    df["optaId"] = df["optaId"].apply(lambda x: x[0] if x else None)
-    df["statsPerformId"] = df["statsPerformId"].apply(lambda x: x[0] if x else None)
-    df["transfermarktId"] = df["transfermarktId"].apply(lambda x: x[0] if x else None)
-    df["soccerdonnaId"] = df["soccerdonnaId"].apply(lambda x: x[0] if x else None)
-
     return df
\ No newline at end of file
@@ -1,6 +1,7 @@
 # load packages
 import pandas as pd
-from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_df
+from typing import Union
+from impectPy.helpers import RateLimitedAPI, ImpectSession, resolve_iterations, map_concurrent, unnest_mappings_df
 from .iterations import getIterationsFromHost
 
 ######
@@ -12,9 +13,9 @@ from .iterations import getIterationsFromHost
 
 
 def getPlayerIterationAverages(
-        iteration: int, token: str, session: ImpectSession = ImpectSession()
+        iteration: Union[int, list], token: str, session: ImpectSession = ImpectSession()
 ) -> pd.DataFrame:
-    """Return a DataFrame of per-player KPI averages for the given iteration."""
+    """Return a DataFrame of per-player KPI averages for the given iteration or list of iterations."""
     # create an instance of RateLimitedAPI
     connection = RateLimitedAPI(session)
 
@@ -24,17 +25,53 @@ def getPlayerIterationAverages(
     return getPlayerIterationAveragesFromHost(iteration, connection, "https://api.impect.com")
 
 def getPlayerIterationAveragesFromHost(
-        iteration: int, connection: RateLimitedAPI, host: str
+        iteration: Union[int, list], connection: RateLimitedAPI, host: str
 ) -> pd.DataFrame:
     """Fetch per-player KPI averages for the given iteration from the given host and return them as a DataFrame.
 
     Iterates over all accessible squads, pivots per-player KPI sums, and merges player
-    demographics, squad names, and competition metadata.
+    demographics, squad names, and competition metadata. For a list of iterations, KPIs,
+    countries and competition metadata are fetched once, the iterations are requested
+    concurrently and their averages are concatenated in the given order.
     """
-    # check input for matches argument
-    if not isinstance(iteration, int):
-        raise Exception("Argument 'iteration' must be an integer.")
+    # check input for iteration argument
+    iteration_list = resolve_iterations(iteration)
 
+    # get kpis
+    kpis = connection.make_api_request_limited(
+        url=f"{host}/v5/customerapi/kpis",
+        method="GET"
+    ).process_response(
+        endpoint="KPIs"
+    )[["id", "name"]]
+
+    # get iterations
+    iterations = getIterationsFromHost(connection=connection, host=host)
+
+    # get country data
+    countries = connection.make_api_request_limited(
+        url=f"{host}/v5/customerapi/countries",
+        method="GET"
+    ).process_response(
+        endpoint="Countries"
+    )
+
+    # get averages of all iterations concurrently
+    averages_list = map_concurrent(
+        lambda it: fetch_player_iteration_averages(it, kpis, iterations, countries, connection, host),
+        iteration_list,
+        connection
+    )
+
+    # return averages
+    return pd.concat(averages_list)
+
+
+def fetch_player_iteration_averages(
+        iteration: int, kpis: pd.DataFrame, iterations: pd.DataFrame, countries: pd.DataFrame,
+        connection: RateLimitedAPI, host: str
+) -> pd.DataFrame:
+    """Fetch per-player KPI averages for a single iteration and merge them with the given master data."""
     # get squads
     squads = connection.make_api_request_limited(
         url=f"{host}/v5/customerapi/iterations/{iteration}/squads",
@@ -62,32 +99,10 @@ def getPlayerIterationAveragesFromHost(
     # unnest mappings
     players = unnest_mappings_df(players, "idMappings").drop(["idMappings"], axis=1).drop_duplicates()
 
-    # get kpis
-    kpis = connection.make_api_request_limited(
-        url=f"{host}/v5/customerapi/kpis",
-        method="GET"
-    ).process_response(
-        endpoint="KPIs"
-    )[["id", "name"]]
-
-    # get iterations
-    iterations = getIterationsFromHost(connection=connection, host=host)
+    # define function to get player iteration averages per squad
+    def fetch_squad_averages(squad_id):
 
-    # get country data
-    countries = connection.make_api_request_limited(
-        url=f"{host}/v5/customerapi/countries",
-        method="GET"
-    ).process_response(
-        endpoint="Countries"
-    )
-
-    # create empty df to store averages
-    averages_list = []
-
-    # iterate over squads
-    for squad_id in squad_ids:
-
-        # get player iteration averages per squad
+        # get player iteration averages of squad
         averages_raw = connection.make_api_request_limited(
                 url=f"{host}/v5/customerapi/iterations/{iteration}/"
                     f"squads/{squad_id}/player-kpis",
@@ -100,9 +115,9 @@ def getPlayerIterationAveragesFromHost(
                 squadId=squad_id
             )
 
-        # skip if empty repsonse
+        # skip if empty response
         if len(averages_raw) == 0:
-            continue
+            return None
 
         # unnest scorings
         averages_raw = averages_raw.explode("kpis").reset_index(drop=True)
@@ -180,7 +195,13 @@ def getPlayerIterationAveragesFromHost(
             suffixes=("", "_matchShares")
         )
 
-        averages_list.append(averages_raw)
+        return averages_raw
+
+    # get averages of all squads concurrently, in squad order, and drop empty responses
+    averages_list = [
+        averages_raw for averages_raw in map_concurrent(fetch_squad_averages, squad_ids, connection)
+        if averages_raw is not None
+    ]
 
     # compile into df
     averages = pd.concat(averages_list)
@@ -268,4 +289,4 @@ def getPlayerIterationAveragesFromHost(
     averages = averages[order]
 
     # return result
-    return averages
\ No newline at end of file
+    return averages
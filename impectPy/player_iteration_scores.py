@@ -1,7 +1,7 @@
 # load packages
 import pandas as pd
 import warnings
-from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_df, ForbiddenError, safe_execute
+from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_df, ForbiddenError, safe_execute, map_concurrent, resolve_position_sets
 from .matches import getMatchesFromHost
 from .iterations import getIterationsFromHost
 
@@ -30,7 +30,7 @@ allowed_positions = [
 def getPlayerIterationScores(
         iteration: int, token: str, positions: list = None, session: ImpectSession = ImpectSession()
 ) -> pd.DataFrame:
-    """Return a DataFrame of per-player iteration-level scores for the given iteration."""
+    """Return a DataFrame of per-player iteration-level scores for the given iteration and optional positions or list of position sets."""
     # create an instance of RateLimitedAPI
     connection = RateLimitedAPI(session)
 
@@ -46,27 +46,21 @@ def getPlayerIterationScoresFromHost(
 
     When ``positions`` is provided, only scores for players who appeared at those positions are
     returned. Pivots raw score data per squad, merges player demographics and competition metadata.
+    ``positions`` may also be a list of position lists: squads, players and metadata are then
+    fetched once, all squad and position set combinations are requested concurrently and the scores
+    are returned as one frame keyed by the ``positions`` column.
     """
     # check input for iteration argument
     if not isinstance(iteration, int):
         raise Exception("Argument 'iteration' must be an integer.")
 
     # check input for positions argument
-    if not isinstance(positions, list) and positions is not None:
-        raise Exception("Argument 'positions' must be a list.")
+    if positions is not None:
+        position_sets = resolve_position_sets(positions, allowed_positions)
 
     # create list to store matches that are forbidden (HTTP 403)
     forbidden_matches = []
 
-    # check if the input positions are valid
-    if positions is not None:
-        invalid_positions = [position for position in positions if position not in allowed_positions]
-        if len(invalid_positions) > 0:
-            raise Exception(
-                f"Invalid position(s): {', '.join(invalid_positions)}."
-                f"\nChoose one or more of: {', '.join(allowed_positions)}"
-            )
-
     # get squads
     squads = connection.make_api_request_limited(
         url=f"{host}/v5/customerapi/iterations/{iteration}/squads",
@@ -89,10 +83,9 @@ def getPlayerIterationScoresFromHost(
     # get player scores
     if positions is None:
 
-        # create list to store dfs
-        scores_list = []
-        for squad_id in squad_ids:
-            scores = safe_execute(
+        # get scores of all squads concurrently, in squad order
+        scores_list = map_concurrent(
+            lambda squad_id: safe_execute(
                 fetch_player_iteration_scores,
                 connection,
                 url=f"{host}/v5/customerapi/iterations/{iteration}/squads/{squad_id}/player-scores",
@@ -101,37 +94,40 @@ def getPlayerIterationScoresFromHost(
             ).assign(
                 iterationId=iteration,
                 squadId=squad_id
-            )
+            ),
+            squad_ids,
+            connection
+        )
 
-            # check if response is empty
-            if len(scores) > 0:
-                scores_list.append(scores)
+        # drop empty responses
+        scores_list = [scores for scores in scores_list if len(scores) > 0]
         scores_raw = pd.concat(scores_list).reset_index(drop=True)
 
     else:
 
-        # compile position string
-        position_string = ",".join(positions)
+        # compile position strings
+        position_strings = [",".join(position_set) for position_set in position_sets]
 
-        # create list to store dfs
-        scores_list = []
-        for squad_id in squad_ids:
-            scores = safe_execute(
+        # get scores of all squads and position sets concurrently, in position set and squad order
+        scores_list = map_concurrent(
+            lambda task: safe_execute(
                 fetch_player_iteration_scores,
                 connection,
                 url=f"{host}/v5/customerapi/iterations/{iteration}/"
-                    f"squads/{squad_id}/positions/{position_string}/player-scores",
-                identifier=f"{squad_id}",
+                    f"squads/{task[1]}/positions/{task[0]}/player-scores",
+                identifier=f"{task[1]}",
                 forbidden_list=[]
             ).assign(
                 iterationId=iteration,
-                squadId=squad_id,
-                positions=position_string
-            )
+                squadId=task[1],
+                positions=task[0]
+            ),
+            [(position_string, squad_id) for position_string in position_strings for squad_id in squad_ids],
+            connection
+        )
 
-            # check if response is empty
-            if len(scores) > 0:
-                scores_list.append(scores)
+        # drop empty responses
+        scores_list = [scores for scores in scores_list if len(scores) > 0]
         scores_raw = pd.concat(scores_list).reset_index(drop=True)
 
     # raise exception if no player played at given positions in entire iteration
@@ -140,9 +136,11 @@ def getPlayerIterationScoresFromHost(
 
     # print squads without players at given position
     if positions is not None:
-        error_list = [str(squadId) for squadId in squad_ids if squadId not in scores_raw.squadId.to_list()]
-        if len(error_list) > 0:
-            print(f"No players played at positions {positions} for iteration {iteration} for following squads:\n\t{', '.join(error_list)}")
+        for position_set, position_string in zip(position_sets, position_strings):
+            position_squad_ids = scores_raw.squadId[scores_raw.positions == position_string].to_list()
+            error_list = [str(squadId) for squadId in squad_ids if squadId not in position_squad_ids]
+            if len(error_list) > 0:
+                print(f"No players played at positions {position_set} for iteration {iteration} for following squads:\n\t{', '.join(error_list)}")
 
     # get players
     players = connection.make_api_request_limited(
@@ -322,6 +320,12 @@ def getPlayerIterationScoresFromHost(
     # select columns
     averages = averages[order]
 
+    # order rows by position set
+    if positions is not None and len(position_sets) > 1:
+        averages = averages.sort_values(
+            "positions", key=lambda column: column.map({string: i for i, string in enumerate(position_strings)}), kind="stable"
+        ).reset_index(drop=True)
+
     # fix some column types
     averages["iterationId"] = averages["iterationId"].astype("Int64")
     averages["squadId"] = averages["squadId"].astype("Int64")
@@ -1,6 +1,8 @@
 # load packages
 import pandas as pd
-from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_df, ForbiddenError, safe_execute, resolve_matches
+from typing import Optional
+from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_df, ForbiddenError, safe_execute, \
+    resolve_matches, fetch_and_transform
 from .matches import getMatchesFromHost
 from .iterations import getIterationsFromHost
 
@@ -27,7 +29,8 @@ allowed_positions = [
 
 
 def getPlayerMatchScores(
-        matches: list, token: str, positions: list = None, session: ImpectSession = ImpectSession()
+        matches: list, token: str, positions: list = None, session: ImpectSession = ImpectSession(),
+        workers: Optional[int] = None, chunk_size: int = 10
 ) -> pd.DataFrame:
     """Return a DataFrame of per-player scores for the given list of match IDs."""
     # create an instance of RateLimitedAPI
@@ -36,14 +39,21 @@ def getPlayerMatchScores(
     # construct header with access token
     connection.session.headers.update({"Authorization": f"Bearer {token}"})
 
-    return getPlayerMatchScoresFromHost(matches, connection, "https://api.impect.com", positions)
+    return getPlayerMatchScoresFromHost(
+        matches, connection, "https://api.impect.com", positions, workers, chunk_size
+    )
 
-def getPlayerMatchScoresFromHost(matches: list, connection: RateLimitedAPI, host: str, positions: list = None) -> pd.DataFrame:
+def getPlayerMatchScoresFromHost(
+        matches: list, connection: RateLimitedAPI, host: str, positions: list = None,
+        workers: Optional[int] = None, chunk_size: int = 10
+) -> pd.DataFrame:
     """Fetch per-player scores for the given matches from the given host and return them as a DataFrame.
 
     When ``positions`` is provided, only scores for players who appeared at those positions are
     returned. Pivots raw score data, merges player demographics, squad names, coach names, and
-    competition metadata.
+    competition metadata. Matches are transformed in chunks of ``chunk_size`` on a background
+    thread or, if ``workers`` is greater than 1, in a pool of that many worker processes, while the
+    next matches are still being downloaded.
     """
     # check input for positions argument
     if not isinstance(positions, list) and positions is not None:
@@ -58,150 +68,263 @@ def getPlayerMatchScoresFromHost(matches: list, connection: RateLimitedAPI, host
                 f"\nChoose one or more of: {', '.join(allowed_positions)}"
             )
 
-    resolved = resolve_matches(matches, connection, host)
-    match_data = resolved.match_data
-    matches = resolved.matches
-    iterations = resolved.iterations
-    forbidden_matches = []
+    # record stages if instrumentation is enabled
+    with connection.stages("getPlayerMatchScores") as stages:
+        stages.stage("resolve matches")
 
-    # get player match sums
-    def fetch_player_match_scores(connection, url):
-        return connection.make_api_request_limited(
-            url=url,
-            method="GET"
-        ).process_response(endpoint="Player Match Scores")
+        resolved = resolve_matches(matches, connection, host)
+        match_data = resolved.match_data
+        matches = resolved.matches
+        iterations = resolved.iterations
+        forbidden_matches = []
 
-    # get player scores
-    if positions is None:
+        # get player match sums
+        def fetch_player_match_scores(connection, url):
+            return connection.make_api_request_limited(
+                url=url,
+                method="GET"
+            ).process_response(endpoint="Player Match Scores")
 
-        # create list to store dfs
-        scores_list = []
-        for match in matches:
+        # compile list of positions
+        if positions is None:
+            url_template = f"{host}/v5/customerapi/matches/{{}}/player-scores"
+        else:
+            position_string = ",".join(positions)
+            url_template = f"{host}/v5/customerapi/matches/{{}}/positions/{position_string}/player-scores"
+
+        # define function to download the player scores of a single match
+        def fetch_match(match):
             scores = safe_execute(
                 fetch_player_match_scores,
                 connection,
-                url=f"{host}/v5/customerapi/matches/{match}/player-scores",
+                url=url_template.format(match),
                 identifier=f"{match}",
                 forbidden_list=forbidden_matches
             ).assign(matchId=match)
-            scores_list.append(scores)
-        scores_raw = pd.concat(scores_list).reset_index(drop=True)
+            if positions is not None:
+                scores = scores.assign(positions=position_string)
+            return scores
+
+        # get players
+        stages.stage("fetch master data")
+        players_list = []
+        for iteration in iterations:
+            players = connection.make_api_request_limited(
+                url=f"{host}/v5/customerapi/iterations/{iteration}/players",
+                method="GET"
+            ).process_response(
+                endpoint="Players"
+            )[["id", "commonname", "firstname", "lastname", "birthdate", "birthplace", "leg", "countryIds", "idMappings"]]
+            players_list.append(players)
+        players = pd.concat(players_list).drop_duplicates("id").reset_index(drop=True)
+
+        # only keep first country id for each player
+        country_series = players["countryIds"].explode().groupby(level=0).first()
+        players["countryIds"] = players.index.to_series().map(country_series).astype("float").astype("Int64")
+        players = players.rename(columns={"countryIds": "countryId"})
+
+        # unnest mappings
+        players = unnest_mappings_df(players, "idMappings").drop(["idMappings"], axis=1).drop_duplicates()
+
+        # get squads
+        squads_list = []
+        for iteration in iterations:
+            squads = connection.make_api_request_limited(
+                url=f"{host}/v5/customerapi/iterations/{iteration}/squads",
+                method="GET"
+            ).process_response(
+                endpoint="Squads"
+            )[["id", "name"]]
+            squads_list.append(squads)
+        squads = pd.concat(squads_list).drop_duplicates()
+        squad_map = squads.set_index("id")["name"].to_dict()
+
+        # get coaches
+        coaches_blacklisted = False
+        coaches_list = []
+        for iteration in iterations:
+            try:
+                coaches = connection.make_api_request_limited(
+                    url=f"{host}/v5/customerapi/iterations/{iteration}/coaches",
+                    method="GET"
+                ).process_response(
+                    endpoint="Coaches",
+                    raise_exception=False
+                )[["id", "name"]]
+                coaches_list.append(coaches)
+            except KeyError:
+                # no coaches found, create empty df
+                coaches_list.append(pd.DataFrame(columns=["id", "name"]))
+            except ForbiddenError:
+                coaches_blacklisted = True
+        coaches = pd.concat(coaches_list).drop_duplicates()
+
+        # get player scores
+        scores = connection.make_api_request_limited(
+            url=f"{host}/v5/customerapi/player-scores",
+            method="GET"
+        ).process_response(
+            endpoint="Player Iteration Scores"
+        )[["id", "name"]]
 
-    else:
+        # get matches
+        matchplan_list = []
+        for iteration in iterations:
+            matchplan = getMatchesFromHost(
+                iteration=iteration,
+                connection=connection,
+                host=host
+            )
+            matchplan_list.append(matchplan)
+        matchplan = pd.concat(matchplan_list)
 
-        # compile list of positions
-        position_string = ",".join(positions)
+        # get iterations
+        iterations = getIterationsFromHost(connection=connection, host=host)
 
-        # create list to store dfs
-        scores_list = []
-        for match in matches:
-            scores = safe_execute(
-                fetch_player_match_scores,
-                connection,
-                url=f"{host}/v5/customerapi/matches/{match}/positions/{position_string}/player-scores",
-                identifier=f"{match}",
-                forbidden_list=forbidden_matches
-            ).assign(
-                matchId=match,
-                positions=position_string
-            )
-            scores_list.append(scores)
-        scores_raw = pd.concat(scores_list).reset_index(drop=True)
-
-    # get players
-    players_list = []
-    for iteration in iterations:
-        players = connection.make_api_request_limited(
-            url=f"{host}/v5/customerapi/iterations/{iteration}/players",
+        # get country data
+        countries = connection.make_api_request_limited(
+            url=f"{host}/v5/customerapi/countries",
             method="GET"
         ).process_response(
-            endpoint="Players"
-        )[["id", "commonname", "firstname", "lastname", "birthdate", "birthplace", "leg", "countryIds", "idMappings"]]
-        players_list.append(players)
-    players = pd.concat(players_list).drop_duplicates("id").reset_index(drop=True)
-
-    # only keep first country id for each player
-    country_series = players["countryIds"].explode().groupby(level=0).first()
-    players["countryIds"] = players.index.to_series().map(country_series).astype("float").astype("Int64")
-    players = players.rename(columns={"countryIds": "countryId"})
-
-    # unnest mappings
-    players = unnest_mappings_df(players, "idMappings").drop(["idMappings"], axis=1).drop_duplicates()
-
-    # get squads
-    squads_list = []
-    for iteration in iterations:
-        squads = connection.make_api_request_limited(
-            url=f"{host}/v5/customerapi/iterations/{iteration}/squads",
-            method="GET"
-        ).process_response(
-            endpoint="Squads"
-        )[["id", "name"]]
-        squads_list.append(squads)
-    squads = pd.concat(squads_list).drop_duplicates()
-    squad_map = squads.set_index("id")["name"].to_dict()
-
-    # get coaches
-    coaches_blacklisted = False
-    coaches_list = []
-    for iteration in iterations:
-        try:
-            coaches = connection.make_api_request_limited(
-                url=f"{host}/v5/customerapi/iterations/{iteration}/coaches",
-                method="GET"
-            ).process_response(
-                endpoint="Coaches",
-                raise_exception=False
-            )[["id", "name"]]
-            coaches_list.append(coaches)
-        except KeyError:
-            # no coaches found, create empty df
-            coaches_list.append(pd.DataFrame(columns=["id", "name"]))
-        except ForbiddenError:
-            coaches_blacklisted = True
-    coaches = pd.concat(coaches_list).drop_duplicates()
-
-    # get player scores
-    scores = connection.make_api_request_limited(
-        url=f"{host}/v5/customerapi/player-scores",
-        method="GET"
-    ).process_response(
-        endpoint="Player Iteration Scores"
-    )[["id", "name"]]
-
-    # get matches
-    matchplan_list = []
-    for iteration in iterations:
-        matchplan = getMatchesFromHost(
-            iteration=iteration,
-            connection=connection,
-            host=host
+            endpoint="Countries"
         )
-        matchplan_list.append(matchplan)
-    matchplan = pd.concat(matchplan_list)
-
-    # get iterations
-    iterations = getIterationsFromHost(connection=connection, host=host)
-
-    # get country data
-    countries = connection.make_api_request_limited(
-        url=f"{host}/v5/customerapi/countries",
-        method="GET"
-    ).process_response(
-        endpoint="Countries"
-    )
-    country_map = countries.set_index("id")["fifaName"].to_dict()
+        country_map = countries.set_index("id")["fifaName"].to_dict()
 
-    # create empty df to store player scores
-    player_scores = pd.DataFrame()
+        # download player scores and manipulate chunks of matches while the next matches are downloaded
+        stages.stage("fetch and transform matches")
+        player_scores = fetch_and_transform(
+            fetch_match, matches, transform_player_match_scores, scores, positions, workers=workers, chunk_size=chunk_size
+        )
+
+        # check if any records for any match at given position
+        if len(player_scores) == 0:
+                raise Exception("No players played at given positions for any given match. Execution stopped.")
+
+        # merge with other data
+        stages.stage("merge metadata")
+        player_scores["squadName"] = player_scores.squadId.map(squad_map)
+        player_scores = player_scores.merge(
+            matchplan[["id", "scheduledDate", "matchDayIndex", "matchDayName", "iterationId"]],
+            left_on="matchId",
+            right_on="id",
+            how="left",
+            suffixes=("", "_matchplan")
+        ).merge(
+            pd.concat([
+                match_data[["id","squadHomeId", "squadHomeCoachId"]].rename(columns={"squadHomeId": "squadId", "squadHomeCoachId": "coachId"}),
+                match_data[["id","squadAwayId", "squadAwayCoachId"]].rename(columns={"squadAwayId": "squadId", "squadAwayCoachId": "coachId"})
+            ], ignore_index=True),
+            left_on=["matchId", "squadId"],
+            right_on=["id", "squadId"],
+            how="left",
+            suffixes=("", "_matchData")
+        ).merge(
+            iterations[["id", "competitionId", "competitionName", "competitionType", "season"]],
+            left_on="iterationId",
+            right_on="id",
+            how="left",
+            suffixes=("", "_iterations")
+        ).merge(
+            players[[
+                "id", "wyscoutId", "heimSpielId", "skillCornerId", "optaId", "statsPerformId", "transfermarktId", "soccerdonnaId", "commonname",
+                "firstname", "lastname", "birthdate", "birthplace", "countryId", "leg"
+            ]].rename(
+                columns={"commonname": "playerName"}
+            ),
+            left_on="id",
+            right_on="id",
+            how="left",
+            suffixes=("", "_players")
+        )
+        player_scores["playerCountry"] = player_scores.countryId.map(country_map)
+
+        if not coaches_blacklisted:
+
+            # create coaches map
+            coaches_map = coaches.set_index("id")["name"].to_dict()
+
+            # convert coachId to integer if it is None
+            player_scores["coachId"] = player_scores["coachId"].astype("Int64")
+            player_scores["coachName"] = player_scores.coachId.map(coaches_map)
+
+        # rename some columns
+        player_scores = player_scores.rename(columns={
+            "scheduledDate": "dateTime",
+            "id": "playerId"
+        })
+
+        # define column order
+        order = [
+            "matchId",
+            "dateTime",
+            "competitionName",
+            "competitionId",
+            "competitionType",
+            "iterationId",
+            "season",
+            "matchDayIndex",
+            "matchDayName",
+            "squadId",
+            "squadName",
+            "coachId",
+            "coachName",
+            "playerId",
+            "wyscoutId",
+            "heimSpielId",
+            "skillCornerId",
+            "optaId",
+            "statsPerformId",
+            "transfermarktId",
+            "soccerdonnaId",
+            "playerName",
+            "firstname",
+            "lastname",
+            "birthdate",
+            "birthplace",
+            "playerCountry",
+            "leg",
+            "positions" if positions is not None else "position",
+            "matchShare",
+            "playDuration",
+        ]
+
+        # add kpiNames to order
+        order += scores["name"].to_list()
+
+        # check if coaches are blacklisted
+        if coaches_blacklisted:
+            order = [col for col in order if col not in ["coachId", "coachName"]]
+
+        # select columns
+        player_scores = player_scores[order]
+
+        # fix some column types
+        player_scores["matchId"] = player_scores["matchId"].astype("Int64")
+        player_scores["squadId"] = player_scores["squadId"].astype("Int64")
+        player_scores["playerId"] = player_scores["playerId"].astype("Int64")
+        player_scores["wyscoutId"] = player_scores["wyscoutId"].astype("Int64")
+        player_scores["heimSpielId"] = player_scores["heimSpielId"].astype("Int64")
+        player_scores["skillCornerId"] = player_scores["skillCornerId"].astype("Int64")
+        player_scores["optaId"] = player_scores["optaId"].astype("string")
+        player_scores["statsPerformId"] = player_scores["statsPerformId"].astype("string")
+        player_scores["transfermarktId"] = player_scores["transfermarktId"].astype("string")
+        player_scores["soccerdonnaId"] = player_scores["soccerdonnaId"].astype("string")
+
+    # return data
+    return player_scores
 
-    # manipulate player_scores
+
+# define function to unnest and pivot raw player match scores
+def transform_player_match_scores(scores_raw: pd.DataFrame, scores: pd.DataFrame, positions: list = None) -> pd.DataFrame:
+    """Unnest and pivot raw player match scores to one row per match, squad, player and position(s)."""
+    # create list to store dfs
+    player_scores_list = []
 
     # iterate over matches
     for i in range(len(scores_raw)):
 
-        # create empty df to store per match scores
-        match_player_scores = pd.DataFrame()
+        # create list to store per match scores
+        match_player_scores_list = []
 
         # iterate over sides
         for side in ["squadHomePlayers", "squadAwayPlayers"]:
@@ -232,7 +355,7 @@ def getPlayerMatchScoresFromHost(matches: list, connection: RateLimitedAPI, host
 
                 # extract matchshares
                 matchshares = temp[["matchId", "squadId", "id", "matchShare", "playDuration"]].drop_duplicates().assign(
-                    positions=position_string
+                    positions=scores_raw.positions.loc[i]
                 )
 
             # explode kpis column
@@ -297,127 +420,17 @@ def getPlayerMatchScoresFromHost(matches: list, connection: RateLimitedAPI, host
                 )
 
             # append to match_player_scores
-            match_player_scores = pd.concat([match_player_scores, temp])
+            match_player_scores_list.append(temp)
 
         # check if any records for match at given position
-        if len(match_player_scores) == 0:
+        if len(match_player_scores_list) == 0:
             print(f"No players played at given position in match {scores_raw.loc[i].matchId}")
+            continue
 
         # append to player_scores
-        player_scores = pd.concat([player_scores, match_player_scores])
-
-    # check if any records for any match at given position
-    if len(player_scores) == 0:
-            raise Exception("No players played at given positions for any given match. Execution stopped.")
-
-    # merge with other data
-    player_scores["squadName"] = player_scores.squadId.map(squad_map)
-    player_scores = player_scores.merge(
-        matchplan[["id", "scheduledDate", "matchDayIndex", "matchDayName", "iterationId"]],
-        left_on="matchId",
-        right_on="id",
-        how="left",
-        suffixes=("", "_matchplan")
-    ).merge(
-        pd.concat([
-            match_data[["id","squadHomeId", "squadHomeCoachId"]].rename(columns={"squadHomeId": "squadId", "squadHomeCoachId": "coachId"}),
-            match_data[["id","squadAwayId", "squadAwayCoachId"]].rename(columns={"squadAwayId": "squadId", "squadAwayCoachId": "coachId"})
-        ], ignore_index=True),
-        left_on=["matchId", "squadId"],
-        right_on=["id", "squadId"],
-        how="left",
-        suffixes=("", "_matchData")
-    ).merge(
-        iterations[["id", "competitionId", "competitionName", "competitionType", "season"]],
-        left_on="iterationId",
-        right_on="id",
-        how="left",
-        suffixes=("", "_iterations")
-    ).merge(
-        players[[
-            "id", "wyscoutId", "heimSpielId", "skillCornerId", "optaId", "statsPerformId", "transfermarktId", "soccerdonnaId", "commonname",
-            "firstname", "lastname", "birthdate", "birthplace", "countryId", "leg"
-        ]].rename(
-            columns={"commonname": "playerName"}
-        ),
-        left_on="id",
-        right_on="id",
-        how="left",
-        suffixes=("", "_players")
-    )
-    player_scores["playerCountry"] = player_scores.countryId.map(country_map)
-
-    if not coaches_blacklisted:
-
-        # create coaches map
-        coaches_map = coaches.set_index("id")["name"].to_dict()
-
-        # convert coachId to integer if it is None
-        player_scores["coachId"] = player_scores["coachId"].astype("Int64")
-        player_scores["coachName"] = player_scores.coachId.map(coaches_map)
-
-    # rename some columns
-    player_scores = player_scores.rename(columns={
-        "scheduledDate": "dateTime",
-        "id": "playerId"
-    })
-
-    # define column order
-    order = [
-        "matchId",
-        "dateTime",
-        "competitionName",
-        "competitionId",
-        "competitionType",
-        "iterationId",
-        "season",
-        "matchDayIndex",
-        "matchDayName",
-        "squadId",
-        "squadName",
-        "coachId",
-        "coachName",
-        "playerId",
-        "wyscoutId",
-        "heimSpielId",
-        "skillCornerId",
-        "optaId",
-        "statsPerformId",
-        "transfermarktId",
-        "soccerdonnaId",
-        "playerName",
-        "firstname",
-        "lastname",
-        "birthdate",
-        "birthplace",
-        "playerCountry",
-        "leg",
-        "positions" if positions is not None else "position",
-        "matchShare",
-        "playDuration",
-    ]
-
-    # add kpiNames to order
-    order += scores["name"].to_list()
-
-    # check if coaches are blacklisted
-    if coaches_blacklisted:
-        order = [col for col in order if col not in ["coachId", "coachName"]]
-
-    # select columns
-    player_scores = player_scores[order]
-
-    # fix some column types
-    player_scores["matchId"] = player_scores["matchId"].astype("Int64")
-    player_scores["squadId"] = player_scores["squadId"].astype("Int64")
-    player_scores["playerId"] = player_scores["playerId"].astype("Int64")
-    player_scores["wyscoutId"] = player_scores["wyscoutId"].astype("Int64")
-    player_scores["heimSpielId"] = player_scores["heimSpielId"].astype("Int64")
-    player_scores["skillCornerId"] = player_scores["skillCornerId"].astype("Int64")
-    player_scores["optaId"] = player_scores["optaId"].astype("string")
-    player_scores["statsPerformId"] = player_scores["statsPerformId"].astype("string")
-    player_scores["transfermarktId"] = player_scores["transfermarktId"].astype("string")
-    player_scores["soccerdonnaId"] = player_scores["soccerdonnaId"].astype("string")
+        player_scores_list += match_player_scores_list
 
-    # return data
-    return player_scores
\ No newline at end of file
+    # concatenate player scores
+    if len(player_scores_list) == 0:
+        return pd.DataFrame()
+    return pd.concat(player_scores_list)
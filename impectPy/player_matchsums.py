@@ -1,6 +1,9 @@
 # load packages
 import pandas as pd
-from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_df, ForbiddenError, safe_execute, resolve_matches
+from typing import Optional
+from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_df, ForbiddenError, safe_execute, \
+    resolve_matches, fetch_and_transform
+from .backends import check_backend, pivot_player_matchsums_polars
 from .matches import getMatchesFromHost
 from .iterations import getIterationsFromHost
 
@@ -12,7 +15,10 @@ from .iterations import getIterationsFromHost
 ######
 
 
-def getPlayerMatchsums(matches: list, token: str, session: ImpectSession = ImpectSession()) -> pd.DataFrame:
+def getPlayerMatchsums(
+        matches: list, token: str, session: ImpectSession = ImpectSession(), backend: str = "pandas",
+        workers: Optional[int] = None, chunk_size: int = 10
+) -> pd.DataFrame:
     """Return a DataFrame of per-player KPI sums for the given list of match IDs."""
     # create an instance of RateLimitedAPI
     connection = RateLimitedAPI(session)
@@ -20,128 +26,274 @@ def getPlayerMatchsums(matches: list, token: str, session: ImpectSession = Impec
     # construct header with access token
     connection.session.headers.update({"Authorization": f"Bearer {token}"})
 
-    return getPlayerMatchsumsFromHost(matches, connection, "https://api.impect.com")
+    return getPlayerMatchsumsFromHost(
+        matches, connection, "https://api.impect.com", backend, workers, chunk_size
+    )
 
-def getPlayerMatchsumsFromHost(matches: list, connection: RateLimitedAPI, host: str) -> pd.DataFrame:
+def getPlayerMatchsumsFromHost(
+        matches: list, connection: RateLimitedAPI, host: str, backend: str = "pandas",
+        workers: Optional[int] = None, chunk_size: int = 10
+) -> pd.DataFrame:
     """Fetch per-player KPI sums for the given matches from the given host and return them as a DataFrame.
 
     Pivots raw KPI data per player and position, merges player demographics, squad names, coach
-    names, and competition metadata, and returns one row per player, position, and match.
+    names, and competition metadata, and returns one row per player, position, and match. With
+    ``backend="polars"`` the KPI pivot of all matches runs in a single multi-threaded polars query.
+    Otherwise, matches are transformed in chunks of ``chunk_size`` on a background thread or, if
+    ``workers`` is greater than 1, in a pool of that many worker processes, while the next matches
+    are still being downloaded.
     """
-    resolved = resolve_matches(matches, connection, host)
-    match_data = resolved.match_data
-    matches = resolved.matches
-    iterations = resolved.iterations
-    forbidden_matches = []
-
-    # get player match sums
-    def fetch_player_match_sums(connection, url):
-        return connection.make_api_request_limited(
-            url=url,
-            method="GET"
-        ).process_response(endpoint="Player Match Sums")
-
-    # create list to store dfs
-    matchsums_list = []
-    for match in matches:
-        matchsums = safe_execute(
-            fetch_player_match_sums,
-            connection,
-            url=f"{host}/v5/customerapi/matches/{match}/player-kpis",
-            identifier=f"{match}",
-            forbidden_list=forbidden_matches
-        ).assign(matchId=match)
-        matchsums_list.append(matchsums)
-    matchsums_raw = pd.concat(matchsums_list).reset_index(drop=True)
-
-    # get players
-    players_list = []
-    for iteration in iterations:
-        players = connection.make_api_request_limited(
-            url=f"{host}/v5/customerapi/iterations/{iteration}/players",
+    # check input for backend argument
+    check_backend(backend)
+
+    # record stages if instrumentation is enabled
+    with connection.stages("getPlayerMatchsums") as stages:
+        stages.stage("resolve matches")
+
+        resolved = resolve_matches(matches, connection, host)
+        match_data = resolved.match_data
+        matches = resolved.matches
+        iterations = resolved.iterations
+        forbidden_matches = []
+
+        # get player match sums
+        def fetch_player_match_sums(connection, url):
+            return connection.make_api_request_limited(
+                url=url,
+                method="GET"
+            ).process_response(endpoint="Player Match Sums")
+
+        # define function to download the player match sums of a single match
+        def fetch_match(match):
+            return safe_execute(
+                fetch_player_match_sums,
+                connection,
+                url=f"{host}/v5/customerapi/matches/{match}/player-kpis",
+                identifier=f"{match}",
+                forbidden_list=forbidden_matches
+            ).assign(matchId=match)
+
+        # get players
+        stages.stage("fetch master data")
+        players_list = []
+        for iteration in iterations:
+            players = connection.make_api_request_limited(
+                url=f"{host}/v5/customerapi/iterations/{iteration}/players",
+                method="GET"
+            ).process_response(
+                endpoint="Players"
+            )[["id", "commonname", "firstname", "lastname", "birthdate", "birthplace", "leg", "countryIds", "idMappings"]]
+            players_list.append(players)
+        players = pd.concat(players_list).drop_duplicates("id").reset_index(drop=True)
+
+        # only keep first country id for each player
+        country_series = players["countryIds"].explode().groupby(level=0).first()
+        players["countryIds"] = players.index.to_series().map(country_series).astype("float").astype("Int64")
+        players = players.rename(columns={"countryIds": "countryId"})
+
+        # unnest mappings
+        players = unnest_mappings_df(players, "idMappings").drop(["idMappings"], axis=1).drop_duplicates()
+
+        # get squads
+        squads_list = []
+        for iteration in iterations:
+            squads = connection.make_api_request_limited(
+                url=f"{host}/v5/customerapi/iterations/{iteration}/squads",
+                method="GET"
+            ).process_response(
+                endpoint="Squads"
+            )[["id", "name"]]
+            squads_list.append(squads)
+        squads = pd.concat(squads_list).drop_duplicates()
+        squad_map = squads.set_index("id")["name"].to_dict()
+
+        # get coaches
+        coaches_blacklisted = False
+        coaches_list = []
+        for iteration in iterations:
+            try:
+                coaches = connection.make_api_request_limited(
+                    url=f"{host}/v5/customerapi/iterations/{iteration}/coaches",
+                    method="GET"
+                ).process_response(
+                    endpoint="Coaches",
+                    raise_exception=False
+                )[["id", "name"]]
+                coaches_list.append(coaches)
+            except KeyError:
+                # no coaches found, create empty df
+                coaches_list.append(pd.DataFrame(columns=["id", "name"]))
+            except ForbiddenError:
+                coaches_blacklisted = True
+        coaches = pd.concat(coaches_list).drop_duplicates()
+
+        # get kpis
+        kpis = connection.make_api_request_limited(
+            url=f"{host}/v5/customerapi/kpis",
             method="GET"
         ).process_response(
-            endpoint="Players"
-        )[["id", "commonname", "firstname", "lastname", "birthdate", "birthplace", "leg", "countryIds", "idMappings"]]
-        players_list.append(players)
-    players = pd.concat(players_list).drop_duplicates("id").reset_index(drop=True)
-
-    # only keep first country id for each player
-    country_series = players["countryIds"].explode().groupby(level=0).first()
-    players["countryIds"] = players.index.to_series().map(country_series).astype("float").astype("Int64")
-    players = players.rename(columns={"countryIds": "countryId"})
-
-    # unnest mappings
-    players = unnest_mappings_df(players, "idMappings").drop(["idMappings"], axis=1).drop_duplicates()
-
-    # get squads
-    squads_list = []
-    for iteration in iterations:
-        squads = connection.make_api_request_limited(
-            url=f"{host}/v5/customerapi/iterations/{iteration}/squads",
+            endpoint="KPIs"
+        )[["id", "name"]]
+
+        # get matches
+        matchplan_list = []
+        for iteration in iterations:
+            matchplan = getMatchesFromHost(
+                iteration=iteration,
+                connection=connection,
+                host=host
+            )
+            matchplan_list.append(matchplan)
+        matchplan = pd.concat(matchplan_list)
+
+        # get iterations
+        iterations = getIterationsFromHost(connection=connection, host=host)
+
+        # get country data
+        countries = connection.make_api_request_limited(
+            url=f"{host}/v5/customerapi/countries",
             method="GET"
         ).process_response(
-            endpoint="Squads"
-        )[["id", "name"]]
-        squads_list.append(squads)
-    squads = pd.concat(squads_list).drop_duplicates()
-    squad_map = squads.set_index("id")["name"].to_dict()
-
-    # get coaches
-    coaches_blacklisted = False
-    coaches_list = []
-    for iteration in iterations:
-        try:
-            coaches = connection.make_api_request_limited(
-                url=f"{host}/v5/customerapi/iterations/{iteration}/coaches",
-                method="GET"
-            ).process_response(
-                endpoint="Coaches",
-                raise_exception=False
-            )[["id", "name"]]
-            coaches_list.append(coaches)
-        except KeyError:
-            # no coaches found, create empty df
-            coaches_list.append(pd.DataFrame(columns=["id", "name"]))
-        except ForbiddenError:
-            coaches_blacklisted = True
-    coaches = pd.concat(coaches_list).drop_duplicates()
-
-    # get kpis
-    kpis = connection.make_api_request_limited(
-        url=f"{host}/v5/customerapi/kpis",
-        method="GET"
-    ).process_response(
-        endpoint="KPIs"
-    )[["id", "name"]]
-
-    # get matches
-    matchplan_list = []
-    for iteration in iterations:
-        matchplan = getMatchesFromHost(
-            iteration=iteration,
-            connection=connection,
-            host=host
+            endpoint="Countries"
         )
-        matchplan_list.append(matchplan)
-    matchplan = pd.concat(matchplan_list)
-
-    # get iterations
-    iterations = getIterationsFromHost(connection=connection, host=host)
-
-    # get country data
-    countries = connection.make_api_request_limited(
-        url=f"{host}/v5/customerapi/countries",
-        method="GET"
-    ).process_response(
-        endpoint="Countries"
-    )
-    country_map = countries.set_index("id")["fifaName"].to_dict()
+        country_map = countries.set_index("id")["fifaName"].to_dict()
+
+        # download and manipulate matchsums
+        stages.stage("fetch and transform matches")
+        if backend == "polars":
+
+            # download all matches
+            matchsums_raw = pd.concat([fetch_match(match) for match in matches]).reset_index(drop=True)
 
-    # create empty df to store matchsums
-    matchsums = pd.DataFrame()
+            # unnest and pivot all matches at once
+            matchsums = pivot_player_matchsums_polars(matchsums_raw, kpis)
 
-    # manipulate matchsums
+        else:
+
+            # unnest and pivot chunks of matches while the next matches are downloaded
+            matchsums = fetch_and_transform(
+                fetch_match, matches, transform_player_matchsums, kpis, workers=workers, chunk_size=chunk_size
+            )
+
+        # merge with other data
+        stages.stage("merge metadata")
+        matchsums["squadName"] = matchsums.squadId.map(squad_map)
+        matchsums = matchsums.merge(
+            matchplan[["id", "scheduledDate", "matchDayIndex", "matchDayName", "iterationId"]],
+            left_on="matchId",
+            right_on="id",
+            how="left",
+            suffixes=("", "_matchplan")
+        ).merge(
+            pd.concat([
+                match_data[["id","squadHomeId", "squadHomeCoachId"]].rename(columns={"squadHomeId": "squadId", "squadHomeCoachId": "coachId"}),
+                match_data[["id","squadAwayId", "squadAwayCoachId"]].rename(columns={"squadAwayId": "squadId", "squadAwayCoachId": "coachId"})
+            ], ignore_index=True),
+            left_on=["matchId", "squadId"],
+            right_on=["id", "squadId"],
+            how="left",
+            suffixes=("", "_matchData")
+        ).merge(
+            iterations[["id", "competitionId", "competitionName", "competitionType", "season"]],
+            left_on="iterationId",
+            right_on="id",
+            how="left",
+            suffixes=("", "_iterations")
+        ).merge(
+            players[[
+                "id", "wyscoutId", "heimSpielId", "skillCornerId", "optaId", "statsPerformId", "transfermarktId", "soccerdonnaId", "commonname",
+                "firstname", "lastname", "birthdate", "birthplace", "countryId", "leg"
+            ]].rename(
+                columns={"commonname": "playerName"}
+            ),
+            left_on="id",
+            right_on="id",
+            how="left",
+            suffixes=("", "_players")
+        )
+        matchsums["playerCountry"] = matchsums.countryId.map(country_map)
+
+        if not coaches_blacklisted:
+
+            # create coaches map
+            coaches_map = coaches.set_index("id")["name"].to_dict()
+
+            # convert coachId to integer if it is None
+            matchsums["coachId"] = matchsums["coachId"].astype("Int64")
+            matchsums["coachName"] = matchsums.coachId.map(coaches_map)
+
+        # rename some columns
+        matchsums = matchsums.rename(columns={
+            "scheduledDate": "dateTime",
+            "id": "playerId"
+        })
+
+        # define column order
+        order = [
+            "matchId",
+            "dateTime",
+            "competitionName",
+            "competitionId",
+            "competitionType",
+            "iterationId",
+            "season",
+            "matchDayIndex",
+            "matchDayName",
+            "squadId",
+            "squadName",
+            "coachId",
+            "coachName",
+            "playerId",
+            "wyscoutId",
+            "heimSpielId",
+            "skillCornerId",
+            "optaId",
+            "statsPerformId",
+            "transfermarktId",
+            "soccerdonnaId",
+            "playerName",
+            "firstname",
+            "lastname",
+            "birthdate",
+            "birthplace",
+            "playerCountry",
+            "leg",
+            "position",
+            "matchShare",
+            "playDuration"
+        ]
+
+        # add kpiNames to order
+        order += kpis['name'].to_list()
+
+        # check if coaches are blacklisted
+        if coaches_blacklisted:
+            order = [col for col in order if col not in ["coachId", "coachName"]]
+
+        # select columns
+        matchsums = matchsums[order]
+
+        # fix some column types
+        matchsums["matchId"] = matchsums["matchId"].astype("Int64")
+        matchsums["squadId"] = matchsums["squadId"].astype("Int64")
+        matchsums["playerId"] = matchsums["playerId"].astype("Int64")
+        matchsums["wyscoutId"] = matchsums["wyscoutId"].astype("Int64")
+        matchsums["heimSpielId"] = matchsums["heimSpielId"].astype("Int64")
+        matchsums["skillCornerId"] = matchsums["skillCornerId"].astype("Int64")
+        matchsums["optaId"] = matchsums["optaId"].astype("string")
+        matchsums["statsPerformId"] = matchsums["statsPerformId"].astype("string")
+        matchsums["transfermarktId"] = matchsums["transfermarktId"].astype("string")
+        matchsums["soccerdonnaId"] = matchsums["soccerdonnaId"].astype("string")
+
+    # return data
+    return matchsums
+
+
+# define function to unnest and pivot raw player match sums
+def transform_player_matchsums(matchsums_raw: pd.DataFrame, kpis: pd.DataFrame) -> pd.DataFrame:
+    """Unnest and pivot raw player match sums to one row per match, squad, player and position."""
+    # create list to store dfs
+    matchsums_list = []
 
     # iterate over matches
     for i in range(len(matchsums_raw)):
@@ -201,116 +353,9 @@ def getPlayerMatchsumsFromHost(matches: list, connection: RateLimitedAPI, host:
             )
 
             # append to matchsums
-            matchsums = pd.concat([matchsums, temp])
-
-    # merge with other data
-    matchsums["squadName"] = matchsums.squadId.map(squad_map)
-    matchsums = matchsums.merge(
-        matchplan[["id", "scheduledDate", "matchDayIndex", "matchDayName", "iterationId"]],
-        left_on="matchId",
-        right_on="id",
-        how="left",
-        suffixes=("", "_matchplan")
-    ).merge(
-        pd.concat([
-            match_data[["id","squadHomeId", "squadHomeCoachId"]].rename(columns={"squadHomeId": "squadId", "squadHomeCoachId": "coachId"}),
-            match_data[["id","squadAwayId", "squadAwayCoachId"]].rename(columns={"squadAwayId": "squadId", "squadAwayCoachId": "coachId"})
-        ], ignore_index=True),
-        left_on=["matchId", "squadId"],
-        right_on=["id", "squadId"],
-        how="left",
-        suffixes=("", "_matchData")
-    ).merge(
-        iterations[["id", "competitionId", "competitionName", "competitionType", "season"]],
-        left_on="iterationId",
-        right_on="id",
-        how="left",
-        suffixes=("", "_iterations")
-    ).merge(
-        players[[
-            "id", "wyscoutId", "heimSpielId", "skillCornerId", "optaId", "statsPerformId", "transfermarktId", "soccerdonnaId", "commonname",
-            "firstname", "lastname", "birthdate", "birthplace", "countryId", "leg"
-        ]].rename(
-            columns={"commonname": "playerName"}
-        ),
-        left_on="id",
-        right_on="id",
-        how="left",
-        suffixes=("", "_players")
-    )
-    matchsums["playerCountry"] = matchsums.countryId.map(country_map)
-
-    if not coaches_blacklisted:
-
-        # create coaches map
-        coaches_map = coaches.set_index("id")["name"].to_dict()
-
-        # convert coachId to integer if it is None
-        matchsums["coachId"] = matchsums["coachId"].astype("Int64")
-        matchsums["coachName"] = matchsums.coachId.map(coaches_map)
-
-    # rename some columns
-    matchsums = matchsums.rename(columns={
-        "scheduledDate": "dateTime",
-        "id": "playerId"
-    })
-
-    # define column order
-    order = [
-        "matchId",
-        "dateTime",
-        "competitionName",
-        "competitionId",
-        "competitionType",
-        "iterationId",
-        "season",
-        "matchDayIndex",
-        "matchDayName",
-        "squadId",
-        "squadName",
-        "coachId",
-        "coachName",
-        "playerId",
-        "wyscoutId",
-        "heimSpielId",
-        "skillCornerId",
-        "optaId",
-        "statsPerformId",
-        "transfermarktId",
-        "soccerdonnaId",
-        "playerName",
-        "firstname",
-        "lastname",
-        "birthdate",
-        "birthplace",
-        "playerCountry",
-        "leg",
-        "position",
-        "matchShare",
-        "playDuration"
-    ]
-
-    # add kpiNames to order
-    order += kpis['name'].to_list()
-
-    # check if coaches are blacklisted
-    if coaches_blacklisted:
-        order = [col for col in order if col not in ["coachId", "coachName"]]
-
-    # select columns
-    matchsums = matchsums[order]
-
-    # fix some column types
-    matchsums["matchId"] = matchsums["matchId"].astype("Int64")
-    matchsums["squadId"] = matchsums["squadId"].astype("Int64")
-    matchsums["playerId"] = matchsums["playerId"].astype("Int64")
-    matchsums["wyscoutId"] = matchsums["wyscoutId"].astype("Int64")
-    matchsums["heimSpielId"] = matchsums["heimSpielId"].astype("Int64")
-    matchsums["skillCornerId"] = matchsums["skillCornerId"].astype("Int64")
-    matchsums["optaId"] = matchsums["optaId"].astype("string")
-    matchsums["statsPerformId"] = matchsums["statsPerformId"].astype("string")
-    matchsums["transfermarktId"] = matchsums["transfermarktId"].astype("string")
-    matchsums["soccerdonnaId"] = matchsums["soccerdonnaId"].astype("string")
+            matchsums_list.append(temp)
 
-    # return data
-    return matchsums
\ No newline at end of file
+    # concatenate matchsums
+    if len(matchsums_list) == 0:
+        return pd.DataFrame()
+    return pd.concat(matchsums_list)
@@ -1,7 +1,7 @@
 # load packages
 import pandas as pd
 import warnings
-from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_df, ForbiddenError, safe_execute
+from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_df, ForbiddenError, safe_execute, map_concurrent, resolve_position_sets
 from .iterations import getIterationsFromHost
 
 # define the allowed positions
@@ -29,7 +29,7 @@ allowed_positions = [
 def getPlayerProfileScores(
         iteration: int, positions: list, token: str, session: ImpectSession = ImpectSession()
 ) -> pd.DataFrame:
-    """Return a DataFrame of per-player profile scores for the given iteration and positions."""
+    """Return a DataFrame of per-player profile scores for the given iteration and positions or list of position sets."""
     # create an instance of RateLimitedAPI
     connection = RateLimitedAPI(session)
 
@@ -45,23 +45,16 @@ def getPlayerProfileScoresFromHost(
 
     Iterates over all accessible squads, pivots profile score data, and merges player
     demographics and competition metadata. Only players who appeared at the given positions
-    are included.
+    are included. ``positions`` may also be a list of position lists: squads, players and metadata
+    are then fetched once, all squad and position set combinations are requested concurrently and
+    the scores are returned as one frame keyed by the ``positions`` column.
     """
     # check input for iteration argument
     if not isinstance(iteration, int):
         raise Exception("Argument 'iteration' must be an integer.")
 
     # check input for positions argument
-    if not isinstance(positions, list):
-        raise Exception("Argument 'positions' must be a list.")
-
-    # check if the input positions are valid
-    invalid_positions = [position for position in positions if position not in allowed_positions]
-    if len(invalid_positions) > 0:
-        raise Exception(
-            f"Invalid position(s): {', '.join(invalid_positions)}."
-            f"\nChoose one or more of: {', '.join(allowed_positions)}"
-        )
+    position_sets = resolve_position_sets(positions, allowed_positions)
 
     # get squads
     squads = connection.make_api_request_limited(
@@ -74,11 +67,8 @@ def getPlayerProfileScoresFromHost(
     # get squadIds
     squad_ids = squads[squads.access].id.to_list()
 
-    # compile position string
-    position_string = ",".join(positions)
-
-    # create empty df to store averages
-    profile_scores_list = []
+    # compile position strings
+    position_strings = [",".join(position_set) for position_set in position_sets]
 
     # get player profile scores per squad
     def fetch_player_profile_scores(connection, url):
@@ -87,21 +77,23 @@ def getPlayerProfileScoresFromHost(
             method="GET"
         ).process_response(endpoint="Player Profile Scores")
 
-    # create list to store dfs
-    for squad_id in squad_ids:
-        profile_scores = safe_execute(
+    # get player profile scores of all squads and position sets concurrently, in position set and squad order
+    profile_scores_list = map_concurrent(
+        lambda task: safe_execute(
             fetch_player_profile_scores,
             connection,
             url=f"{host}/v5/customerapi/iterations/{iteration}/"
-                f"squads/{squad_id}/positions/{position_string}/player-profile-scores",
-            identifier=f"{squad_id}",
+                f"squads/{task[1]}/positions/{task[0]}/player-profile-scores",
+            identifier=f"{task[1]}",
             forbidden_list=[]
         ).assign(
             iterationId=iteration,
-            squadId=squad_id,
-            positions=position_string
-        )
-        profile_scores_list.append(profile_scores)
+            squadId=task[1],
+            positions=task[0]
+        ),
+        [(position_string, squad_id) for position_string in position_strings for squad_id in squad_ids],
+        connection
+    )
     profile_scores_raw = pd.concat(profile_scores_list).reset_index(drop=True)
 
     # raise exception if no player played at given positions in entire iteration
@@ -109,9 +101,11 @@ def getPlayerProfileScoresFromHost(
         raise Exception(f"No players played at given position in iteration {iteration}.")
 
     # print squads without players at given position
-    error_list = [str(squadId) for squadId in squad_ids if squadId not in profile_scores_raw.squadId.to_list()]
-    if len(error_list) > 0:
-        print(f"No players played at positions {positions} for iteration {iteration} for following squads:\n\t{', '.join(error_list)}")
+    for position_set, position_string in zip(position_sets, position_strings):
+        position_squad_ids = profile_scores_raw.squadId[profile_scores_raw.positions == position_string].to_list()
+        error_list = [str(squadId) for squadId in squad_ids if squadId not in position_squad_ids]
+        if len(error_list) > 0:
+            print(f"No players played at positions {position_set} for iteration {iteration} for following squads:\n\t{', '.join(error_list)}")
 
     # get players
     players = connection.make_api_request_limited(
@@ -275,5 +269,11 @@ def getPlayerProfileScoresFromHost(
     # select columns
     profile_scores = profile_scores[order]
 
+    # order rows by position set
+    if len(position_sets) > 1:
+        profile_scores = profile_scores.sort_values(
+            "positions", key=lambda column: column.map({string: i for i, string in enumerate(position_strings)}), kind="stable"
+        ).reset_index(drop=True)
+
     # return result
     return profile_scores
\ No newline at end of file
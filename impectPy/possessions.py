@@ -0,0 +1,156 @@
+# load packages
+import numpy as np
+import pandas as pd
+
+######
+#
+# These functions derive player sequences, game states, possessions and phases
+# from events that are ordered by match and event number
+#
+######
+
+
+# define derived columns
+possession_cols = [
+    "playerSequenceId",
+    "possessionId",
+    "phaseId",
+    "teamGoals",
+    "opponentGoals",
+    "gameState",
+    "leadsToShot",
+    "leadsToGoal"
+]
+
+
+def match_cumsum(match_ids: pd.Series, values: np.ndarray) -> np.ndarray:
+    """Return the cumulative sum of non-negative ``values`` that restarts with every new match."""
+    # get cumulative sum of all rows
+    totals = np.cumsum(values)
+
+    # subtract the total before the first row of each match, which is carried forward as running maximum
+    new_match = match_ids.ne(match_ids.shift()).to_numpy(dtype=bool, na_value=True)
+    return totals - np.maximum.accumulate(np.where(new_match, totals - values, 0))
+
+
+def group_starts(events: pd.DataFrame, columns: list) -> np.ndarray:
+    """Return a flag for the first event of each run of consecutive events with equal ``columns`` within a match.
+
+    Missing values never equal the previous value, so every event with a missing value starts a new run.
+    """
+    # flag first event of each match
+    starts = events["matchId"].ne(events["matchId"].shift()).to_numpy(dtype=bool, na_value=True)
+
+    # flag changes of any column compared to previous event
+    for col in columns:
+        starts = starts | ~events[col].eq(events[col].shift()).to_numpy(dtype=bool, na_value=False)
+
+    # return flags
+    return starts
+
+
+def group_ids(events: pd.DataFrame, columns: list) -> np.ndarray:
+    """Return IDs for runs of consecutive events with equal ``columns`` that start at 1 in each match."""
+    return match_cumsum(events["matchId"], group_starts(events, columns).astype("int64"))
+
+
+def sequence_ids(events: pd.DataFrame) -> np.ndarray:
+    """Return IDs for runs of consecutive events of the same player."""
+    return group_ids(events, ["playerId"])
+
+
+def possession_ids(events: pd.DataFrame) -> np.ndarray:
+    """Return IDs for runs of consecutive events with the same attacking squad."""
+    return group_ids(events, ["attackingSquadId"])
+
+
+def phase_ids(events: pd.DataFrame) -> np.ndarray:
+    """Return IDs for runs of consecutive events with the same phase and squad."""
+    return group_ids(events, ["phase", "squadId"])
+
+
+def game_states(events: pd.DataFrame) -> pd.DataFrame:
+    """Return the goals of the event's squad and its opponent before each event and the resulting game state.
+
+    Goals count from the event after the goal (or own goal) on. Events of squads that are neither the
+    home nor the away squad have no goals and are considered trailing.
+    """
+    # get squad of event relative to match
+    is_home = events["squadId"].eq(events["homeSquadId"]).to_numpy(dtype=bool, na_value=False)
+    is_away = events["squadId"].eq(events["awaySquadId"]).to_numpy(dtype=bool, na_value=False)
+
+    # detect goals scored
+    is_goal = events["action"].eq("GOAL").to_numpy(dtype=bool, na_value=False)
+    is_own_goal = events["action"].eq("OWN_GOAL").to_numpy(dtype=bool, na_value=False)
+    goal_home = ((is_goal & is_home) | (is_own_goal & is_away)).astype("int64")
+    goal_away = ((is_goal & is_away) | (is_own_goal & is_home)).astype("int64")
+
+    # count goals before each event, so the game state changes after the goal and not on the goal event itself
+    home_goals = match_cumsum(events["matchId"], goal_home) - goal_home
+    away_goals = match_cumsum(events["matchId"], goal_away) - goal_away
+
+    # calculate teamGoals and opponentGoals
+    team_goals = np.where(is_home, home_goals, np.where(is_away, away_goals, np.nan))
+    opponent_goals = np.where(is_away, home_goals, np.where(is_home, away_goals, np.nan))
+
+    # return goals and game state
+    return pd.DataFrame({
+        "teamGoals": team_goals,
+        "opponentGoals": opponent_goals,
+        "gameState": np.where(
+            team_goals == opponent_goals, "tied",
+            np.where(team_goals > opponent_goals, "leading", "trailing")
+        )
+    }, index=events.index)
+
+
+def possession_outcomes(events: pd.DataFrame) -> pd.DataFrame:
+    """Return whether the possession of each event leads to a shot or a goal."""
+    # detect shots and goals
+    is_shot = events["actionType"].eq("SHOT").to_numpy(dtype=bool, na_value=False)
+    is_goal = is_shot & events["result"].eq("SUCCESS").to_numpy(dtype=bool, na_value=False)
+
+    # number possessions across matches and count shots and goals per possession
+    possessions = np.cumsum(group_starts(events, ["attackingSquadId"]))
+    shots = np.bincount(possessions, weights=is_shot)
+    goals = np.bincount(possessions, weights=is_goal)
+
+    # return possession outcomes
+    return pd.DataFrame({
+        "leadsToShot": shots[possessions] > 0,
+        "leadsToGoal": goals[possessions] > 0
+    }, index=events.index)
+
+
+def derive_possessions(events: pd.DataFrame) -> pd.DataFrame:
+    """Return player sequence, possession and phase IDs, game states and possession outcomes of events.
+
+    The columns are derived from the events with a player, as these are the events that make up
+    video clips, and are missing for all other events. Phase IDs are only derived for events with a
+    phase. IDs start at 1 in each match.
+    """
+    # get events with player and events with player and phase
+    players = events[["matchId", "playerId", "squadId", "homeSquadId", "awaySquadId", "attackingSquadId", "phase",
+                      "action", "actionType", "result"]]
+    players = players[players.playerId.notna()]
+    phases = players[players.phase.notna()]
+
+    # derive columns
+    derived = pd.concat([
+        pd.DataFrame({
+            "playerSequenceId": sequence_ids(players),
+            "possessionId": possession_ids(players)
+        }, index=players.index),
+        pd.Series(phase_ids(phases), index=phases.index, name="phaseId"),
+        game_states(players),
+        possession_outcomes(players)
+    ], axis=1)
+
+    # fix column types and return columns for all events
+    derived = derived.reindex(events.index)
+    derived["playerSequenceId"] = derived["playerSequenceId"].astype("Int64")
+    derived["possessionId"] = derived["possessionId"].astype("Int64")
+    derived["phaseId"] = derived["phaseId"].astype("Int64")
+    derived["leadsToShot"] = derived["leadsToShot"].astype("boolean")
+    derived["leadsToGoal"] = derived["leadsToGoal"].astype("boolean")
+    return derived[possession_cols]
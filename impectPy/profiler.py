@@ -0,0 +1,131 @@
+# load packages
+import time
+import tracemalloc
+from typing import Optional, Callable
+from impectPy.instrumentation import Instrumentation
+
+######
+#
+# This class extends the instrumentation with CPU time and peak memory per span
+# and renders the recorded spans as a flame-style text report
+#
+######
+
+
+class Profiler(Instrumentation):
+    def __init__(self, callback: Optional[Callable[[dict], None]] = None):
+        """Initialize a profiler that records wall time, CPU time and peak memory of every span.
+
+        Besides the fields recorded by ``Instrumentation``, spans opened while profiling contain the
+        process CPU time (``cpuTime``, in seconds) and the peak of memory allocated by Python on top
+        of the memory in use when the span was opened (``peakMemory``, in bytes).
+
+        Both values are measured for the whole process, as ``tracemalloc`` keeps a single peak and
+        ``time.process_time()`` counts all threads. While spans of several threads overlap (e.g.
+        requests sent concurrently by ``getPlayerProfileScores()``), each of them includes the CPU
+        time and allocations of the others, so the values are upper bounds rather than exact per
+        span figures.
+        """
+        super().__init__(callback)
+        self.open_records = {}  # open spans keyed by span id
+        self.started_tracing = False  # whether memory tracing was started by the profiler
+
+    def start(self):
+        """Start tracing memory allocations."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+    def stop(self):
+        """Stop tracing memory allocations, if tracing was started by the profiler."""
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def update_peaks(self) -> int:
+        """Pass the current memory peak to all open spans, reset it and return it.
+
+        Must be called while holding ``lock``, as spans are opened and closed by several threads.
+        """
+        peak = tracemalloc.get_traced_memory()[1]
+        for record in self.open_records.values():
+            record["peak"] = max(record["peak"], peak)
+        tracemalloc.reset_peak()
+        return peak
+
+    def open(self, kind: str, name: str, **attributes) -> dict:
+        """Open a span and remember CPU time and memory in use."""
+        record = super().open(kind, name, **attributes)
+        if tracemalloc.is_tracing():
+            with self.lock:
+                self.update_peaks()
+                record["memory"] = tracemalloc.get_traced_memory()[0]
+                record["peak"] = record["memory"]
+                self.open_records[record["spanId"]] = record
+        record["cpu"] = time.process_time()
+        return record
+
+    def close(self, record: dict, **attributes):
+        """Close a span and add its CPU time and peak memory."""
+        record["cpuTime"] = time.process_time() - record.pop("cpu")
+        with self.lock:
+            if record["spanId"] in self.open_records:
+                self.update_peaks()
+                del self.open_records[record["spanId"]]
+                record["peakMemory"] = record.pop("peak") - record.pop("memory")
+        super().close(record, **attributes)
+
+    def report(self, width: int = 30) -> str:
+        """Return a flame-style text report of the recorded spans.
+
+        Spans are shown as a tree below the span that was open when they started. Spans with the
+        same kind and name below the same parent are merged. Each line shows the number of spans,
+        wall time, CPU time, peak memory and a bar of the wall time relative to the total.
+        """
+        with self.lock:
+            records = list(self.records)
+
+        # group records by parent and merge spans with the same kind and name
+        children = {}
+        for record in records:
+            nodes = children.setdefault(record["parentId"], {})
+            key = (record["kind"], record["name"])
+            node = nodes.setdefault(key, {"count": 0, "wall": 0.0, "cpu": 0.0, "peak": 0, "ids": []})
+            node["count"] += 1
+            node["wall"] += record["duration"]
+            node["cpu"] += record.get("cpuTime", 0.0)
+            node["peak"] = max(node["peak"], record.get("peakMemory", 0))
+            node["ids"].append(record["spanId"])
+
+        # get total wall time of top level spans
+        roots = children.get(None, {})
+        total = sum(node["wall"] for node in roots.values()) or 1.0
+
+        # render tree
+        lines = [f"{'span':<60} {'count':>5} {'wall':>9} {'cpu':>9} {'peak':>10}"]
+
+        def render(nodes: dict, depth: int):
+            for (kind, name), node in sorted(nodes.items(), key=lambda item: -item[1]["wall"]):
+                label = ("  " * depth + (f"{name}" if kind in ["function", "stage"] else f"[{kind}] {name}"))[:60]
+                bar = "#" * max(1, round(width * node["wall"] / total))
+                lines.append(
+                    f"{label:<60} {node['count']:>5} {node['wall']:>8.3f}s {node['cpu']:>8.3f}s "
+                    f"{node['peak'] / 2 ** 20:>7.1f}MiB {bar}"
+                )
+
+                # merge children of all merged spans
+                merged = {}
+                for span_id in node["ids"]:
+                    for key, child in children.get(span_id, {}).items():
+                        target = merged.setdefault(key, {"count": 0, "wall": 0.0, "cpu": 0.0, "peak": 0, "ids": []})
+                        target["count"] += child["count"]
+                        target["wall"] += child["wall"]
+                        target["cpu"] += child["cpu"]
+                        target["peak"] = max(target["peak"], child["peak"])
+                        target["ids"] += child["ids"]
+                render(merged, depth + 1)
+
+        render(roots, 0)
+
+        # return report
+        return "\n".join(lines)
@@ -1,4 +1,5 @@
 # load packages
+import numpy as np
 import pandas as pd
 from impectPy.helpers import RateLimitedAPI, ImpectSession, safe_execute, resolve_matches
 from .matches import getMatchesFromHost
@@ -47,7 +48,7 @@ def getSetPiecesFromHost(matches: list, connection: RateLimitedAPI, host: str) -
         )[["id", "commonname"]]
         players_list.append(players)
     players = pd.concat(players_list).drop_duplicates()
-    player_map = players.set_index("id")["commonname"].to_dict()
+    player_names = players.drop_duplicates("id", keep="last").set_index("id")["commonname"]
 
     # get squads
     squads_list = []
@@ -60,7 +61,7 @@ def getSetPiecesFromHost(matches: list, connection: RateLimitedAPI, host: str) -
         )[["id", "name"]]
         squads_list.append(squads)
     squads = pd.concat(squads_list).drop_duplicates()
-    squad_map = squads.set_index("id")["name"].to_dict()
+    squad_names = squads.drop_duplicates("id", keep="last").set_index("id")["name"]
 
     # get matches
     matchplan_list = []
@@ -132,73 +133,8 @@ def getSetPiecesFromHost(matches: list, connection: RateLimitedAPI, host: str) -
         suffixes=("", "_iterations")
     )
 
-    # determine defending squad
-    set_pieces["defendingSquadId"] = set_pieces.apply(
-        lambda row: row.homeSquadId if row.squadId == row.awaySquadId else row.awaySquadId,
-        axis=1
-    )
-
-    # merge events with squads
-    set_pieces = set_pieces.merge(
-        squads[["id", "name"]].rename(columns={"id": "squadId", "name": "attackingSquadName"}),
-        left_on="squadId",
-        right_on="squadId",
-        how="left",
-        suffixes=("", "_home")
-    ).merge(
-        squads[["id", "name"]].rename(columns={"id": "squadId", "name": "defendingSquadName"}),
-        left_on="defendingSquadId",
-        right_on="squadId",
-        how="left",
-        suffixes=("", "_away")
-    )
-
-    # merge events with players
-    set_pieces = set_pieces.merge(
-        players[["id", "commonname"]].rename(
-            columns={
-                "id": "setPieceSubPhaseMainEventPlayerId",
-                "commonname": "setPieceSubPhaseMainEventPlayerName"
-            }
-        ),
-        left_on="setPieceSubPhaseMainEventPlayerId",
-        right_on="setPieceSubPhaseMainEventPlayerId",
-        how="left",
-        suffixes=("", "_main")
-    ).merge(
-        players[["id", "commonname"]].rename(
-            columns={
-                "id": "setPieceSubPhasePassReceiverId",
-                "commonname": "setPieceSubPhasePassReceiverName"
-            }
-        ),
-        left_on="setPieceSubPhasePassReceiverId",
-        right_on="setPieceSubPhasePassReceiverId",
-        how="left",
-        suffixes=("", "_receiver")
-    ).merge(
-        players[["id", "commonname"]].rename(
-            columns={
-                "id": "setPieceSubPhaseFirstTouchPlayerId",
-                "commonname": "setPieceSubPhaseFirstTouchPlayerName"
-            }
-        ),
-        left_on="setPieceSubPhaseFirstTouchPlayerId",
-        right_on="setPieceSubPhaseFirstTouchPlayerId",
-        how="left",
-        suffixes=("", "_first")
-    ).merge(
-        players[["id", "commonname"]].rename(
-            columns={
-                "id": "setPieceSubPhaseSecondTouchPlayerId",
-                "commonname": "setPieceSubPhaseSecondTouchPlayerName"
-            }
-        ),
-        left_on="setPieceSubPhaseSecondTouchPlayerId",
-        right_on="setPieceSubPhaseSecondTouchPlayerId",
-        how="left",
-        suffixes=("", "_second")
-    )
+    # add defending squad and squad and player names
+    set_pieces = add_set_piece_names(set_pieces, squad_names, player_names)
 
     # rename some columns
     set_pieces = set_pieces.rename(columns={
@@ -285,4 +221,37 @@ def getSetPiecesFromHost(matches: list, connection: RateLimitedAPI, host: str) -
     set_pieces = set_pieces.sort_values(["matchId", "setPiecePhaseIndex"])
 
     # return events
-    return set_pieces
\ No newline at end of file
+    return set_pieces
+
+
+######
+#
+# This function adds the defending squad and the squad and player names to set
+# pieces
+#
+######
+
+
+def add_set_piece_names(set_pieces: pd.DataFrame, squad_names: pd.Series, player_names: pd.Series) -> pd.DataFrame:
+    """Add the defending squad ID and the squad and player names to set pieces merged with their matches.
+
+    ``squad_names`` and ``player_names`` map IDs to names. The defending squad is the home squad
+    if the attacking squad is the away squad and the away squad otherwise.
+    """
+    # determine defending squad
+    set_pieces["defendingSquadId"] = np.where(
+        set_pieces.squadId.to_numpy() == set_pieces.awaySquadId.to_numpy(),
+        set_pieces.homeSquadId.to_numpy(),
+        set_pieces.awaySquadId.to_numpy()
+    )
+
+    # add squad names
+    set_pieces["attackingSquadName"] = set_pieces.squadId.map(squad_names)
+    set_pieces["defendingSquadName"] = set_pieces.defendingSquadId.map(squad_names)
+
+    # add player names
+    for role in ["MainEventPlayer", "PassReceiver", "FirstTouchPlayer", "SecondTouchPlayer"]:
+        set_pieces[f"setPieceSubPhase{role}Name"] = set_pieces[f"setPieceSubPhase{role}Id"].map(player_names)
+
+    # return set pieces
+    return set_pieces
@@ -1,6 +1,7 @@
 # load packages
 import pandas as pd
-from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_df
+from typing import Union
+from impectPy.helpers import RateLimitedAPI, ImpectSession, resolve_iterations, map_concurrent, unnest_mappings_df
 from .iterations import getIterationsFromHost
 
 ######
@@ -11,8 +12,8 @@ from .iterations import getIterationsFromHost
 
 
 # define function
-def getSquadCoefficients(iteration: int, token: str, session: ImpectSession = ImpectSession()) -> pd.DataFrame:
-    """Return a DataFrame of match-prediction model coefficients for all squads in the given iteration."""
+def getSquadCoefficients(iteration: Union[int, list], token: str, session: ImpectSession = ImpectSession()) -> pd.DataFrame:
+    """Return a DataFrame of match-prediction model coefficients for all squads in the given iteration or list of iterations."""
     # create an instance of RateLimitedAPI
     connection = RateLimitedAPI(session)
 
@@ -21,20 +22,39 @@ def getSquadCoefficients(iteration: int, token: str, session: ImpectSession = Im
 
     return getSquadCoefficientsFromHost(iteration, connection, "https://api.impect.com")
 
-def getSquadCoefficientsFromHost(iteration: int, connection: RateLimitedAPI, host: str) -> pd.DataFrame:
+def getSquadCoefficientsFromHost(iteration: Union[int, list], connection: RateLimitedAPI, host: str) -> pd.DataFrame:
     """Fetch model coefficients for the given iteration from the given host and return them as a DataFrame.
 
     Flattens the nested coefficients structure (date, intercept, home advantage, attack/defense
     per squad), merges competition and squad metadata, and sorts by date and squad ID. Returns an
-    empty DataFrame when no coefficients are available.
+    empty DataFrame when no coefficients are available. For a list of iterations, competition
+    metadata is fetched once, the iterations are requested concurrently and their coefficients are
+    concatenated in the given order.
     """
-    # check input for matches argument
-    if not isinstance(iteration, int):
-        raise Exception("Argument 'iteration' must be an integer.")
+    # check input for iteration argument
+    iteration_list = resolve_iterations(iteration)
 
     # get iterations
     iterations = getIterationsFromHost(connection=connection, host=host)
 
+    # get coefficients of all iterations concurrently
+    coefficients_list = map_concurrent(
+        lambda it: fetch_squad_coefficients(it, iterations, connection, host), iteration_list, connection
+    )
+
+    # drop iterations without coefficients
+    coefficients_list = [df for df in coefficients_list if not df.empty]
+    if len(coefficients_list) == 0:
+        return pd.DataFrame()
+
+    # return coefficients
+    return pd.concat(coefficients_list)
+
+
+def fetch_squad_coefficients(
+        iteration: int, iterations: pd.DataFrame, connection: RateLimitedAPI, host: str
+) -> pd.DataFrame:
+    """Fetch model coefficients for a single iteration and merge them with the given competition metadata."""
     # get squads
     squads = connection.make_api_request_limited(
             url=f"{host}/v5/customerapi/iterations/{iteration}/squads",
@@ -144,4 +164,4 @@ def getSquadCoefficientsFromHost(iteration: int, connection: RateLimitedAPI, hos
     coefficients = coefficients.sort_values(["date", "squadId"])
 
     # return events
-    return coefficients
\ No newline at end of file
+    return coefficients
@@ -1,7 +1,8 @@
 # load packages
 import pandas as pd
+from typing import Union
 import warnings
-from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_df, ForbiddenError, safe_execute
+from impectPy.helpers import RateLimitedAPI, ImpectSession, resolve_iterations, map_concurrent, unnest_mappings_df, ForbiddenError, safe_execute
 from .matches import getMatchesFromHost
 from .iterations import getIterationsFromHost
 
@@ -13,8 +14,8 @@ from .iterations import getIterationsFromHost
 ######
 
 
-def getSquadIterationScores(iteration: int, token: str, session: ImpectSession = ImpectSession()) -> pd.DataFrame:
-    """Return a DataFrame of per-squad iteration-level scores for the given iteration."""
+def getSquadIterationScores(iteration: Union[int, list], token: str, session: ImpectSession = ImpectSession()) -> pd.DataFrame:
+    """Return a DataFrame of per-squad iteration-level scores for the given iteration or list of iterations."""
     # create an instance of RateLimitedAPI
     connection = RateLimitedAPI(session)
 
@@ -23,16 +24,44 @@ def getSquadIterationScores(iteration: int, token: str, session: ImpectSession =
 
     return getSquadIterationScoresFromHost(iteration, connection, "https://api.impect.com")
 
-def getSquadIterationScoresFromHost(iteration: int, connection: RateLimitedAPI, host: str) -> pd.DataFrame:
+def getSquadIterationScoresFromHost(iteration: Union[int, list], connection: RateLimitedAPI, host: str) -> pd.DataFrame:
     """Fetch per-squad iteration-level scores for the given iteration from the given host and return them as a DataFrame.
 
     Pivots raw squad score data, merges squad IDs and competition metadata, and returns one
-    row per squad with cumulative score totals and match count.
+    row per squad with cumulative score totals and match count. For a list of iterations, score
+    definitions and competition metadata are fetched once, the iterations are requested
+    concurrently and their scores are concatenated in the given order.
     """
-    # check input for matches argument
-    if not isinstance(iteration, int):
-        raise Exception("Argument 'iteration' must be an integer.")
+    # check input for iteration argument
+    iteration_list = resolve_iterations(iteration)
 
+    # get scores
+    scores_definitions = connection.make_api_request_limited(
+        url=f"{host}/v5/customerapi/squad-scores",
+        method="GET"
+    ).process_response(
+        endpoint="scoreDefinitions"
+    )[["id", "name"]]
+
+    # get iterations
+    iterations = getIterationsFromHost(connection=connection, host=host)
+
+    # get scores of all iterations concurrently
+    scores_list = map_concurrent(
+        lambda it: fetch_squad_iteration_scores(it, scores_definitions, iterations, connection, host),
+        iteration_list,
+        connection
+    )
+
+    # return scores
+    return pd.concat(scores_list)
+
+
+def fetch_squad_iteration_scores(
+        iteration: int, scores_definitions: pd.DataFrame, iterations: pd.DataFrame, connection: RateLimitedAPI,
+        host: str
+) -> pd.DataFrame:
+    """Fetch per-squad scores for a single iteration and merge them with the given master data."""
     # get squads
     squads = connection.make_api_request_limited(
         url=f"{host}/v5/customerapi/iterations/{iteration}/squads",
@@ -52,17 +81,6 @@ def getSquadIterationScoresFromHost(iteration: int, connection: RateLimitedAPI,
         endpoint="SquadIterationScores"
     ).assign(iterationId=iteration)
 
-    # get scores
-    scores_definitions = connection.make_api_request_limited(
-        url=f"{host}/v5/customerapi/squad-scores",
-        method="GET"
-    ).process_response(
-        endpoint="scoreDefinitions"
-    )[["id", "name"]]
-
-    # get iterations
-    iterations = getIterationsFromHost(connection=connection, host=host)
-
     # get matches played
     matches = scores_raw[["squadId", "matches"]].drop_duplicates()
 
@@ -161,4 +179,4 @@ def getSquadIterationScoresFromHost(iteration: int, connection: RateLimitedAPI,
     averages = averages[order]
 
     # return result
-    return averages
\ No newline at end of file
+    return averages
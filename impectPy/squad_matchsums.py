@@ -1,6 +1,8 @@
 # load packages
 import pandas as pd
-from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_df, ForbiddenError, safe_execute, resolve_matches
+from typing import Optional
+from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_df, ForbiddenError, safe_execute, \
+    resolve_matches, fetch_and_transform
 from .matches import getMatchesFromHost
 from .iterations import getIterationsFromHost
 
@@ -13,7 +15,10 @@ from .iterations import getIterationsFromHost
 ######
 
 
-def getSquadMatchsums(matches: list, token: str, session: ImpectSession = ImpectSession()) -> pd.DataFrame:
+def getSquadMatchsums(
+        matches: list, token: str, session: ImpectSession = ImpectSession(),
+        workers: Optional[int] = None, chunk_size: int = 10
+) -> pd.DataFrame:
     """Return a DataFrame of per-squad KPI sums for the given list of match IDs."""
     # create an instance of RateLimitedAPI
     connection = RateLimitedAPI(session)
@@ -21,101 +26,221 @@ def getSquadMatchsums(matches: list, token: str, session: ImpectSession = Impect
     # construct header with access token
     connection.session.headers.update({"Authorization": f"Bearer {token}"})
 
-    return getSquadMatchsumsFromHost(matches, connection, "https://api.impect.com")
+    return getSquadMatchsumsFromHost(matches, connection, "https://api.impect.com", workers, chunk_size)
 
-def getSquadMatchsumsFromHost(matches: list, connection: RateLimitedAPI, host: str) -> pd.DataFrame:
+def getSquadMatchsumsFromHost(
+        matches: list, connection: RateLimitedAPI, host: str,
+        workers: Optional[int] = None, chunk_size: int = 10
+) -> pd.DataFrame:
     """Fetch per-squad KPI sums for the given matches from the given host and return them as a DataFrame.
 
     Pivots raw KPI data per squad, merges squad IDs, coach names, and competition metadata,
     and returns one row per squad per match.
     """
-    resolved = resolve_matches(matches, connection, host)
-    match_data = resolved.match_data
-    matches = resolved.matches
-    iterations = resolved.iterations
-    forbidden_matches = []
-
-    # get squad match sums
-    def fetch_squad_match_sums(connection, url):
-        return connection.make_api_request_limited(
-            url=url,
-            method="GET"
-        ).process_response(endpoint="Squad Match Sums")
-
-    # create list to store dfs
-    matchsums_list = []
-    for match in matches:
-        matchsums = safe_execute(
-            fetch_squad_match_sums,
-            connection,
-            url=f"{host}/v5/customerapi/matches/{match}/squad-kpis",
-            identifier=f"{match}",
-            forbidden_list=forbidden_matches
-        ).assign(matchId=match)
-        matchsums_list.append(matchsums)
-    matchsums_raw = pd.concat(matchsums_list).reset_index(drop=True)
-
-    # get squads
-    squads_list = []
-    for iteration in iterations:
-        squads = connection.make_api_request_limited(
-            url=f"{host}/v5/customerapi/iterations/{iteration}/squads",
-            method="GET"
-        ).process_response(
-            endpoint="Squads"
-        )[["id", "name", "idMappings"]]
-        squads_list.append(squads)
-    squads = pd.concat(squads_list).drop_duplicates("id").reset_index(drop=True)
-
-    # get coaches
-    coaches_blacklisted = False
-    coaches_list = []
-    for iteration in iterations:
-        try:
-            coaches = connection.make_api_request_limited(
-                url=f"{host}/v5/customerapi/iterations/{iteration}/coaches",
+    # record stages if instrumentation is enabled
+    with connection.stages("getSquadMatchsums") as stages:
+        stages.stage("resolve matches")
+
+        resolved = resolve_matches(matches, connection, host)
+        match_data = resolved.match_data
+        matches = resolved.matches
+        iterations = resolved.iterations
+        forbidden_matches = []
+
+        # get squad match sums
+        def fetch_squad_match_sums(connection, url):
+            return connection.make_api_request_limited(
+                url=url,
+                method="GET"
+            ).process_response(endpoint="Squad Match Sums")
+
+        # define function to download the squad match sums of a single match
+        def fetch_match(match):
+            return safe_execute(
+                fetch_squad_match_sums,
+                connection,
+                url=f"{host}/v5/customerapi/matches/{match}/squad-kpis",
+                identifier=f"{match}",
+                forbidden_list=forbidden_matches
+            ).assign(matchId=match)
+
+        # get squads
+        stages.stage("fetch master data")
+        squads_list = []
+        for iteration in iterations:
+            squads = connection.make_api_request_limited(
+                url=f"{host}/v5/customerapi/iterations/{iteration}/squads",
                 method="GET"
             ).process_response(
-                endpoint="Coaches",
-                raise_exception=False
-            )[["id", "name"]]
-            coaches_list.append(coaches)
-        except KeyError:
-            # no coaches found, create empty df
-            coaches_list.append(pd.DataFrame(columns=["id", "name"]))
-        except ForbiddenError:
-            coaches_blacklisted = True
-    coaches = pd.concat(coaches_list).drop_duplicates()
-
-    # unnest mappings
-    squads = unnest_mappings_df(squads, "idMappings").drop(["idMappings"], axis=1).drop_duplicates()
-
-    # get kpis
-    kpis = connection.make_api_request_limited(
-        url=f"{host}/v5/customerapi/kpis",
-        method="GET"
-    ).process_response(
-        endpoint="KPIs"
-    )[["id", "name"]]
-
-    # get matches
-    matchplan_list = []
-    for iteration in iterations:
-        matchplan = getMatchesFromHost(
-            iteration=iteration,
-            connection=connection,
-            host=host
+                endpoint="Squads"
+            )[["id", "name", "idMappings"]]
+            squads_list.append(squads)
+        squads = pd.concat(squads_list).drop_duplicates("id").reset_index(drop=True)
+
+        # get coaches
+        coaches_blacklisted = False
+        coaches_list = []
+        for iteration in iterations:
+            try:
+                coaches = connection.make_api_request_limited(
+                    url=f"{host}/v5/customerapi/iterations/{iteration}/coaches",
+                    method="GET"
+                ).process_response(
+                    endpoint="Coaches",
+                    raise_exception=False
+                )[["id", "name"]]
+                coaches_list.append(coaches)
+            except KeyError:
+                # no coaches found, create empty df
+                coaches_list.append(pd.DataFrame(columns=["id", "name"]))
+            except ForbiddenError:
+                coaches_blacklisted = True
+        coaches = pd.concat(coaches_list).drop_duplicates()
+
+        # unnest mappings
+        squads = unnest_mappings_df(squads, "idMappings").drop(["idMappings"], axis=1).drop_duplicates()
+
+        # get kpis
+        kpis = connection.make_api_request_limited(
+            url=f"{host}/v5/customerapi/kpis",
+            method="GET"
+        ).process_response(
+            endpoint="KPIs"
+        )[["id", "name"]]
+
+        # get matches
+        matchplan_list = []
+        for iteration in iterations:
+            matchplan = getMatchesFromHost(
+                iteration=iteration,
+                connection=connection,
+                host=host
+            )
+            matchplan_list.append(matchplan)
+        matchplan = pd.concat(matchplan_list)
+
+        # get iterations
+        iterations = getIterationsFromHost(connection=connection, host=host)
+
+        # download squad match sums and manipulate chunks of matches while the next matches are downloaded
+        stages.stage("fetch and transform matches")
+        matchsums = fetch_and_transform(
+            fetch_match, matches, transform_squad_matchsums, kpis, workers=workers, chunk_size=chunk_size
         )
-        matchplan_list.append(matchplan)
-    matchplan = pd.concat(matchplan_list)
 
-    # get iterations
-    iterations = getIterationsFromHost(connection=connection, host=host)
+        # merge with other data
+        stages.stage("merge metadata")
+        matchsums = matchsums.merge(
+            matchplan[["id", "scheduledDate", "matchDayIndex", "matchDayName", "iterationId"]],
+            left_on="matchId",
+            right_on="id",
+            how="left",
+            suffixes=("", "_matchplan")
+        ).merge(
+            pd.concat([
+                match_data[["id","squadHomeId", "squadHomeCoachId"]].rename(columns={"squadHomeId": "squadId", "squadHomeCoachId": "coachId"}),
+                match_data[["id","squadAwayId", "squadAwayCoachId"]].rename(columns={"squadAwayId": "squadId", "squadAwayCoachId": "coachId"})
+            ], ignore_index=True),
+            left_on=["matchId", "squadId"],
+            right_on=["id", "squadId"],
+            how="left",
+            suffixes=("", "_matchData")
+        ).merge(
+            iterations[["id", "competitionId", "competitionName", "competitionType", "season"]],
+            left_on="iterationId",
+            right_on="id",
+            how="left",
+            suffixes=("", "_iterations")
+        ).merge(
+            squads[["id", "wyscoutId", "heimSpielId", "skillCornerId", "optaId", "statsPerformId", "transfermarktId", "soccerdonnaId", "name"]].rename(
+                columns={"id": "squadId", "name": "squadName"}
+            ),
+            left_on="squadId",
+            right_on="squadId",
+            how="left",
+            suffixes=("", "_home")
+        )
 
-    # create empty df to store matchsums
-    matchsums = pd.DataFrame()
+        if not coaches_blacklisted:
+
+            # create coaches map
+            coaches_map = coaches.set_index("id")["name"].to_dict()
+
+            # convert coachId to integer if it is None
+            matchsums["coachId"] = matchsums["coachId"].astype("Int64")
+            matchsums["coachName"] = matchsums.coachId.map(coaches_map)
+
+        # rename some columns
+        matchsums = matchsums.rename(columns={
+            "scheduledDate": "dateTime"
+        })
+
+        # define column order
+        order = [
+            "matchId",
+            "dateTime",
+            "competitionName",
+            "competitionId",
+            "competitionType",
+            "iterationId",
+            "season",
+            "matchDayIndex",
+            "matchDayName",
+            "squadId",
+            "wyscoutId",
+            "heimSpielId",
+            "skillCornerId",
+            "optaId",
+            "statsPerformId",
+            "transfermarktId",
+            "soccerdonnaId",
+            "squadName",
+            "coachId",
+            "coachName"
+        ]
+
+        # add kpiNames to order
+        order += kpis['name'].to_list()
+
+        # filter for non-NA columns only
+        matchsums = matchsums[
+            (matchsums.matchId.notnull()) &
+            (matchsums.squadId.notnull())
+        ]
+
+        # reset index
+        matchsums = matchsums.reset_index()
+
+        # check if coaches are blacklisted
+        if coaches_blacklisted:
+            order = [col for col in order if col not in ["coachId", "coachName"]]
+
+        # select & order columns
+        matchsums = matchsums[order]
+
+        # fix some column types
+        matchsums["matchId"] = matchsums["matchId"].astype("Int64")
+        matchsums["competitionId"] = matchsums["competitionId"].astype("Int64")
+        matchsums["iterationId"] = matchsums["iterationId"].astype("Int64")
+        matchsums["matchDayIndex"] = matchsums["matchDayIndex"].astype("Int64")
+        matchsums["squadId"] = matchsums["squadId"].astype("Int64")
+        matchsums["wyscoutId"] = matchsums["wyscoutId"].astype("Int64")
+        matchsums["heimSpielId"] = matchsums["heimSpielId"].astype("Int64")
+        matchsums["skillCornerId"] = matchsums["skillCornerId"].astype("Int64")
+        matchsums["optaId"] = matchsums["optaId"].astype("string")
+        matchsums["statsPerformId"] = matchsums["statsPerformId"].astype("string")
+        matchsums["transfermarktId"] = matchsums["transfermarktId"].astype("string")
+        matchsums["soccerdonnaId"] = matchsums["soccerdonnaId"].astype("string")
+
+    # return data
+    return matchsums
 
-    # manipulate matchsums
+
+# define function to unnest and pivot raw squad match sums
+def transform_squad_matchsums(matchsums_raw: pd.DataFrame, kpis: pd.DataFrame) -> pd.DataFrame:
+    """Pivot raw squad match sums to one row per match and squad."""
+    # create list to store dfs
+    matchsums_list = []
 
     # iterate over matches
     for i in range(len(matchsums_raw)):
@@ -152,110 +277,9 @@ def getSquadMatchsumsFromHost(matches: list, connection: RateLimitedAPI, host: s
             ).reset_index()
 
             # append to matchsums
-            matchsums = pd.concat([matchsums, temp])
-
-    # merge with other data
-    matchsums = matchsums.merge(
-        matchplan[["id", "scheduledDate", "matchDayIndex", "matchDayName", "iterationId"]],
-        left_on="matchId",
-        right_on="id",
-        how="left",
-        suffixes=("", "_matchplan")
-    ).merge(
-        pd.concat([
-            match_data[["id","squadHomeId", "squadHomeCoachId"]].rename(columns={"squadHomeId": "squadId", "squadHomeCoachId": "coachId"}),
-            match_data[["id","squadAwayId", "squadAwayCoachId"]].rename(columns={"squadAwayId": "squadId", "squadAwayCoachId": "coachId"})
-        ], ignore_index=True),
-        left_on=["matchId", "squadId"],
-        right_on=["id", "squadId"],
-        how="left",
-        suffixes=("", "_matchData")
-    ).merge(
-        iterations[["id", "competitionId", "competitionName", "competitionType", "season"]],
-        left_on="iterationId",
-        right_on="id",
-        how="left",
-        suffixes=("", "_iterations")
-    ).merge(
-        squads[["id", "wyscoutId", "heimSpielId", "skillCornerId", "optaId", "statsPerformId", "transfermarktId", "soccerdonnaId", "name"]].rename(
-            columns={"id": "squadId", "name": "squadName"}
-        ),
-        left_on="squadId",
-        right_on="squadId",
-        how="left",
-        suffixes=("", "_home")
-    )
-
-    if not coaches_blacklisted:
-
-        # create coaches map
-        coaches_map = coaches.set_index("id")["name"].to_dict()
-
-        # convert coachId to integer if it is None
-        matchsums["coachId"] = matchsums["coachId"].astype("Int64")
-        matchsums["coachName"] = matchsums.coachId.map(coaches_map)
-
-    # rename some columns
-    matchsums = matchsums.rename(columns={
-        "scheduledDate": "dateTime"
-    })
-
-    # define column order
-    order = [
-        "matchId",
-        "dateTime",
-        "competitionName",
-        "competitionId",
-        "competitionType",
-        "iterationId",
-        "season",
-        "matchDayIndex",
-        "matchDayName",
-        "squadId",
-        "wyscoutId",
-        "heimSpielId",
-        "skillCornerId",
-        "optaId",
-        "statsPerformId",
-        "transfermarktId",
-        "soccerdonnaId",
-        "squadName",
-        "coachId",
-        "coachName"
-    ]
-
-    # add kpiNames to order
-    order += kpis['name'].to_list()
-
-    # filter for non-NA columns only
-    matchsums = matchsums[
-        (matchsums.matchId.notnull()) &
-        (matchsums.squadId.notnull())
-    ]
-
-    # reset index
-    matchsums = matchsums.reset_index()
-
-    # check if coaches are blacklisted
-    if coaches_blacklisted:
-        order = [col for col in order if col not in ["coachId", "coachName"]]
-
-    # select & order columns
-    matchsums = matchsums[order]
-
-    # fix some column types
-    matchsums["matchId"] = matchsums["matchId"].astype("Int64")
-    matchsums["competitionId"] = matchsums["competitionId"].astype("Int64")
-    matchsums["iterationId"] = matchsums["iterationId"].astype("Int64")
-    matchsums["matchDayIndex"] = matchsums["matchDayIndex"].astype("Int64")
-    matchsums["squadId"] = matchsums["squadId"].astype("Int64")
-    matchsums["wyscoutId"] = matchsums["wyscoutId"].astype("Int64")
-    matchsums["heimSpielId"] = matchsums["heimSpielId"].astype("Int64")
-    matchsums["skillCornerId"] = matchsums["skillCornerId"].astype("Int64")
-    matchsums["optaId"] = matchsums["optaId"].astype("string")
-    matchsums["statsPerformId"] = matchsums["statsPerformId"].astype("string")
-    matchsums["transfermarktId"] = matchsums["transfermarktId"].astype("string")
-    matchsums["soccerdonnaId"] = matchsums["soccerdonnaId"].astype("string")
+            matchsums_list.append(temp)
 
-    # return data
-    return matchsums
\ No newline at end of file
+    # concatenate squad match sums
+    if len(matchsums_list) == 0:
+        return pd.DataFrame()
+    return pd.concat(matchsums_list)
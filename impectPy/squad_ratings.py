@@ -1,6 +1,7 @@
 # load packages
 import pandas as pd
-from impectPy.helpers import RateLimitedAPI, ImpectSession, unnest_mappings_df
+from typing import Union
+from impectPy.helpers import RateLimitedAPI, ImpectSession, resolve_iterations, map_concurrent, unnest_mappings_df
 from .iterations import getIterationsFromHost
 
 ######
@@ -11,8 +12,8 @@ from .iterations import getIterationsFromHost
 
 
 # define function
-def getSquadRatings(iteration: int, token: str, session: ImpectSession = ImpectSession()) -> pd.DataFrame:
-    """Return a DataFrame of squad ratings for all dates in the given iteration."""
+def getSquadRatings(iteration: Union[int, list], token: str, session: ImpectSession = ImpectSession()) -> pd.DataFrame:
+    """Return a DataFrame of squad ratings for all dates in the given iteration or list of iterations."""
     # create an instance of RateLimitedAPI
     connection = RateLimitedAPI(session)
 
@@ -21,19 +22,38 @@ def getSquadRatings(iteration: int, token: str, session: ImpectSession = ImpectS
 
     return getSquadRatingsFromHost(iteration, connection, "https://api.impect.com")
 
-def getSquadRatingsFromHost(iteration: int, connection: RateLimitedAPI, host: str) -> pd.DataFrame:
+def getSquadRatingsFromHost(iteration: Union[int, list], connection: RateLimitedAPI, host: str) -> pd.DataFrame:
     """Fetch squad ratings for the given iteration from the given host and return them as a DataFrame.
 
     Flattens the nested ratings structure, merges competition and squad metadata, and sorts by
-    date and squad ID. Returns an empty DataFrame when no ratings are available.
+    date and squad ID. Returns an empty DataFrame when no ratings are available. For a list of
+    iterations, competition metadata is fetched once, the iterations are requested concurrently
+    and their ratings are concatenated in the given order.
     """
-    # check input for matches argument
-    if not isinstance(iteration, int):
-        raise Exception("Argument 'iteration' must be an integer.")
+    # check input for iteration argument
+    iteration_list = resolve_iterations(iteration)
 
     # get iterations
     iterations = getIterationsFromHost(connection=connection, host=host)
 
+    # get ratings of all iterations concurrently
+    ratings_list = map_concurrent(
+        lambda it: fetch_squad_ratings(it, iterations, connection, host), iteration_list, connection
+    )
+
+    # drop iterations without ratings
+    ratings_list = [df for df in ratings_list if not df.empty]
+    if len(ratings_list) == 0:
+        return pd.DataFrame()
+
+    # return ratings
+    return pd.concat(ratings_list)
+
+
+def fetch_squad_ratings(
+        iteration: int, iterations: pd.DataFrame, connection: RateLimitedAPI, host: str
+) -> pd.DataFrame:
+    """Fetch squad ratings for a single iteration and merge them with the given competition metadata."""
     # get squads
     squads = connection.make_api_request_limited(
             url=f"{host}/v5/customerapi/iterations/{iteration}/squads",
@@ -137,4 +157,4 @@ def getSquadRatingsFromHost(iteration: int, connection: RateLimitedAPI, host: st
     ratings = ratings.sort_values(["date", "squadId"])
 
     # return events
-    return ratings
\ No newline at end of file
+    return ratings
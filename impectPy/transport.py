@@ -0,0 +1,231 @@
+# load packages
+import io
+import re
+import json
+import time
+import hashlib
+import zipfile
+import threading
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+from typing import Optional
+
+from impectPy.helpers import ImpectAdapter
+
+######
+#
+# These functions are shared by the recording and the replaying transport
+#
+######
+
+
+# define function to get the archive key of a request
+def request_key(method: str, url: str) -> str:
+    """Return the key of a request in an archive, which is independent of the host."""
+    parsed = urlparse(url)
+    return f"{method} {parsed.path}" + (f"?{parsed.query}" if parsed.query else "")
+
+
+# define function to check if a request asks for an access token
+def is_token_request(request) -> bool:
+    """Return True if the given prepared request is a token request of the login flow."""
+    body = request.body if isinstance(request.body, bytes) else (request.body or "").encode()
+    return request.method == "POST" and b"grant_type=" in body
+
+
+######
+#
+# This class records every request and response of a session into an archive
+#
+######
+
+
+class RecordingTransport(ImpectAdapter):
+    def __init__(self, path: str, **kwargs):
+        """Initialize a transport that sends requests over the network and records every response.
+
+        Responses are stored with their status, headers, raw (still compressed) body and the time
+        it took to receive them. ``save()`` writes them to a zip archive at ``path``, storing each
+        distinct body once. Token requests, 304 and 429 responses are not recorded, so the archive
+        contains neither credentials nor access tokens. Further keyword arguments are passed to
+        ``ImpectAdapter``.
+        """
+        super().__init__(**kwargs)
+        self.path = path  # path of the archive
+        self.entries = []  # recorded responses
+        self.bodies = {}  # distinct bodies keyed by their sha1 hash
+        self.lock = threading.Lock()  # lock to record from several threads
+        self.saved = True  # whether all recorded responses have been saved
+
+    def send(self, request, stream=False, **kwargs):
+        """Send the request, record the response and return it with a replayable body."""
+        start = time.perf_counter()
+        response = super().send(request, stream=True, **kwargs)
+
+        # skip token requests and responses that depend on the client state
+        if is_token_request(request) or response.status_code in [304, 429]:
+            return response
+
+        # read raw body and release connection
+        content = response.raw.read(decode_content=False)
+        elapsed = time.perf_counter() - start
+        raw_headers = response.raw.headers
+        response.close()
+
+        # store response
+        digest = hashlib.sha1(content).hexdigest()
+        with self.lock:
+            self.bodies.setdefault(digest, content)
+            self.entries.append({
+                "key": request_key(request.method, request.url),
+                "status": response.status_code,
+                "reason": response.reason,
+                "headers": {k: v for k, v in raw_headers.items() if k.lower() != "set-cookie"},
+                "elapsed": round(elapsed, 6),
+                "body": digest,
+            })
+            self.saved = False
+
+        # rebuild response from recorded body
+        raw = HTTPResponse(
+            body=io.BytesIO(content), headers=raw_headers, status=response.status_code, reason=response.reason,
+            preload_content=False, decode_content=True
+        )
+        return self.build_response(request, raw)
+
+    def save(self):
+        """Write all recorded responses to the archive."""
+        with self.lock:
+            with zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr("entries.json", json.dumps(self.entries))
+                for digest, content in self.bodies.items():
+                    archive.writestr(f"bodies/{digest}", content)
+            self.saved = True
+
+    def close(self):
+        """Save unsaved responses and close the connection pools."""
+        if not self.saved:
+            self.save()
+        super().close()
+
+
+######
+#
+# This class replays the responses of an archive without network access
+#
+######
+
+
+class ReplayTransport(HTTPAdapter):
+    def __init__(
+            self, path: str, latency: Optional[float] = None, latency_scale: float = 1.0,
+            capacity: Optional[int] = None, window: Optional[int] = None
+    ):
+        """Initialize a transport that answers requests from an archive written by ``RecordingTransport``.
+
+        Requests are matched by method, path and query, regardless of the host. If a request was
+        recorded several times, the responses are replayed in the recorded order and the last one
+        is repeated. Each response is delayed by its recorded duration multiplied by
+        ``latency_scale``, or by ``latency`` seconds if given. The rate limit is emulated with a
+        fixed window of ``capacity`` requests per ``window`` seconds, taken from the recorded
+        ``RateLimit-Policy`` header by default: every response carries ``RateLimit-Policy`` and
+        ``RateLimit-Remaining`` headers and requests beyond the limit are answered with 429.
+        Conditional requests matching the recorded ETag are answered with 304, token requests with
+        a dummy access token and requests missing from the archive with 404.
+        """
+        super().__init__()
+        self.latency = latency  # fixed latency (in seconds) per request, overrides recorded durations
+        self.latency_scale = latency_scale  # factor applied to recorded durations
+        self.lock = threading.Lock()  # lock to replay from several threads
+
+        # read archive
+        with zipfile.ZipFile(path) as archive:
+            entries = json.loads(archive.read("entries.json"))
+            self.bodies = {
+                name[len("bodies/"):]: archive.read(name) for name in archive.namelist() if name.startswith("bodies/")
+            }
+        self.entries = {}  # recorded responses keyed by request
+        for entry in entries:
+            self.entries.setdefault(entry["key"], []).append(entry)
+        self.calls = {}  # number of replayed responses per request
+
+        # get rate limit policy from recorded headers
+        policy = next((
+            entry["headers"][name] for entry in entries for name in entry["headers"]
+            if name.lower() == "ratelimit-policy"
+        ), "10;w=1")
+        self.capacity = capacity if capacity is not None else int(re.sub(";.*", "", policy))
+        self.window = window if window is not None else int(re.sub(".*w=(\\d+).*", "\\1", policy))
+        self.window_start = time.time()  # start of the current rate limit window
+        self.used = 0  # requests in the current rate limit window
+
+    def keys(self) -> list:
+        """Return the keys of all recorded requests."""
+        return list(self.entries.keys())
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        """Answer the request from the archive."""
+        # answer token requests with a dummy token
+        if is_token_request(request):
+            body = json.dumps({
+                "access_token": "replay", "expires_in": 86400, "refresh_token": "replay",
+                "refresh_expires_in": 86400
+            }).encode()
+            return self.respond(request, 200, "OK", {"Content-Type": "application/json"}, body)
+
+        # count request in current rate limit window
+        with self.lock:
+            now = time.time()
+            if now - self.window_start >= self.window:
+                self.window_start, self.used = now, 0
+            self.used += 1
+            remaining = self.capacity - self.used
+        headers = {"RateLimit-Policy": f"{self.capacity};w={self.window}", "RateLimit-Remaining": str(max(remaining, 0))}
+
+        # answer with 429 if rate limit is exceeded
+        if remaining < 0:
+            body = json.dumps({"message": "Too Many Requests"}).encode()
+            return self.respond(request, 429, "Too Many Requests", {**headers, "x-request-id": "replay"}, body)
+
+        # get recorded response
+        key = request_key(request.method, request.url)
+        with self.lock:
+            recorded = self.entries.get(key)
+            if recorded is not None:
+                index = self.calls.get(key, 0)
+                self.calls[key] = index + 1
+                entry = recorded[min(index, len(recorded) - 1)]
+        if recorded is None:
+            body = json.dumps({"message": f"Request not recorded: {key}"}).encode()
+            return self.respond(request, 404, "Not Found", {**headers, "x-request-id": "replay"}, body)
+
+        # emulate latency
+        delay = self.latency if self.latency is not None else entry["elapsed"] * self.latency_scale
+        if delay > 0:
+            time.sleep(delay)
+
+        # replace recorded rate limit headers
+        headers = {
+            **{k: v for k, v in entry["headers"].items() if not k.lower().startswith("ratelimit-")},
+            **headers
+        }
+
+        # answer conditional requests
+        etag = next((v for k, v in headers.items() if k.lower() == "etag"), None)
+        if etag is not None and request.headers.get("If-None-Match") == etag:
+            headers = {k: v for k, v in headers.items() if k.lower() not in ["content-encoding", "content-length"]}
+            return self.respond(request, 304, "Not Modified", headers, b"")
+
+        return self.respond(request, entry["status"], entry["reason"], headers, self.bodies[entry["body"]])
+
+    def respond(self, request, status: int, reason: str, headers: dict, body: bytes):
+        """Build a response with the given status, headers and raw body."""
+        raw = HTTPResponse(
+            body=io.BytesIO(body), headers=headers, status=status, reason=reason,
+            preload_content=False, decode_content=True
+        )
+        return self.build_response(request, raw)
+
+    def close(self):
+        pass
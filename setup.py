@@ -20,6 +20,10 @@ setup(
     install_requires=["requests>=2.24.0",
                       "pandas>=2.2.0",
                       "numpy>=1.24.2"],
+    # Optional dependencies
+    extras_require={"polars": ["polars>=1.0.0"], "brotli": ["brotli"]},
+    # Command line interface
+    entry_points={"console_scripts": ["impectpy=impectPy.cli:main"]},
     # *strongly* suggested for sharing
     version=version,
     # The license can be anything you like
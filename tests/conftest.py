@@ -0,0 +1,40 @@
+# load packages
+import os
+import sys
+import pytest
+
+# make the synthetic payloads and the stub server of the benchmark suite importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import impectPy as ip  # noqa: E402
+from payloads import SyntheticDataset  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+######
+#
+# These fixtures serve a small synthetic dataset with the stub server of the
+# benchmark suite, so tests run without credentials or network access
+#
+######
+
+
+@pytest.fixture(scope="session")
+def dataset() -> SyntheticDataset:
+    """Return a synthetic dataset with one iteration of four squads."""
+    return SyntheticDataset(n_iterations=1, n_squads=4, n_players=14, n_events=200)
+
+
+@pytest.fixture(scope="session")
+def server(dataset: SyntheticDataset) -> StubServer:
+    """Serve the synthetic dataset for all tests of the session."""
+    with StubServer(dataset, capacity=10000) as server:
+        yield server
+
+
+@pytest.fixture
+def api(server: StubServer) -> ip.Impect:
+    """Return an Impect instance logged in at the stub server, with a fresh connection and request log."""
+    api = ip.Impect(ip.Config(host=server.url, oidc_token_endpoint=server.url + "/token"))
+    api.login("test", "test")
+    server.requests.clear()
+    return api
@@ -0,0 +1,63 @@
+# load packages
+import json
+import urllib.parse
+import requests
+from requests.adapters import BaseAdapter
+from impectPy.helpers import RateLimitedAPI, ImpectSession
+from impectPy.access_token import AccessToken
+
+######
+#
+# This transport emulates a Keycloak token endpoint that rejects refresh tokens
+#
+######
+
+
+class TokenEndpoint(BaseAdapter):
+    def __init__(self):
+        """Initialize a token endpoint that records the grant type of every token request."""
+        super().__init__()
+        self.grants = []  # grant types of all token requests
+
+    def send(self, request, **kwargs) -> requests.Response:
+        """Answer password grants with a token and reject refresh grants like Keycloak does."""
+        grant = urllib.parse.parse_qs(request.body)["grant_type"][0]
+        self.grants.append(grant)
+
+        # build response without x-request-id header
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.headers["Content-Type"] = "application/json"
+        if grant == "password":
+            response.status_code = 200
+            body = {
+                "access_token": f"token-{len(self.grants)}", "refresh_token": "refresh", "expires_in": 300,
+                "refresh_expires_in": 1800
+            }
+        else:
+            response.status_code = 400
+            body = {"error": "invalid_grant", "error_description": "Token is not active"}
+        response._content = json.dumps(body).encode()
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        pass
+
+
+def test_refresh_falls_back_to_password_login():
+    # log in against the token endpoint
+    endpoint = TokenEndpoint()
+    session = ImpectSession(transport=endpoint)
+    connection = RateLimitedAPI(session)
+    access_token = AccessToken("user", "password", connection, "https://login.example.com/token")
+
+    # expire access token and refresh it
+    access_token.expires_at = 0
+    access_token.ensure_valid()
+
+    # check that the rejected refresh token led to a new password login
+    assert endpoint.grants == ["password", "refresh_token", "password"]
+    assert access_token.access_token == "token-3"
+    assert session.headers["Authorization"] == "Bearer token-3"
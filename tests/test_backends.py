@@ -0,0 +1,158 @@
+# load packages
+import numpy as np
+import pandas as pd
+import pytest
+from impectPy.backends import pivot_event_kpis, pivot_event_kpis_polars, join_event_kpis
+
+######
+#
+# These functions build small event and scoring frames and the result of the
+# previous pivot_table and merge implementation of getEvents
+#
+######
+
+
+def make_kpis() -> pd.DataFrame:
+    """Return a KPI catalog with three KPIs."""
+    return pd.DataFrame({"id": [1, 2, 3], "name": ["BYPASSED_OPPONENTS", "SHOT_XG", "PXT_PASS"]})
+
+
+def make_events() -> pd.DataFrame:
+    """Return events covering scored, unscored, player-less and position-less rows."""
+    return pd.DataFrame({
+        "id": [10, 10, 11, 12, 13, 14],
+        "playerPosition": ["CENTRAL_MIDFIELD", "CENTER_FORWARD", "CENTRAL_DEFENDER", None, "GOALKEEPER", None],
+        "playerId": pd.array([100, 101, None, 102, 103, None], dtype="Int64")
+    })
+
+
+def make_scorings() -> pd.DataFrame:
+    """Return scorings with repeated keys, a scoring without player and one without position."""
+    return pd.DataFrame({
+        "eventId": [10, 10, 10, 10, 11, 12, 14],
+        "position": ["CENTRAL_MIDFIELD", "CENTRAL_MIDFIELD", "CENTRAL_MIDFIELD", "CENTER_FORWARD", "CENTRAL_DEFENDER",
+                     "CENTER_FORWARD", None],
+        "playerId": [100, 100, 100, 101, None, 102, None],
+        "kpiId": [1, 1, 2, 3, 1, 2, 1],
+        "value": [1.0, 2.0, 0.5, 0.25, 3.0, 0.1, 4.0]
+    })
+
+
+def reference_join(events: pd.DataFrame, scorings: pd.DataFrame, kpis: pd.DataFrame) -> pd.DataFrame:
+    """Return events with KPI columns as computed by the previous pivot_table and merge implementation."""
+    scorings = scorings.merge(kpis, left_on="kpiId", right_on="id", how="outer") \
+        .sort_values("kpiId") \
+        .drop("kpiId", axis=1) \
+        .fillna({"eventId": "", "position": "", "playerId": ""}) \
+        .pivot_table(index=["eventId", "position", "playerId"], columns="name", values="value", aggfunc="sum",
+                     fill_value=None) \
+        .reset_index() \
+        .loc[lambda df: df["eventId"].notna()]
+    scorings["eventId"] = scorings["eventId"].mask(scorings["eventId"] == "", None).astype(pd.Int64Dtype())
+    scorings["playerId"] = scorings["playerId"].mask(scorings["playerId"] == "", None).astype(pd.Int64Dtype())
+    events = events.merge(
+        scorings,
+        left_on=["playerPosition", "playerId", "id"],
+        right_on=["position", "playerId", "eventId"],
+        how="left",
+        suffixes=("", "_scorings")
+    )
+    for name in kpis["name"]:
+        if name not in events.columns:
+            events[name] = np.nan
+    return events
+
+
+def kpi_values(events: pd.DataFrame, kpis: pd.DataFrame) -> pd.DataFrame:
+    """Return the KPI columns of events in catalog order as float64."""
+    return events[kpis["name"].drop_duplicates().to_list()].astype("float64").reset_index(drop=True)
+
+
+######
+#
+# These tests compare the integer-keyed pivot and join with the previous implementation
+#
+######
+
+
+def test_join_matches_previous_implementation():
+    events, scorings, kpis = make_events(), make_scorings(), make_kpis()
+    result = join_event_kpis(events, pivot_event_kpis(scorings, kpis))
+
+    # check that events are neither dropped nor duplicated and that kpis are summed like before
+    assert result[["id", "playerPosition", "playerId"]].equals(events)
+    pd.testing.assert_frame_equal(kpi_values(result, kpis), kpi_values(reference_join(events, scorings, kpis), kpis))
+    assert result.loc[0, "BYPASSED_OPPONENTS"] == 3.0
+
+
+def test_unscored_combinations_stay_nan():
+    events, scorings, kpis = make_events(), make_scorings(), make_kpis()
+    result = join_event_kpis(events, pivot_event_kpis(scorings, kpis))
+
+    # event 10 of player 100 has no PXT_PASS scoring, event 13 has no scorings at all
+    assert np.isnan(result.loc[0, "PXT_PASS"])
+    assert result.loc[4, kpis["name"]].isna().all()
+
+
+def test_missing_player_ids_match_each_other():
+    events, scorings, kpis = make_events(), make_scorings(), make_kpis()
+    result = join_event_kpis(events, pivot_event_kpis(scorings, kpis))
+
+    # event 11 has no player and gets the scoring without player
+    assert result.loc[2, "BYPASSED_OPPONENTS"] == 3.0
+
+
+def test_events_without_position_never_match():
+    events, scorings, kpis = make_events(), make_scorings(), make_kpis()
+    result = join_event_kpis(events, pivot_event_kpis(scorings, kpis))
+
+    # event 12 has no position, event 14 has no position and no player like its scoring
+    assert result.loc[3, kpis["name"]].isna().all()
+    assert result.loc[5, kpis["name"]].isna().all()
+    pd.testing.assert_frame_equal(
+        kpi_values(result, kpis).loc[[3, 5]],
+        kpi_values(reference_join(events, scorings, kpis), kpis).loc[[3, 5]]
+    )
+
+
+def test_duplicate_kpi_ids_are_ignored():
+    events, scorings, kpis = make_events(), make_scorings(), make_kpis()
+    duplicated = pd.concat([kpis, kpis.iloc[[0]]], ignore_index=True)
+    result = join_event_kpis(events, pivot_event_kpis(scorings, duplicated))
+
+    # the previous implementation fanned out scorings of duplicated kpis, so compare with the deduplicated catalog
+    pd.testing.assert_frame_equal(kpi_values(result, kpis), kpi_values(reference_join(events, scorings, kpis), kpis))
+
+
+def test_kpis_missing_from_catalog_are_dropped():
+    events, scorings, kpis = make_events(), make_scorings(), make_kpis()
+    unknown = pd.concat([scorings, scorings.iloc[[0]].assign(kpiId=99, value=100.0)], ignore_index=True)
+    result = join_event_kpis(events, pivot_event_kpis(unknown, kpis))
+
+    # check that no column is added for the unknown kpi and the values are unchanged
+    assert list(result.columns) == list(events.columns) + kpis["name"].to_list()
+    pd.testing.assert_frame_equal(kpi_values(result, kpis), kpi_values(reference_join(events, scorings, kpis), kpis))
+
+
+def test_zero_scorings():
+    events, kpis = make_events(), make_kpis()
+    scorings = make_scorings().iloc[0:0]
+    pivoted = pivot_event_kpis(scorings, kpis)
+    result = join_event_kpis(events, pivoted)
+
+    # check that all kpi columns are present and empty
+    assert len(pivoted) == 0
+    assert list(result.columns) == list(events.columns) + kpis["name"].to_list()
+    assert result[kpis["name"]].isna().all().all()
+    assert (result[kpis["name"]].dtypes == "float64").all()
+
+
+@pytest.mark.parametrize("scorings", [make_scorings(), make_scorings().iloc[0:0]])
+def test_polars_backend_matches_pandas_backend(scorings):
+    pytest.importorskip("polars")
+    events, kpis = make_events(), make_kpis()
+    pandas_result = join_event_kpis(events, pivot_event_kpis(scorings, kpis))
+    polars_result = join_event_kpis(events, pivot_event_kpis_polars(scorings, kpis))
+
+    # check that both backends return the same frame
+    pd.testing.assert_frame_equal(polars_result, pandas_result)
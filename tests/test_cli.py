@@ -0,0 +1,108 @@
+# load packages
+import os
+import threading
+import pandas as pd
+from impectPy.cli import export
+from impectPy.helpers import UnavailableMatchesError
+
+######
+#
+# These tests check which files the export writes and skips, using a fake
+# Impect instance instead of the API
+#
+######
+
+
+class FakeImpect:
+    def __init__(self, forbidden: tuple = (), failing: tuple = ()):
+        """Initialize a fake Impect instance that drops ``forbidden`` matches and raises for ``failing`` matches."""
+        self.forbidden = set(forbidden)  # matches that are missing from every result
+        self.failing = set(failing)  # matches whose chunk raises an exception
+        self.calls = []  # dataset method and matches or iteration of every call
+        self.lock = threading.Lock()  # lock to record calls from several threads
+
+    def record(self, name: str, items) -> None:
+        """Record a call and raise if it contains a failing match."""
+        with self.lock:
+            self.calls.append((name, items))
+        if isinstance(items, list) and self.failing.intersection(items):
+            raise Exception("Server error")
+
+    def getMatches(self, iteration: int) -> pd.DataFrame:
+        """Return four matches of the iteration, of which the last one is not available."""
+        self.record("getMatches", iteration)
+        return pd.DataFrame({"id": [1, 2, 3, 4], "available": [True, True, True, False]})
+
+    def getEvents(self, matches: list) -> pd.DataFrame:
+        """Return two events per match, without the forbidden matches."""
+        self.record("getEvents", matches)
+        matches = [match for match in matches if match not in self.forbidden]
+        if len(matches) == 0:
+            raise UnavailableMatchesError("All supplied matches are unavailable or forbidden.")
+        return pd.DataFrame({
+            "matchId": [match for match in matches for _ in range(2)],
+            "eventId": range(2 * len(matches))
+        })
+
+    def getSquadRatings(self, iteration: int) -> pd.DataFrame:
+        """Return the ratings of an iteration."""
+        self.record("getSquadRatings", iteration)
+        return pd.DataFrame({"iterationId": [iteration], "value": [1.0]})
+
+
+def files(output, dataset: str) -> list:
+    """Return the sorted file names written for a dataset."""
+    return sorted(os.listdir(os.path.join(output, dataset)))
+
+
+def test_only_matches_of_result_are_written(tmp_path):
+    api = FakeImpect(forbidden=[2])
+    failed = export(api, ["events"], str(tmp_path), iterations=[1], file_format="csv", chunk_size=10)
+
+    # check that unavailable and forbidden matches have no file
+    assert failed == 0
+    assert api.calls == [("getMatches", 1), ("getEvents", [1, 2, 3])]
+    assert files(tmp_path, "events") == ["1.csv", "3.csv"]
+    assert pd.read_csv(tmp_path / "events" / "3.csv").matchId.tolist() == [3, 3]
+
+    # check that a restart requests the missing match again
+    api = FakeImpect(forbidden=[2])
+    assert export(api, ["events"], str(tmp_path), matches=[1, 2, 3], file_format="csv") == 0
+    assert api.calls == [("getEvents", [2])]
+
+
+def test_existing_files_are_skipped_unless_overwrite(tmp_path):
+    os.makedirs(tmp_path / "events")
+    (tmp_path / "events" / "1.jsonl").write_text("existing")
+    os.makedirs(tmp_path / "squad-ratings")
+    (tmp_path / "squad-ratings" / "1.jsonl").write_text("existing")
+
+    # check that existing files are neither requested nor written
+    api = FakeImpect()
+    export(api, ["events", "squad-ratings"], str(tmp_path), iterations=[1], matches=[1, 2], file_format="jsonl")
+    assert sorted(api.calls, key=str) == [("getEvents", [2, 3]), ("getMatches", 1)]
+    assert (tmp_path / "events" / "1.jsonl").read_text() == "existing"
+    assert (tmp_path / "squad-ratings" / "1.jsonl").read_text() == "existing"
+
+    # check that all files are written again with overwrite
+    api = FakeImpect()
+    export(api, ["events", "squad-ratings"], str(tmp_path), iterations=[1], matches=[1, 2], file_format="jsonl",
+           overwrite=True)
+    assert sorted(api.calls, key=str) == [("getEvents", [1, 2, 3]), ("getMatches", 1), ("getSquadRatings", 1)]
+    assert (tmp_path / "events" / "1.jsonl").read_text() != "existing"
+    assert (tmp_path / "squad-ratings" / "1.jsonl").read_text() != "existing"
+    assert not any(name.endswith(".tmp") for name in files(tmp_path, "events"))
+
+
+def test_failed_task_is_counted_and_others_run(tmp_path, capsys):
+    api = FakeImpect(failing=[3])
+    failed = export(
+        api, ["events", "squad-ratings"], str(tmp_path), iterations=[1], matches=[5, 6], file_format="csv",
+        workers=2, chunk_size=2
+    )
+
+    # check that the chunk of match 3 failed and all other tasks wrote their files
+    assert failed == 1
+    assert files(tmp_path, "events") == ["1.csv", "2.csv", "5.csv", "6.csv"]
+    assert files(tmp_path, "squad-ratings") == ["1.csv"]
+    assert "events: [3]" in capsys.readouterr().err
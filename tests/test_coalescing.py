@@ -0,0 +1,80 @@
+# load packages
+import threading
+import pytest
+import impectPy as ip
+from impectPy.helpers import HTTPError
+from stub_server import StubServer
+
+######
+#
+# These tests check that identical GET requests in flight from several threads
+# are sent once and share one response
+#
+######
+
+
+@pytest.fixture(scope="module")
+def slow_server(dataset):
+    """Serve the synthetic dataset with enough latency for all threads to join the first request."""
+    with StubServer(dataset, capacity=10000, latency=0.3) as server:
+        yield server
+
+
+@pytest.fixture
+def connection(slow_server):
+    """Return the connection of an Impect instance logged in at the slow stub server."""
+    api = ip.Impect(ip.Config(host=slow_server.url, oidc_token_endpoint=slow_server.url + "/token"))
+    api.login("test", "test")
+    slow_server.requests.clear()
+    return api.connection
+
+
+def request_from_threads(connection, url: str, n: int = 8) -> list:
+    """Request ``url`` from ``n`` threads at once and return the response or exception of each thread."""
+    barrier = threading.Barrier(n)
+    results = [None] * n
+
+    def request(i):
+        barrier.wait()
+        try:
+            results[i] = connection.make_api_request_limited(url=url, method="GET")
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_identical_requests_are_sent_once(connection, slow_server):
+    url = f"{slow_server.url}/v5/customerapi/iterations/1/squads"
+    responses = request_from_threads(connection, url)
+
+    # check that one request was sent and every thread received the same decoded body
+    assert [path for _, path, _ in slow_server.requests] == ["/v5/customerapi/iterations/1/squads"]
+    assert all(response is responses[0] for response in responses)
+    assert all(response.json() is responses[0].json() for response in responses)
+    assert len(responses[0].json()["data"]) > 0
+
+    # check that the request is no longer in flight
+    assert connection.in_flight == {}
+
+
+def test_leader_exception_reaches_followers(connection, slow_server):
+    url = f"{slow_server.url}/v5/customerapi/nope"
+    results = request_from_threads(connection, url)
+
+    # check that one request was sent and its exception was raised in every thread
+    assert len(slow_server.requests) == 1
+    assert all(isinstance(result, HTTPError) for result in results)
+    assert all(result is results[0] for result in results)
+    assert "404" in str(results[0])
+
+    # check that the request is no longer in flight and is sent again afterwards
+    assert connection.in_flight == {}
+    with pytest.raises(HTTPError):
+        connection.make_api_request_limited(url=url, method="GET")
+    assert len(slow_server.requests) == 2
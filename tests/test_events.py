@@ -0,0 +1,73 @@
+# load packages
+import pandas as pd
+import pytest
+import impectPy as ip
+
+######
+#
+# These tests check that projected and filtered events equal the same columns
+# and rows of the full result
+#
+######
+
+
+@pytest.fixture(scope="module")
+def matches(dataset) -> list:
+    """Return the ids of the first two synthetic matches."""
+    return [match["id"] for match in dataset.matches[:2]]
+
+
+@pytest.fixture(scope="module")
+def full_events(server, matches) -> pd.DataFrame:
+    """Return all columns of the events of the synthetic matches, including possessions."""
+    api = ip.Impect(ip.Config(host=server.url, oidc_token_endpoint=server.url + "/token"))
+    api.login("test", "test")
+    return api.getEvents(matches, include_possessions=True)
+
+
+def requested_endpoints(server) -> set:
+    """Return the endpoint names requested from the stub server, with ids removed."""
+    return {path.rstrip("/").split("/")[-1] for _, path, _ in server.requests}
+
+
+@pytest.mark.parametrize("columns, skipped", [
+    # drops kpis and set pieces entirely
+    (["matchId", "eventId", "gameTime", "squadName", "playerName", "actionType"], {"event-kpis", "set-pieces"}),
+    # only kpis
+    (["eventId", "KPI_1", "SHOT_XG"], {"set-pieces", "coaches"}),
+    # set pieces with player names, but no kpis
+    (["eventId", "setPieceCategory", "setPieceSubPhaseMainEventPlayerName"], {"event-kpis", "coaches"}),
+    # match metadata only
+    (["eventId", "competitionName", "homeCoachName", "awaySquadCountryName"], {"event-kpis", "set-pieces"}),
+])
+def test_projection_equals_columns_of_full_result(api, server, matches, full_events, columns, skipped):
+    events = api.getEvents(matches, columns=columns, include_possessions=True)
+
+    # check that the projection equals the full result and skips unneeded endpoints
+    pd.testing.assert_frame_equal(events, full_events[columns])
+    assert requested_endpoints(server).isdisjoint(skipped)
+
+
+@pytest.mark.parametrize("columns", [
+    ["eventId", "possessionId", "phaseId", "gameState", "leadsToGoal"],
+    ["playerSequenceId", "teamGoals", "opponentGoals", "KPI_2"],
+])
+def test_projection_of_possession_columns(api, matches, full_events, columns):
+    events = api.getEvents(matches, columns=columns, include_possessions=True)
+
+    # check that possession columns are derived from all events, although their inputs are not returned
+    pd.testing.assert_frame_equal(events, full_events[columns])
+
+
+def test_projection_with_filters(api, matches, full_events):
+    columns = ["eventId", "playerName", "possessionId", "gameState", "SHOT_XG"]
+    events = api.getEvents(matches, columns=columns, include_possessions=True, action_types=["SHOT"], periods=[2])
+
+    # check that filters select the same rows as filtering the full result
+    expected = full_events[(full_events.actionType == "SHOT") & (full_events.periodId == 2)][columns]
+    pd.testing.assert_frame_equal(events, expected.reset_index(drop=True))
+
+
+def test_invalid_columns_raise(api, matches):
+    with pytest.raises(Exception, match="Invalid columns: nope"):
+        api.getEvents(matches, columns=["eventId", "nope"])
@@ -0,0 +1,83 @@
+# load packages
+import numpy as np
+import pandas as pd
+from impectPy.helpers import lookup_rows, join_columns
+
+######
+#
+# These tests compare the positional key lookups with left merges
+#
+######
+
+
+def make_frames():
+    """Return a frame of events and a table of matches keyed by match and squad id."""
+    df = pd.DataFrame({
+        "matchId": [1, 1, 2, 3, 2],
+        "squadId": pd.array([10, 11, 20, None, None], dtype="Int64"),
+        "value": [0.1, 0.2, 0.3, 0.4, 0.5]
+    }, index=[5, 6, 7, 8, 9])
+    table = pd.DataFrame({
+        "id": [1, 1, 2, 2],
+        "squad": pd.array([10, 11, 20, None], dtype="Int64"),
+        "count": [3, 4, 5, 6],
+        "share": [0.5, 0.25, 1.0, 0.75],
+        "name": pd.Series(["a", "b", "c", "d"], dtype="str"),
+        "coachId": pd.array([7, None, 8, 9], dtype="Int64"),
+        "flag": [True, False, True, False]
+    })
+    return df, table
+
+
+def test_lookup_rows():
+    df, table = make_frames()
+    rows = lookup_rows([table.id, table.squad], [df.matchId, df.squadId])
+
+    # missing squad ids match each other, match 3 has no row
+    assert rows.tolist() == [0, 1, 2, -1, 3]
+
+
+def test_join_columns_matches_left_merge():
+    df, table = make_frames()
+    columns = ["count", "share", "name", "coachId", "flag"]
+    result = join_columns(df, table, ["matchId", "squadId"], ["id", "squad"], columns)
+    expected = df.merge(
+        table, left_on=["matchId", "squadId"], right_on=["id", "squad"], how="left"
+    ).drop(columns=["id", "squad"])
+    expected.index = df.index
+
+    # check values, missing values of unmatched keys and dtypes
+    pd.testing.assert_frame_equal(result, expected)
+    assert result.loc[8, columns].isna().all()
+    assert result.dtypes.to_dict() == expected.dtypes.to_dict()
+
+
+def test_join_columns_dtypes_without_unmatched_keys():
+    df, table = make_frames()
+    df = df[df.matchId != 3]
+    result = join_columns(df, table, ["matchId", "squadId"], ["id", "squad"], ["count", "share", "name", "flag"])
+
+    # check that integer and boolean columns are not cast if every row has a match
+    assert result["count"].dtype == "int64"
+    assert result["flag"].dtype == "bool"
+    assert result["name"].dtype == table["name"].dtype
+
+
+def test_join_columns_takes_first_duplicate_right_key():
+    df, table = make_frames()
+    table = pd.concat([table, table.iloc[[0]].assign(count=99)], ignore_index=True)
+    result = join_columns(df, table, ["matchId", "squadId"], ["id", "squad"], ["count"])
+
+    # unlike a merge, duplicate table keys neither duplicate rows nor change the matched row
+    assert len(result) == len(df)
+    assert result["count"].tolist()[:3] == [3.0, 4.0, 5.0]
+
+
+def test_join_columns_skips_existing_columns():
+    df, table = make_frames()
+    result = join_columns(df, table.rename(columns={"share": "value"}), ["matchId"], ["id"], ["value", "count"])
+
+    # check that the existing column is kept and only the new column is added
+    assert result["value"].equals(df["value"])
+    assert list(result.columns) == ["matchId", "squadId", "value", "count"]
+    assert np.isnan(result.loc[8, "count"])
@@ -0,0 +1,71 @@
+# load packages
+import copy
+import pytest
+import impectPy as ip
+from payloads import SyntheticDataset
+from stub_server import StubServer
+
+######
+#
+# These tests check the per-connection squad and country index of getMatches
+#
+######
+
+
+@pytest.fixture(scope="module")
+def broken_server():
+    """Serve an iteration with a squad of an unknown country and a match of an unknown squad."""
+    dataset = SyntheticDataset(n_iterations=1, n_squads=4, n_players=2, n_events=10)
+    squads = dataset.data["/iterations/1/squads"]
+    squads[0]["countryId"] = 99
+    matchplan = dataset.data["/iterations/1/matches"]
+    unknown = copy.deepcopy(matchplan[-1])
+    unknown.update({"id": 9999, "awaySquadId": 999})
+    matchplan.append(unknown)
+    with StubServer(dataset, capacity=10000) as server:
+        yield server, dataset
+
+
+def requested_paths(server) -> list:
+    """Return the paths requested from the stub server."""
+    return [path for _, path, _ in server.requests]
+
+
+def test_second_call_skips_squads_and_countries(api, server):
+    first = api.getMatches(1)
+    paths = requested_paths(server)
+    assert any(path.endswith("/squads") for path in paths)
+    assert any(path.endswith("/countries") for path in paths)
+
+    # load matches again on the same connection
+    server.requests.clear()
+    second = api.getMatches(1)
+    paths = requested_paths(server)
+
+    # check that only the matches are requested again and the result is unchanged
+    assert paths == ["/v5/customerapi/iterations/1/matches"]
+    assert second.equals(first)
+
+
+def test_matches_with_unknown_squad_or_country_are_dropped(broken_server):
+    server, dataset = broken_server
+    api = ip.Impect(ip.Config(host=server.url, oidc_token_endpoint=server.url + "/token"))
+    api.login("test", "test")
+    matches = api.getMatches(1)
+
+    # matches are only kept if both squads and their countries are known, like the former inner merges
+    squads = {squad["id"]: squad for squad in dataset.data["/iterations/1/squads"]}
+    countries = {country["id"] for country in dataset.countries}
+    expected = sorted(
+        match["id"] for match in dataset.data["/iterations/1/matches"]
+        if all(
+            match[side] in squads and squads[match[side]]["countryId"] in countries
+            for side in ["homeSquadId", "awaySquadId"]
+        )
+    )
+    assert sorted(matches.id.tolist()) == expected
+    assert 9999 not in expected and len(expected) == 6
+
+    # check that the squad and country columns are filled for all remaining matches
+    for col in ["homeSquadName", "awaySquadName", "homeSquadCountryName", "awaySquadCountryName"]:
+        assert matches[col].notna().all()
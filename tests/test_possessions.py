@@ -0,0 +1,139 @@
+# load packages
+import pandas as pd
+import pytest
+import impectPy as ip
+from impectPy.possessions import derive_possessions, possession_cols
+
+######
+#
+# These tests check the player sequences, possessions, phases and game states
+# of a fixed match against hand-computed values
+#
+######
+
+
+# define a home squad goal in the first half followed by a period change, an event without player
+# and player events without phase
+H, A = "home", "away"
+match_events = [
+    # period, time, player, squad, attacking squad, phase, action, action type, result
+    (1, 0, 1, H, H, "IN_POSSESSION", "PASS", "KICK_OFF", "SUCCESS"),
+    (1, 5, 1, H, H, "IN_POSSESSION", "DRIBBLE", "DRIBBLE", "SUCCESS"),
+    (1, 8, 2, H, H, "IN_POSSESSION", "SHOT", "SHOT", "SUCCESS"),
+    (1, 9, 2, H, H, "IN_POSSESSION", "GOAL", "GOAL", None),
+    (1, 20, None, H, None, None, "OUT", "NO_VIDEO", None),
+    (1, 30, 3, A, A, "SET_PIECE", "PASS", "KICK_OFF", "SUCCESS"),
+    (1, 35, 4, A, A, "IN_POSSESSION", "RECEPTION", "RECEPTION", None),
+    (1, 40, 5, H, H, "IN_POSSESSION", "BALL_WIN", "INTERCEPTION", "SUCCESS"),
+    (2, 10000, 3, A, A, "IN_POSSESSION", "PASS", "KICK_OFF", "SUCCESS"),
+    (2, 10005, 3, A, A, "IN_POSSESSION", "SHOT", "SHOT", "FAIL"),
+    (2, 10010, 1, H, H, None, "CLEARANCE", "CLEARANCE", "SUCCESS"),
+    (2, 10020, 1, H, H, "IN_POSSESSION", "PASS", "LOW_PASS", "SUCCESS"),
+]
+
+# define expected derived columns per event, the event without player has none
+expected_columns = pd.DataFrame({
+    "playerSequenceId": pd.array([1, 1, 2, 2, None, 3, 4, 5, 6, 6, 7, 7], dtype="Int64"),
+    "possessionId": pd.array([1, 1, 1, 1, None, 2, 2, 3, 4, 4, 5, 5], dtype="Int64"),
+    "phaseId": pd.array([1, 1, 1, 1, None, 2, 3, 4, 5, 5, None, 6], dtype="Int64"),
+    "teamGoals": [0, 0, 0, 0, None, 0, 0, 1, 0, 0, 1, 1],
+    "opponentGoals": [0, 0, 0, 0, None, 1, 1, 0, 1, 1, 0, 0],
+    "gameState": ["tied"] * 4 + [None] + ["trailing"] * 2 + ["leading"] + ["trailing"] * 2 + ["leading"] * 2,
+    "leadsToShot": pd.array([True] * 4 + [None, False, False, False, True, True, False, False], dtype="boolean"),
+    "leadsToGoal": pd.array([True] * 4 + [None] + [False] * 7, dtype="boolean")
+})
+
+
+@pytest.fixture(scope="module")
+def events(server, dataset) -> pd.DataFrame:
+    """Return the events of a synthetic match with the fixed events above."""
+    api = ip.Impect(ip.Config(host=server.url, oidc_token_endpoint=server.url + "/token"))
+    api.login("test", "test")
+    events = api.getEvents([dataset.matches[0]["id"]]).head(len(match_events)).copy()
+
+    # overwrite the columns that define sequences, possessions, phases and game states
+    squads = {
+        H: (events.homeSquadId.iloc[0], events.homeSquadName.iloc[0]),
+        A: (events.awaySquadId.iloc[0], events.awaySquadName.iloc[0])
+    }
+    period, time, player, squad, attacking, phase, action, action_type, result = zip(*match_events)
+    events["eventNumber"] = range(1, len(match_events) + 1)
+    events["periodId"] = period
+    events["gameTimeInSec"] = time
+    events["duration"] = 1.0
+    events["playerId"] = pd.array(player, dtype="Int64")
+    events["playerName"] = [None if id is None else f"Player {id}" for id in player]
+    events["squadId"] = [squads[side][0] for side in squad]
+    events["squadName"] = [squads[side][1] for side in squad]
+    events["attackingSquadId"] = pd.array([None if side is None else squads[side][0] for side in attacking],
+                                          dtype="Int64")
+    events["phase"] = phase
+    events["action"] = action
+    events["actionType"] = action_type
+    events["result"] = result
+    return events.reset_index(drop=True)
+
+
+def test_derive_possessions(events):
+    derived = derive_possessions(events)
+
+    # check ids, goals, game states and outcomes of each event
+    pd.testing.assert_frame_equal(derived, expected_columns, check_dtype=False)
+    assert list(derived.columns) == possession_cols
+    assert [str(derived[col].dtype) for col in ["playerSequenceId", "possessionId", "phaseId"]] == ["Int64"] * 3
+    assert [str(derived[col].dtype) for col in ["leadsToShot", "leadsToGoal"]] == ["boolean"] * 2
+
+
+def test_derive_possessions_restarts_ids_per_match(events):
+    both = pd.concat([events, events.assign(matchId=events.matchId + 1)], ignore_index=True)
+    derived = derive_possessions(both)
+
+    # check that the second match repeats the ids, goals and game states of the first match
+    pd.testing.assert_frame_equal(
+        derived.iloc[len(events):].reset_index(drop=True), derived.iloc[:len(events)], check_dtype=False
+    )
+    pd.testing.assert_frame_equal(derived.iloc[:len(events)], expected_columns, check_dtype=False)
+
+
+def instances(events: pd.DataFrame, code: str) -> list:
+    """Return ID, code and game state of the XML instances generated for ``events``."""
+    tree = ip.generateXML(events.copy(), 3, 3, 100, 3000, 6000, 9000, 12000, code)
+    result = []
+    for instance in tree.getroot().find("ALL_INSTANCES"):
+        labels = {label.findtext("group"): label.findtext("text") for label in instance.findall("label")}
+        result.append((int(instance.findtext("ID")), instance.findtext("code"), labels.get("04 | gameState")))
+    return result
+
+
+def test_xml_player_sequences(events):
+    result = instances(events, "playerName")
+
+    # both kickoffs are followed by one instance per player sequence, with the game state of its first event
+    assert result == [
+        (0, "Kickoff", None),
+        (1, "2nd Half Kickoff", None),
+        (2, "Player 1", "tied"),
+        (3, "Player 2", "tied"),
+        (4, "Player 3", "trailing"),
+        (5, "Player 4", "trailing"),
+        (6, "Player 5", "leading"),
+        (7, "Player 3", "trailing"),
+        (8, "Player 1", "leading")
+    ]
+
+
+def test_xml_team_phases(events):
+    result = instances(events, "team")
+    home, away = events.homeSquadName.iloc[0], events.awaySquadName.iloc[0]
+
+    # both kickoffs are followed by one instance per team phase, events without phase are skipped
+    assert result == [
+        (0, "Kickoff", None),
+        (1, "2nd Half Kickoff", None),
+        (2, f"{home} - IN POSSESSION", "tied"),
+        (3, f"{away} - SET PIECE", "trailing"),
+        (4, f"{away} - IN POSSESSION", "trailing"),
+        (5, f"{home} - IN POSSESSION", "leading"),
+        (6, f"{away} - IN POSSESSION", "trailing"),
+        (7, f"{home} - IN POSSESSION", "leading")
+    ]
@@ -0,0 +1,62 @@
+# load packages
+import pandas as pd
+import pytest
+from impectPy.data import getDataFromHost
+
+######
+#
+# These tests check that master data is revalidated with conditional requests
+# and that the stored DataFrame is not shared with the caller
+#
+######
+
+
+@pytest.fixture
+def sent_headers(api) -> list:
+    """Record the headers of every request sent by the connection of ``api``."""
+    headers = []
+    request = api.connection.session.request
+
+    def record(method, url, **kwargs):
+        headers.append(dict(kwargs.get("headers") or {}))
+        return request(method, url, **kwargs)
+
+    api.connection.session.request = record
+    return headers
+
+
+def test_second_request_is_revalidated(api, server, sent_headers):
+    url = f"{server.url}/v5/customerapi/countries"
+    first = getDataFromHost(url=url, method="GET", connection=api.connection)
+    entry = api.connection.revalidation_cache[url]
+
+    # send validators of stored response, including a Last-Modified date
+    entry.last_modified = "Mon, 19 Oct 2026 00:00:00 GMT"
+    second = getDataFromHost(url=url, method="GET", connection=api.connection)
+
+    # check that the first request is unconditional and the second one is answered with 304
+    assert "If-None-Match" not in sent_headers[0]
+    assert sent_headers[1]["If-None-Match"] == entry.etag
+    assert sent_headers[1]["If-Modified-Since"] == entry.last_modified
+    assert [status for _, _, status in server.requests] == [200, 304]
+
+    # check that the stored frame is returned as a copy
+    pd.testing.assert_frame_equal(second, first)
+    assert second is not entry.frame and first is not entry.frame
+
+
+def test_mutating_revalidated_frame_keeps_cache(api, server):
+    url = f"{server.url}/v5/customerapi/countries"
+    first = getDataFromHost(url=url, method="GET", connection=api.connection)
+    expected = first.copy()
+
+    # mutate the returned frames of the first and second request
+    first.loc[0, "fifaName"] = "changed"
+    second = getDataFromHost(url=url, method="GET", connection=api.connection)
+    second.drop(columns="fifaName", inplace=True)
+    second["id"] = -1
+
+    # check that a third request still returns the original frame
+    third = getDataFromHost(url=url, method="GET", connection=api.connection)
+    pd.testing.assert_frame_equal(third, expected)
+    assert [status for _, _, status in server.requests] == [200, 304, 304]
@@ -0,0 +1,119 @@
+# load packages
+import numpy as np
+import pandas as pd
+from impectPy.set_pieces import add_set_piece_names
+
+######
+#
+# These functions build set pieces merged with their matches and the result of
+# the previous apply and merge implementation of getSetPieces
+#
+######
+
+
+roles = ["MainEventPlayer", "PassReceiver", "FirstTouchPlayer", "SecondTouchPlayer"]
+name_cols = ["defendingSquadId", "attackingSquadName", "defendingSquadName"] + [f"setPieceSubPhase{role}Name" for role in roles]
+
+
+def make_set_pieces() -> pd.DataFrame:
+    """Return set pieces of both squads with missing receiver, first touch and second touch players."""
+    return pd.DataFrame({
+        "matchId": [1, 1, 1, 2],
+        "squadId": [10, 20, 10, 30],
+        "homeSquadId": [10, 10, 10, 30],
+        "awaySquadId": [20, 20, 20, 10],
+        "setPieceCategory": ["CORNER", "FREE_KICK", "CORNER", "THROW_IN"],
+        "setPieceSubPhaseMainEventPlayerId": pd.array([100, 200, 101, 300], dtype="Int64"),
+        "setPieceSubPhasePassReceiverId": [101.0, np.nan, 102.0, np.nan],
+        "setPieceSubPhaseFirstTouchPlayerId": pd.array([None, 201, 102, None], dtype="Int64"),
+        "setPieceSubPhaseSecondTouchPlayerId": pd.array([None, None, 100, 999], dtype="Int64")
+    })
+
+
+def make_squads() -> pd.DataFrame:
+    """Return squads with their names."""
+    return pd.DataFrame({"id": [10, 20, 30], "name": ["Home", "Away", "Other"]})
+
+
+def make_players() -> pd.DataFrame:
+    """Return players with their common names."""
+    return pd.DataFrame({
+        "id": [100, 101, 102, 200, 201, 300],
+        "commonname": ["A", "B", "C", "D", "E", "F"]
+    })
+
+
+def reference_names(set_pieces: pd.DataFrame, squads: pd.DataFrame, players: pd.DataFrame) -> pd.DataFrame:
+    """Return set pieces with names as computed by the previous apply and merge implementation."""
+    set_pieces = set_pieces.copy()
+    set_pieces["defendingSquadId"] = set_pieces.apply(
+        lambda row: row.homeSquadId if row.squadId == row.awaySquadId else row.awaySquadId,
+        axis=1
+    )
+    set_pieces = set_pieces.merge(
+        squads[["id", "name"]].rename(columns={"id": "squadId", "name": "attackingSquadName"}),
+        left_on="squadId", right_on="squadId", how="left", suffixes=("", "_home")
+    ).merge(
+        squads[["id", "name"]].rename(columns={"id": "squadId", "name": "defendingSquadName"}),
+        left_on="defendingSquadId", right_on="squadId", how="left", suffixes=("", "_away")
+    )
+    for role, suffix in zip(roles, ["_main", "_receiver", "_first", "_second"]):
+        set_pieces = set_pieces.merge(
+            players[["id", "commonname"]].rename(
+                columns={"id": f"setPieceSubPhase{role}Id", "commonname": f"setPieceSubPhase{role}Name"}
+            ),
+            left_on=f"setPieceSubPhase{role}Id", right_on=f"setPieceSubPhase{role}Id", how="left", suffixes=("", suffix)
+        )
+    return set_pieces
+
+
+def names(frame: pd.DataFrame) -> pd.Series:
+    """Return the name column of ``frame`` indexed by ID, keeping the last name per ID like getSetPieces."""
+    return frame.drop_duplicates("id", keep="last").set_index("id").iloc[:, 0]
+
+
+######
+#
+# These tests compare the vectorised name lookups with the previous implementation
+#
+######
+
+
+def test_names_match_previous_implementation():
+    set_pieces, squads, players = make_set_pieces(), make_squads(), make_players()
+    result = add_set_piece_names(set_pieces.copy(), names(squads), names(players))
+    expected = reference_names(set_pieces, squads, players)
+
+    # check values and dtypes of the added columns
+    pd.testing.assert_frame_equal(result[name_cols], expected[name_cols])
+
+
+def test_missing_player_ids_have_no_name():
+    set_pieces, squads, players = make_set_pieces(), make_squads(), make_players()
+    result = add_set_piece_names(set_pieces.copy(), names(squads), names(players))
+
+    # missing receiver, first touch and second touch ids and unknown ids have no name
+    assert result.setPieceSubPhasePassReceiverName.isna().tolist() == [False, True, False, True]
+    assert result.setPieceSubPhaseFirstTouchPlayerName.isna().tolist() == [True, False, False, True]
+    assert result.setPieceSubPhaseSecondTouchPlayerName.isna().tolist() == [True, True, False, True]
+
+
+def test_defending_squad():
+    set_pieces, squads, players = make_set_pieces(), make_squads(), make_players()
+    result = add_set_piece_names(set_pieces.copy(), names(squads), names(players))
+
+    # the defending squad is the home squad if the away squad attacks and the away squad otherwise
+    assert result.defendingSquadId.tolist() == [20, 10, 20, 10]
+    assert result.defendingSquadName.tolist() == ["Away", "Home", "Away", "Home"]
+
+
+def test_duplicate_player_id_across_squads_keeps_rows():
+    set_pieces, squads = make_set_pieces(), make_squads()
+    players = pd.concat([make_players(), pd.DataFrame({"id": [100], "commonname": ["A (new squad)"]})], ignore_index=True)
+    result = add_set_piece_names(set_pieces.copy(), names(squads), names(players))
+
+    # the previous merges duplicated every set piece of the player, the lookup keeps one row with the last name
+    assert len(reference_names(set_pieces, squads, players)) == len(set_pieces) + 2
+    assert len(result) == len(set_pieces)
+    assert result.setPieceSubPhaseMainEventPlayerName.tolist()[0] == "A (new squad)"
+    assert result.setPieceSubPhaseSecondTouchPlayerName.tolist()[2] == "A (new squad)"
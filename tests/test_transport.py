@@ -0,0 +1,61 @@
+# load packages
+import pandas as pd
+import pytest
+import impectPy as ip
+from impectPy.helpers import HTTPError
+
+######
+#
+# These tests record a session against the stub server and replay it without
+# network access
+#
+######
+
+
+@pytest.fixture(scope="module")
+def recording(server, dataset, tmp_path_factory) -> tuple:
+    """Record matches and events of a synthetic match and return the archive path and the recorded frames."""
+    path = str(tmp_path_factory.mktemp("transport") / "session.zip")
+    recorder = ip.RecordingTransport(path)
+    api = ip.Impect(ip.Config(host=server.url, oidc_token_endpoint=server.url + "/token", transport=recorder))
+    api.login("test", "test")
+    match = dataset.matches[0]["id"]
+    frames = {"matches": api.getMatches(1), "events": api.getEvents([match])}
+    recorder.save()
+    return path, match, frames
+
+
+def replay(path: str) -> ip.Impect:
+    """Return an Impect instance that answers all requests from the archive at ``path``."""
+    api = ip.Impect(ip.Config(transport=ip.ReplayTransport(path, latency=0)))
+    api.login("test", "test")
+    return api
+
+
+def test_replay_returns_recorded_frames(server, recording):
+    path, match, frames = recording
+    server.requests.clear()
+    api = replay(path)
+
+    # check that the replayed frames equal the recorded ones without any request reaching the server
+    pd.testing.assert_frame_equal(api.getMatches(1), frames["matches"])
+    pd.testing.assert_frame_equal(api.getEvents([match]), frames["events"])
+    assert server.requests == []
+
+
+def test_replay_archive_contains_no_token_requests(recording):
+    path, _, _ = recording
+    transport = ip.ReplayTransport(path, latency=0)
+
+    # check that the archive contains the requested data, but no token request
+    assert "GET /v5/customerapi/iterations/1/matches" in transport.keys()
+    assert not any(key.endswith("/token") for key in transport.keys())
+
+
+def test_unrecorded_request_raises(recording):
+    path, _, _ = recording
+    api = replay(path)
+
+    # check that a request missing from the archive is answered with 404
+    with pytest.raises(HTTPError, match="Request not recorded: GET /v5/customerapi/iterations/2/matches"):
+        api.getMatches(2)